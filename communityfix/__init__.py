@@ -0,0 +1 @@
+"""CommUnityFix data layer - storage and helpers shared by the Streamlit app"""
@@ -0,0 +1,197 @@
+"""Running totals behind the Progress Dashboard
+
+``ReportAggregates`` keeps the counts the dashboard charts need (status,
+issue type, reports per day, resolution times) and adjusts them as reports
+are added or change status, so no view has to rescan every report. It
+works on report records (see communityfix/records.py), whose times are
+already integers. ``chart_data()`` returns a small hashable summary that
+the app uses as the cache key for the Plotly figures.
+
+Resolution time is measured from submission to the ``resolved_at`` time
+recorded when an admin marks a report Resolved. Reports resolved before
+that was recorded have no resolution time and are left out of those figures.
+
+Reports moved to the archive are counted from the archive's rollups (see
+``add_archived`` and communityfix/archive.py), so the figures keep covering
+every report ever made.
+"""
+import bisect
+import datetime
+import math
+from collections import Counter, namedtuple
+
+from communityfix import config
+
+
+ChartData = namedtuple('ChartData', [
+    'status_counts',      # ((status, count), ...) most common first
+    'issue_counts',       # ((issue_type, count), ...) most common first
+    'daily_counts',       # ((date, count), ...) oldest first
+    'resolution_days',    # ((whole days, count), ...)
+    'resolution_mean',    # mean days to resolution
+])
+
+
+def resolution_time_days(report):
+    """Days from submission to resolution, or None if not (recorded as) resolved"""
+    if report.status != 'Resolved' or report.resolved_ts is None:
+        return None
+    return max((report.resolved_ts - report.reported_ts) / 86400, 0.0)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def sla_days(issue_type):
+    """Target resolution time for an issue type"""
+    return config.ISSUE_TYPE_SLA_DAYS.get(issue_type, config.DEFAULT_SLA_DAYS)
+
+
+class ReportAggregates:
+    """Status, issue-type, per-day and resolution-time counts"""
+
+    def __init__(self, reports=()):
+        self.status_counts = Counter()
+        self.issue_counts = Counter()
+        self.issue_status_counts = Counter()
+        self.daily_counts = Counter()
+        # Sorted resolution times (days), overall and per issue type
+        self.resolution_times = []
+        self.resolution_times_by_issue = {}
+        # Running sums of resolution times, overall (key None) and per issue type
+        self.resolution_totals = Counter()
+        # Resolution times in whole days, for the histogram
+        self.resolution_day_counts = Counter()
+        # What each report contributed, to take it back out on update
+        self._keys = {}
+        for report in reports:
+            self.add(report)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _count(self, keys, delta):
+        status, issue_type, day, resolution = keys
+        for counter, key in ((self.status_counts, status), (self.issue_counts, issue_type),
+                             (self.issue_status_counts, (issue_type, status)), (self.daily_counts, day)):
+            counter[key] += delta
+            if not counter[key]:
+                del counter[key]
+        if resolution is None:
+            return
+        self.resolution_totals[None] += delta * resolution
+        self.resolution_totals[issue_type] += delta * resolution
+        self.resolution_day_counts[int(resolution)] += delta
+        if not self.resolution_day_counts[int(resolution)]:
+            del self.resolution_day_counts[int(resolution)]
+        by_issue = self.resolution_times_by_issue.setdefault(issue_type, [])
+        for times in (self.resolution_times, by_issue):
+            if delta > 0:
+                bisect.insort(times, resolution)
+            else:
+                del times[bisect.bisect_left(times, resolution)]
+        if not by_issue:
+            del self.resolution_times_by_issue[issue_type]
+
+    def add(self, report):
+        """Count a newly created report"""
+        keys = (report.status, report.issue_type, report.day, resolution_time_days(report))
+        self._count(keys, 1)
+        self._keys[report.id] = keys
+
+    def update(self, report):
+        """Move a report's counts after its status or issue type changed"""
+        old_keys = self._keys.get(report.id)
+        if old_keys is None:
+            self.add(report)
+            return
+        keys = (report.status, report.issue_type, old_keys[2], resolution_time_days(report))
+        if keys != old_keys:
+            self._count(old_keys, -1)
+            self._count(keys, 1)
+            self._keys[report.id] = keys
+
+    def remove(self, report_id):
+        """Stop counting a report"""
+        keys = self._keys.pop(report_id, None)
+        if keys is not None:
+            self._count(keys, -1)
+
+    def add_archived(self, rollup):
+        """Count archived reports from an archive rollup
+
+        Archived reports are all Resolved; their resolution times are known
+        to the hour. They cannot be taken out again.
+        """
+        for issue_type, total in rollup['issue_counts'].items():
+            self.status_counts['Resolved'] += total
+            self.issue_counts[issue_type] += total
+            self.issue_status_counts[(issue_type, 'Resolved')] += total
+        for day, total in rollup['daily_counts'].items():
+            self.daily_counts[datetime.date.fromisoformat(day)] += total
+        for issue_type, hour_counts in rollup['resolution_hours'].items():
+            times = []
+            for hours, total in hour_counts.items():
+                resolution = int(hours) / 24
+                times.extend([resolution] * total)
+                self.resolution_totals[None] += total * resolution
+                self.resolution_totals[issue_type] += total * resolution
+                self.resolution_day_counts[int(resolution)] += total
+            for sorted_times in (self.resolution_times, self.resolution_times_by_issue.setdefault(issue_type, [])):
+                sorted_times.extend(times)
+                sorted_times.sort()
+
+    def status_totals(self):
+        """Reports per status, archived ones included"""
+        return dict(self.status_counts)
+
+    def resolution_stats(self, issue_type=None):
+        """Count, mean, median and 90th percentile of resolution times (days)"""
+        if issue_type is None:
+            times = self.resolution_times
+        else:
+            times = self.resolution_times_by_issue.get(issue_type, [])
+        return {
+            'count': len(times),
+            'mean': self.resolution_totals[issue_type] / len(times) if times else 0,
+            'p50': percentile(times, 0.5),
+            'p90': percentile(times, 0.9),
+        }
+
+    def sla_compliance(self, issue_type):
+        """Share of resolved reports of an issue type fixed within its SLA, or None"""
+        times = self.resolution_times_by_issue.get(issue_type)
+        if not times:
+            return None
+        return bisect.bisect_right(times, sla_days(issue_type)) / len(times)
+
+    def untimed_resolved(self):
+        """Resolved reports with no recorded resolution time"""
+        return self.status_counts['Resolved'] - len(self.resolution_times)
+
+    def issue_analysis(self):
+        """Per issue type: total, resolved, in_progress and received counts"""
+        analysis = {}
+        for issue_type, total in self.issue_counts.items():
+            analysis[issue_type] = {
+                'total': total,
+                'resolved': self.issue_status_counts[(issue_type, 'Resolved')],
+                'in_progress': self.issue_status_counts[(issue_type, 'In Progress')],
+                'received': self.issue_status_counts[(issue_type, 'Received')],
+            }
+        return analysis
+
+    def chart_data(self):
+        """Hashable summary of everything the progress charts show"""
+        return ChartData(
+            status_counts=tuple(self.status_counts.most_common()),
+            issue_counts=tuple(self.issue_counts.most_common()),
+            daily_counts=tuple(sorted(self.daily_counts.items())),
+            resolution_days=tuple(sorted(self.resolution_day_counts.items())),
+            resolution_mean=round(self.resolution_stats()['mean'], 1),
+        )
@@ -0,0 +1,274 @@
+"""HTTP/JSON API for submitting reports and checking their status
+
+A small Starlette app for mobile clients, SMS gateways and kiosks that
+should not have to load the Streamlit page. It goes through the same
+``ReportService`` as the app, so submissions get the report form's
+validation and land in the same store:
+
+    POST /reports               submit a report (JSON or form fields)
+    POST /photos                upload a photo (raw image body or multipart "photo")
+    GET  /reports/{id}          status of one report (archived ones included)
+    GET  /reports               list, with filters and offset/limit paging
+    GET  /health                liveness check
+
+Run it next to (or instead of) the Streamlit app with::
+
+    python -m communityfix.api --host 0.0.0.0 --port 8000
+
+A submission that looks like an open report of the same problem (see
+``duplicates.py``) is added to that report when ``DUPLICATE_ACTION`` is
+"link" (answered with 200 and ``"linked": true``); otherwise it is stored
+and the response lists the similar reports in ``possible_duplicates``.
+
+Responses leave out the reporter's name and contact number; those stay
+visible to admins only. Storage reads and writes (which fsync), reloads
+after another process wrote, and searches run in a worker thread so the
+event loop keeps accepting requests meanwhile.
+"""
+import argparse
+import contextlib
+import datetime
+import re
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from communityfix import config
+from communityfix.jobs import start_worker_pool
+from communityfix.metrics import timed
+from communityfix.report_index import ISSUE_TYPES, PRIORITIES, STATUSES
+from communityfix.service import ReportService, ValidationError
+
+
+# Fields a submission may carry
+SUBMIT_FIELDS = ('name', 'contact', 'issue_type', 'location', 'description', 'priority', 'photo_ref', 'thumb_ref')
+
+# Photo references as handed out by POST /photos (see PhotoStore.put)
+_PHOTO_REF = re.compile(r'[0-9a-f]{64}\.[a-z]+')
+
+# Largest page the list endpoint returns
+MAX_PAGE_SIZE = 100
+
+
+class RequestError(Exception):
+    """A request the API rejects, with its HTTP status"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def public_report(report):
+    """What the API shows about a report (no reporter name or contact)"""
+    return {
+        'id': report.id,
+        'issue_type': report.issue_type,
+        'location': report.location,
+        'description': report.description,
+        'status': report.status,
+        'priority': report.priority,
+        'assigned_to': report.assigned_to,
+        'date_reported': report['date_reported'],
+        'resolved_at': report['resolved_at'],
+        'has_photo': bool(report.photo_ref or report.get('photo')),
+        'status_history': [{'status': entry['status'], 'timestamp': entry['timestamp']}
+                           for entry in report.status_history],
+        'comments': [{'author': comment['author'], 'text': comment['text'], 'timestamp': comment['timestamp']}
+                     for comment in report.comments],
+    }
+
+
+async def _read_body(request, limit):
+    """The request body, refusing anything over ``limit`` bytes"""
+    if int(request.headers.get('content-length') or 0) > limit:
+        raise RequestError(413, f"Photo is larger than {limit} bytes")
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise RequestError(413, f"Photo is larger than {limit} bytes")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+async def _submitted_fields(request):
+    """Submission fields from a JSON body or an HTML/SMS-gateway form"""
+    content_type = request.headers.get('content-type', '')
+    if content_type.startswith('application/json'):
+        try:
+            data = await request.json()
+        except ValueError:
+            raise RequestError(400, "Body is not valid JSON")
+        if not isinstance(data, dict):
+            raise RequestError(400, "Body must be a JSON object")
+    else:
+        data = dict(await request.form())
+    fields = {field: data.get(field) for field in SUBMIT_FIELDS}
+    for field, value in fields.items():
+        if value is not None and not isinstance(value, str):
+            raise RequestError(400, f"{field} must be text")
+    return fields
+
+
+def _choice(request, name, choices):
+    value = request.query_params.get(name)
+    if value is not None and value not in choices:
+        raise RequestError(400, f"Unknown {name}: {value!r}")
+    return value
+
+
+def _day(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise RequestError(400, f"{name} must be a date like 2024-01-31")
+
+
+def _non_negative_int(request, name, default):
+    value = request.query_params.get(name, default)
+    try:
+        value = int(value)
+    except ValueError:
+        value = -1
+    if value < 0:
+        raise RequestError(400, f"{name} must be a non-negative whole number")
+    return value
+
+
+def create_app(service=None, compact=True):
+    """The API as a Starlette app, serving ``service`` (a new ReportService by default)
+
+    With ``compact`` the app runs the background jobs (compaction and the
+    duplicate index, see communityfix/jobs.py) while it is up, as the
+    Streamlit app does.
+    """
+    service = service or ReportService()
+
+    async def submit_report(request):
+        fields = await _submitted_fields(request)
+        photo_refs = (fields.pop('photo_ref'), fields.pop('thumb_ref'))
+        fields['priority'] = fields['priority'] or 'Medium'
+        for ref in photo_refs:
+            if ref is not None and not (_PHOTO_REF.fullmatch(ref) and service.photo_store.exists(ref)):
+                raise RequestError(422, "Unknown photo; upload it to /photos first")
+        with timed('api.submit_report'):
+            matches = []
+            if config.DUPLICATE_ACTION != "off" and fields['issue_type'] and fields['location']:
+                matches = await run_in_threadpool(service.find_duplicates, fields['issue_type'], fields['location'],
+                                                  fields['description'] or '', photo_refs)
+            try:
+                if matches and config.DUPLICATE_ACTION == "link":
+                    report = await run_in_threadpool(service.link_report, matches[0][0].id,
+                                                     photo_refs=photo_refs, **fields)
+                    return JSONResponse({**public_report(report), 'linked': True})
+                report_id = await run_in_threadpool(service.submit_report, photo_refs=photo_refs, **fields)
+            except ValidationError as e:
+                return JSONResponse({'errors': e.errors}, status_code=422)
+        body = public_report(service.get(report_id))
+        body['possible_duplicates'] = [report.id for report, _ in matches]
+        return JSONResponse(body, status_code=201, headers={'Location': f"/reports/{report_id}"})
+
+    async def upload_photo(request):
+        limit = config.API_MAX_PHOTO_BYTES
+        if request.headers.get('content-type', '').startswith('multipart/form-data'):
+            async with request.form(max_files=1, max_part_size=limit) as form:
+                upload = form.get('photo')
+                if upload is None or isinstance(upload, str):
+                    raise RequestError(400, "Send the photo as the 'photo' file field")
+                data = await upload.read()
+            if len(data) > limit:
+                raise RequestError(413, f"Photo is larger than {limit} bytes")
+        else:
+            data = await _read_body(request, limit)
+        if not data:
+            raise RequestError(400, "No photo in the request")
+        with timed('api.upload_photo'):
+            try:
+                photo_ref, thumb_ref = await run_in_threadpool(service.store_photo, data)
+            except (OSError, ValueError):
+                # PIL.UnidentifiedImageError is an OSError
+                raise RequestError(415, "Not a supported image")
+        return JSONResponse({'photo_ref': photo_ref, 'thumb_ref': thumb_ref}, status_code=201)
+
+    def find_report(report_id):
+        service.refresh()
+        report = service.get(report_id)
+        if report is None:
+            # Old resolved reports are read from the archive on demand
+            report = service.archive.get(report_id)
+        return report
+
+    async def get_report(request):
+        report = await run_in_threadpool(find_report, request.path_params['report_id'])
+        if report is None:
+            raise RequestError(404, "No such report")
+        return JSONResponse(public_report(report))
+
+    async def list_reports(request):
+        criteria = {
+            'status': _choice(request, 'status', STATUSES),
+            'priority': _choice(request, 'priority', PRIORITIES),
+            'issue_type': _choice(request, 'issue_type', ISSUE_TYPES),
+            'start_day': _day(request, 'from'),
+            'end_day': _day(request, 'to'),
+            'location': request.query_params.get('location', ''),
+            'text': request.query_params.get('q', ''),
+        }
+        offset = _non_negative_int(request, 'offset', 0)
+        limit = min(_non_negative_int(request, 'limit', config.REPORTS_PAGE_SIZE), MAX_PAGE_SIZE)
+        await run_in_threadpool(service.refresh)
+        with timed('api.list_reports'):
+            matching = await run_in_threadpool(service.find_reports, **criteria)
+            page = [public_report(report) for report in matching[offset:offset + limit]]
+        return JSONResponse({'total': len(matching), 'offset': offset, 'limit': limit, 'reports': page})
+
+    async def health(request):
+        return JSONResponse({'status': 'ok', 'reports': len(service.repository)})
+
+    async def request_error(request, exc):
+        return JSONResponse({'error': str(exc)}, status_code=exc.status_code)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        jobs = start_worker_pool(service) if compact else None
+        try:
+            yield
+        finally:
+            if jobs is not None:
+                jobs.stop()
+
+    app = Starlette(
+        routes=[
+            Route('/reports', submit_report, methods=['POST']),
+            Route('/reports', list_reports, methods=['GET']),
+            Route('/reports/{report_id:int}', get_report, methods=['GET']),
+            Route('/photos', upload_photo, methods=['POST']),
+            Route('/health', health, methods=['GET']),
+        ],
+        exception_handlers={RequestError: request_error},
+        lifespan=lifespan,
+    )
+    app.state.service = service
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CommUnityFix HTTP API")
+    parser.add_argument("--host", default=config.API_HOST, help="Address to listen on")
+    parser.add_argument("--port", type=int, default=config.API_PORT, help="Port to listen on")
+    args = parser.parse_args(argv)
+
+    # Only needed to serve, not to build the app (e.g. under another server)
+    import uvicorn
+
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
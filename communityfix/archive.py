@@ -0,0 +1,323 @@
+"""Compressed monthly archive of old resolved reports
+
+Resolved reports stay in the live store - and in every list, index and
+search the app keeps in memory - for ``config.ARCHIVE_AFTER_DAYS`` after they
+were resolved. Then ``ReportService.archive_old_reports`` (a background job,
+see communityfix/jobs.py) moves them into ``config.ARCHIVE_DIR``:
+
+- one gzip-compressed JSON-lines file per month the reports were submitted
+  in (``reports-2024-03.jsonl.gz``), holding the complete stored reports,
+- ``index.json``: for each month its file, number of reports, lowest and
+  highest report ID, a rollup of the counts the Progress Dashboard needs
+  (issue types, priorities, reports per day and resolution times per issue
+  type, to the hour), and the rows of each bulk-import file archived in it
+  (so ``--resume`` imports skip them without reading any month).
+
+The live chart aggregates add the rollups in (see
+``ReportAggregates.add_archived``), so dashboard totals and resolution
+figures still cover every report without loading any archived one.
+Archived reports are read on demand only: ``search`` skips months outside
+the date range or without reports of the wanted issue type or priority
+before opening a file, ``get`` only opens the months whose ID range covers
+the ID, and ``reports`` streams months one at a time for exports.
+
+Writers hold ``index.json.lock``. Partition files and the index are each
+replaced atomically, the index last, and reports are deleted from the live
+store only once they are archived: after a crash in between they are in
+both places, and the next run (which merges by ID) completes the move.
+
+Archive by hand, list the months or export them with::
+
+    python -m communityfix.archive run --days 365
+    python -m communityfix.archive list
+    python -m communityfix.archive export 2024-03 2024-04 --format CSV -o old_reports.csv
+"""
+import argparse
+import functools
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+from communityfix import config
+from communityfix.analytics import resolution_time_days
+from communityfix.metrics import count
+from communityfix.records import ReportRecord
+from communityfix.search_index import SearchIndex
+from communityfix.storage import FileLock, atomic_write_json
+
+
+def month_of(report):
+    """Partition of a report: the month it was submitted in, as "YYYY-MM" """
+    return report['date_reported'][:7]
+
+
+def rollup(reports):
+    """Dashboard counts over archived report records, in a JSON-ready dict"""
+    issue_counts = Counter()
+    priority_counts = Counter()
+    daily_counts = Counter()
+    resolution_hours = {}
+    for report in reports:
+        issue_counts[report.issue_type] += 1
+        priority_counts[report.priority] += 1
+        daily_counts[report.day.isoformat()] += 1
+        days = resolution_time_days(report)
+        if days is not None:
+            hours = resolution_hours.setdefault(report.issue_type, Counter())
+            hours[str(round(days * 24))] += 1
+    return {
+        'reports': sum(issue_counts.values()),
+        'issue_counts': dict(issue_counts),
+        'priority_counts': dict(priority_counts),
+        'daily_counts': dict(daily_counts),
+        'resolution_hours': {issue_type: dict(hours) for issue_type, hours in resolution_hours.items()},
+    }
+
+
+def merge_rollups(rollups):
+    """One rollup covering all of ``rollups``"""
+    merged = {'reports': 0, 'issue_counts': Counter(), 'priority_counts': Counter(),
+              'daily_counts': Counter(), 'resolution_hours': {}}
+    for part in rollups:
+        merged['reports'] += part['reports']
+        for key in ('issue_counts', 'priority_counts', 'daily_counts'):
+            merged[key].update(part[key])
+        for issue_type, hours in part['resolution_hours'].items():
+            merged['resolution_hours'].setdefault(issue_type, Counter()).update(hours)
+    return merged
+
+
+def import_rows(reports):
+    """Import file -> sorted row numbers, from the ``import_ref`` of report dicts"""
+    rows = {}
+    for report in reports:
+        import_ref = report.get('import_ref')
+        if import_ref:
+            source, _, row_number = import_ref.rpartition(':')
+            rows.setdefault(source, []).append(int(row_number))
+    return {source: sorted(row_numbers) for source, row_numbers in rows.items()}
+
+
+def _signature(path):
+    """(mtime, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=4)
+def _read_partition(path, signature):
+    """Records in a partition file; cached while the file is unchanged"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    count('archive.bytes_read', len(raw))
+    return tuple(ReportRecord.from_dict(json.loads(line)) for line in gzip.decompress(raw).splitlines() if line)
+
+
+def _write_partition(path, reports):
+    """Write report dicts as gzip-compressed JSON lines, atomically; returns the file size"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            with gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as compressed:
+                for report in reports:
+                    compressed.write(json.dumps(report, separators=(',', ':')).encode('utf-8') + b'\n')
+            size = f.tell()
+            f.flush()
+            os.fsync(f.fileno())
+        count('archive.bytes_written', size)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    return size
+
+
+class ReportArchive:
+    """Monthly partition files of archived reports plus their index"""
+
+    def __init__(self, root=config.ARCHIVE_DIR):
+        self.root = Path(root)
+        self.index_path = self.root / 'index.json'
+        self._lock = FileLock(self.root / 'index.json.lock')
+        self._index = {}
+        self._index_signature = None
+
+    def signature(self):
+        """Changes whenever reports are added to the archive"""
+        return _signature(self.index_path)
+
+    def _read_index(self):
+        """Month -> index entry, re-read when the index file changed"""
+        signature = self.signature()
+        if signature != self._index_signature:
+            index = {}
+            if signature is not None:
+                with open(self.index_path, 'rb') as f:
+                    index = json.load(f)['partitions']
+            self._index, self._index_signature = index, signature
+        return self._index
+
+    def __len__(self):
+        return sum(entry['reports'] for entry in self._read_index().values())
+
+    def partitions(self):
+        """Index entries, oldest month first
+
+        Each has ``month``, ``file``, ``reports``, ``bytes``, ``min_id``,
+        ``max_id``, ``rollup`` and ``import_rows``.
+        """
+        return [{'month': month, **entry} for month, entry in sorted(self._read_index().items())]
+
+    def rollup(self):
+        """Rollup of every archived report"""
+        return merge_rollups(entry['rollup'] for entry in self._read_index().values())
+
+    def import_refs(self, source):
+        """``import_ref`` of every archived report imported from ``source``"""
+        refs = set()
+        for month, entry in self._read_index().items():
+            if 'import_rows' not in entry:
+                # Indexed before import rows were recorded
+                rows = import_rows(self.read(month)).get(source, ())
+            else:
+                rows = entry['import_rows'].get(source, ())
+            refs.update(f"{source}:{row_number}" for row_number in rows)
+        return refs
+
+    def _path(self, month):
+        return self.root / f"reports-{month}.jsonl.gz"
+
+    def read(self, month):
+        """Records archived for a month, in ID order"""
+        path = self._path(month)
+        signature = _signature(path)
+        if signature is None:
+            return ()
+        return _read_partition(str(path), signature)
+
+    def reports(self, months=None):
+        """Records of all (or the given) months, read one month at a time"""
+        for month in months or sorted(self._read_index()):
+            yield from self.read(month)
+
+    def get(self, report_id):
+        """An archived report, or None"""
+        for entry in self.partitions():
+            if entry['min_id'] <= report_id <= entry['max_id']:
+                for report in self.read(entry['month']):
+                    if report.id == report_id:
+                        return report
+        return None
+
+    def add(self, reports):
+        """Add report dicts to their months' files; returns the rollup of the newly archived ones
+
+        A report that is archived already (a move interrupted before the
+        live copy was deleted) replaces its archived copy and is not
+        counted again.
+        """
+        by_month = {}
+        for report in reports:
+            by_month.setdefault(month_of(report), []).append(report)
+        added = []
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            index = dict(self._read_index())
+            for month, month_reports in sorted(by_month.items()):
+                merged = {report.id: report.to_dict() for report in self.read(month)}
+                added.extend(ReportRecord.from_dict(report) for report in month_reports if report['id'] not in merged)
+                merged.update((report['id'], report) for report in month_reports)
+                merged = [merged[report_id] for report_id in sorted(merged)]
+                path = self._path(month)
+                size = _write_partition(path, merged)
+                index[month] = {
+                    'file': path.name,
+                    'reports': len(merged),
+                    'bytes': size,
+                    'min_id': merged[0]['id'],
+                    'max_id': merged[-1]['id'],
+                    'rollup': rollup(ReportRecord.from_dict(report) for report in merged),
+                    'import_rows': import_rows(merged),
+                }
+            atomic_write_json(self.index_path, {'partitions': index})
+        count('archive.reports_added', len(added))
+        return rollup(added)
+
+    def search(self, status=None, priority=None, issue_type=None, start_day=None, end_day=None,
+               name="", location="", description="", text=""):
+        """Archived reports matching the admin search filters, in ID order
+
+        Same filters as ``ReportService.find_reports``. Months the index
+        rules out are not read.
+        """
+        if status not in (None, 'Resolved'):
+            return []
+        queries = [(query, fields) for query, fields in ((name, ('name',)), (location, ('location',)),
+                                                         (description, ('description',)), (text, None)) if query]
+        results = []
+        for entry in self.partitions():
+            month, month_rollup = entry['month'], entry['rollup']
+            if (start_day and month < start_day.strftime('%Y-%m')) or (end_day and month > end_day.strftime('%Y-%m')):
+                continue
+            if (priority and not month_rollup['priority_counts'].get(priority)) or \
+                    (issue_type and not month_rollup['issue_counts'].get(issue_type)):
+                continue
+            matching = [report for report in self.read(month)
+                        if (priority is None or report.priority == priority)
+                        and (issue_type is None or report.issue_type == issue_type)
+                        and (start_day is None or report.day >= start_day)
+                        and (end_day is None or report.day <= end_day)]
+            if queries and matching:
+                search = SearchIndex(matching)
+                ids = None
+                for query, fields in queries:
+                    found = search.search(query) if fields is None else search.search(query, fields=fields)
+                    ids = found if ids is None else ids & found
+                matching = [report for report in matching if report.id in ids]
+            results.extend(matching)
+        return results
+
+
+def main(argv=None):
+    # Imported here: the service imports this module
+    from communityfix.export import EXPORT_FORMATS
+    from communityfix.service import ReportService
+
+    parser = argparse.ArgumentParser(description="CommUnityFix report archive")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Archive reports resolved more than --days days ago")
+    run.add_argument("--days", type=int, default=config.ARCHIVE_AFTER_DAYS,
+                     help="Archive reports resolved at least this many days ago (0: archive nothing)")
+
+    subparsers.add_parser("list", help="Show the archived months")
+
+    export = subparsers.add_parser("export", help="Export archived reports")
+    export.add_argument("months", nargs="*", help="Months (YYYY-MM) to export; all if none")
+    export.add_argument("--format", default="CSV", choices=list(EXPORT_FORMATS), help="Export format")
+    export.add_argument("-o", "--output", required=True, help="File to write")
+
+    args = parser.parse_args(argv)
+    service = ReportService()
+    if args.command == "run":
+        print(f"Archived {service.archive_old_reports(args.days)} reports")
+    elif args.command == "list":
+        for entry in service.archive.partitions():
+            print(f"{entry['month']}  {entry['reports']:7d} reports  {entry['bytes'] / 1024:9.1f} KB  "
+                  f"#{entry['min_id']}-#{entry['max_id']}")
+    elif args.command == "export":
+        with service.export_archive(args.format, args.months or None) as export_file, \
+                open(args.output, 'wb') as output:
+            shutil.copyfileobj(export_file, output)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
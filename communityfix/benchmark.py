@@ -0,0 +1,337 @@
+"""Benchmarks for the data layer's hot paths, run outside Streamlit
+
+Generates synthetic data sets, loads them into a fresh store and repository,
+and times the paths behind the app: loading, submitting and updating
+reports, adding comments, the admin groupings and search filters, the
+progress metrics and charts, and exports. For every path it records throughput, p50/p99
+latency and peak traced memory, and saves the results as JSON so runs from
+different versions can be compared::
+
+    python -m communityfix.benchmark run --sizes 1000 10000 100000 --output before.json
+    python -m communityfix.benchmark run --sizes 1000 10000 100000 --photos store --output after.json
+    python -m communityfix.benchmark compare before.json after.json
+
+``generate`` writes a synthetic data set to a JSON data file, for trying
+the app itself with many reports.
+"""
+import argparse
+import base64
+import datetime
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from communityfix.archive import ReportArchive
+from communityfix.export import export_reports
+from communityfix.photos import PhotoStore, save_uploaded_photo
+from communityfix.records import DATE_FORMAT
+from communityfix.report_index import ISSUE_TYPES
+from communityfix.repository import ReportRepository
+from communityfix.storage import JsonReportStore, SqliteReportStore, atomic_write_json
+
+
+_FIRST_NAMES = ["Juan", "Maria", "Jose", "Ana", "Pedro", "Liza", "Ramon", "Carmen", "Mark", "Grace"]
+_LAST_NAMES = ["Santos", "Reyes", "Cruz", "Bautista", "Garcia", "Mendoza", "Torres", "Flores"]
+_STREETS = ["Main Street", "Rizal Avenue", "Mabini Street", "Luna Road", "Bonifacio Drive", "Market Lane"]
+_STAFF = ["Engineering Team", "Sanitation Crew", "Barangay Tanod", "Public Works", "Electrical Team"]
+_DETAILS = [
+    "near the corner, getting worse every day", "blocking part of the road",
+    "reported by several neighbours", "dangerous at night", "started after the heavy rain",
+    "children pass here on the way to school",
+]
+
+# Photo modes for generated reports
+PHOTO_MODES = ('none', 'store', 'inline')
+
+# Repetitions per path: (timed runs for fast paths, for paths that scan everything)
+DEFAULT_RUNS = (200, 5)
+
+
+def _sample_photos(photo_store, count=20, rng=None):
+    """Store ``count`` distinct small JPEGs; returns their (photo_ref, thumb_ref) pairs"""
+    from PIL import Image
+
+    rng = rng or random.Random(0)
+    refs = []
+    for _ in range(count):
+        image = Image.new('RGB', (1024, 768), tuple(rng.randrange(256) for _ in range(3)))
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG')
+        refs.append(save_uploaded_photo(photo_store, buffer.getvalue()))
+    return refs
+
+
+def generate_reports(count, photos='none', photo_store=None, seed=0, now=None):
+    """``count`` realistic report dicts spread over the past year
+
+    With ``photos='store'`` reports reference a pool of stored sample photos,
+    with ``'inline'`` they carry a base64 photo the way old data files did.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.datetime.now().replace(second=0, microsecond=0)
+    photo_refs = _sample_photos(photo_store, rng=rng) if photos == 'store' else []
+    inline_photo = None
+    if photos == 'inline':
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), (120, 140, 90)).save(buffer, format='JPEG')
+        inline_photo = base64.b64encode(buffer.getvalue()).decode()
+
+    reports = []
+    for report_id in range(1, count + 1):
+        issue_type = rng.choice(ISSUE_TYPES)
+        name = f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+        reported = now - datetime.timedelta(minutes=rng.randrange(365 * 24 * 60))
+        status = rng.choices(['Received', 'In Progress', 'Resolved'], weights=[40, 25, 35])[0]
+        history = [{'status': 'Received', 'timestamp': reported.strftime(DATE_FORMAT), 'by': name}]
+        resolved_at = None
+        if status != 'Received':
+            started = min(reported + datetime.timedelta(hours=rng.randrange(1, 72)), now)
+            history.append({'status': 'In Progress', 'timestamp': started.strftime(DATE_FORMAT), 'by': 'Admin'})
+        if status == 'Resolved':
+            resolved = min(reported + datetime.timedelta(hours=rng.randrange(2, 24 * 21)), now)
+            resolved_at = resolved.strftime(DATE_FORMAT)
+            history.append({'status': 'Resolved', 'timestamp': resolved_at, 'by': 'Admin'})
+        comments = [
+            {'author': 'Admin', 'text': f"Checked on site, {rng.choice(_DETAILS)}", 'timestamp': entry['timestamp']}
+            for entry in history[1:] if rng.random() < 0.5
+        ]
+        report = {
+            'id': report_id,
+            'name': name,
+            'contact': f"09{rng.randrange(10**8, 10**9)}",
+            'issue_type': issue_type,
+            'location': f"Purok {rng.randrange(1, 8)}, {rng.choice(_STREETS)}",
+            'description': f"{issue_type} {rng.choice(_DETAILS)}",
+            'status': status,
+            'assigned_to': rng.choice(_STAFF) if status != 'Received' else 'Not assigned',
+            'date_reported': reported.strftime(DATE_FORMAT),
+            'comments': comments,
+            'photo_ref': None,
+            'thumb_ref': None,
+            'priority': rng.choices(['Low', 'Medium', 'High', 'Emergency'], weights=[30, 45, 20, 5])[0],
+            'status_history': history,
+            'resolved_at': resolved_at,
+        }
+        if photo_refs:
+            report['photo_ref'], report['thumb_ref'] = rng.choice(photo_refs)
+        elif inline_photo and rng.random() < 0.5:
+            report['photo'] = inline_photo
+        reports.append(report)
+    return reports
+
+
+def _measure(func, runs, trace=True):
+    """Latencies in seconds of ``runs`` calls, then the peak memory of one traced call"""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    if not trace:
+        return latencies, None
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return latencies, peak
+
+
+def _summary(path, size, latencies, peak):
+    ordered = sorted(latencies)
+    return {
+        'path': path,
+        'size': size,
+        'runs': len(latencies),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': ordered[len(ordered) // 2] * 1000,
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        'ops_per_s': len(ordered) / sum(ordered) if sum(ordered) else None,
+        'peak_mem_bytes': peak,
+    }
+
+
+def _make_store(backend, directory):
+    if backend == 'json':
+        return JsonReportStore(directory / 'reports_data.json', archive_dir=directory / 'event_archive')
+    return SqliteReportStore(directory / 'reports_data.db')
+
+
+def benchmark_size(size, backend='json', photos='none', runs=DEFAULT_RUNS, seed=0):
+    """Time every path on a fresh data set of ``size`` reports; returns result dicts"""
+    fast_runs, slow_runs = runs
+    rng = random.Random(seed)
+    results = []
+    with tempfile.TemporaryDirectory(prefix='communityfix-bench-') as tmp:
+        directory = Path(tmp)
+        photo_store = PhotoStore(directory / 'photos')
+        store = _make_store(backend, directory)
+        store.save_all(generate_reports(size, photos, photo_store, seed))
+
+        def record(path, func, count, trace=True):
+            latencies, peak = _measure(func, count, trace)
+            results.append(_summary(path, size, latencies, peak))
+
+        record('load_reports', store.load_reports, slow_runs)
+        archive = ReportArchive(directory / 'archive')
+        record('build_repository', lambda: ReportRepository(store, archive=archive), slow_runs)
+        repository = ReportRepository(store, archive=archive)
+        ids = list(range(1, size + 1))
+
+        # Submissions as the form builds them (no ID), made before timing starts
+        new_reports = generate_reports(fast_runs + 1, seed=seed + 1)
+        for report in new_reports:
+            del report['id']
+        record('save_report', lambda: repository.insert(new_reports.pop()), fast_runs)
+
+        def update_status():
+            status = rng.choice(['Received', 'In Progress', 'Resolved'])
+            repository.modify(rng.choice(ids), lambda report: report.update(status=status))
+        record('update_status', update_status, fast_runs)
+
+        def add_comment():
+            comment = {'author': 'Admin', 'text': 'Crew dispatched', 'timestamp': '2024-01-01 10:00'}
+            repository.modify(rng.choice(ids), lambda report: report['comments'].append(comment))
+        record('add_comment', add_comment, fast_runs)
+
+        index = repository.index
+        today = datetime.date.today()
+        record('organize_by_status', index.organize_by_status, slow_runs)
+        record('organize_by_priority', index.organize_by_priority, slow_runs)
+        record('organize_by_date', lambda: index.organize_by_date(today), slow_runs)
+        record('organize_by_issue_type', index.organize_by_issue_type, slow_runs)
+
+        aggregates = repository.aggregates
+
+        def progress_metrics():
+            aggregates.chart_data()
+            aggregates.resolution_stats()
+            aggregates.issue_analysis()
+        record('progress_metrics', progress_metrics, fast_runs)
+
+        # Figure building needs Plotly, which batch machines may not have
+        try:
+            from communityfix.charts import progress_figures
+        except ImportError:
+            progress_figures = None
+        if progress_figures:
+            record('progress_charts', lambda: progress_figures(aggregates.chart_data()), slow_runs)
+
+        queries = ['drain', 'purok 3', 'main street', 'garbage', 'rizal']
+
+        def search_filters():
+            ids_found = index.filter_ids(status=rng.choice(['Received', 'Resolved']),
+                                         issue_type=rng.choice(ISSUE_TYPES),
+                                         start_day=today - datetime.timedelta(days=90))
+            ids_found &= repository.search.search(rng.choice(queries))
+            return [index.get(report_id) for report_id in sorted(ids_found)]
+        record('search_filters', search_filters, fast_runs)
+
+        def export_csv():
+            with export_reports(repository.snapshot().reports, 'CSV', photo_store):
+                pass
+        record('export_csv', export_csv, slow_runs)
+
+        # Folds the events logged by the write paths above (JSON store only)
+        record('compact', store.compact, 1, trace=False)
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, backend='json', photos='none', runs=DEFAULT_RUNS, seed=0, log=print):
+    """Benchmark every size; returns the JSON-ready results document"""
+    document = {
+        'meta': {
+            'revision': _git_revision(),
+            'started_at': datetime.datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': backend,
+            'photos': photos,
+            'seed': seed,
+        },
+        'results': [],
+    }
+    for size in sizes:
+        for result in benchmark_size(size, backend, photos, runs, seed):
+            document['results'].append(result)
+            peak = result['peak_mem_bytes']
+            log(f"{size:>8} {result['path']:<24} p50 {result['p50_ms']:10.3f} ms  p99 {result['p99_ms']:10.3f} ms"
+                + (f"  peak {peak / 2**20:8.1f} MiB" if peak is not None else ""))
+    return document
+
+
+def compare(before, after):
+    """Rows of (size, path, p50 before, p50 after, speedup) for paths in both runs"""
+    old = {(r['size'], r['path']): r for r in before['results']}
+    rows = []
+    for result in after['results']:
+        previous = old.get((result['size'], result['path']))
+        if previous:
+            speedup = previous['p50_ms'] / result['p50_ms'] if result['p50_ms'] else None
+            rows.append((result['size'], result['path'], previous['p50_ms'], result['p50_ms'], speedup))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CommUnityFix benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Time the hot paths on synthetic data")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                            help="Numbers of reports to test with (up to 500000)")
+    run_parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    run_parser.add_argument("--photos", choices=PHOTO_MODES, default="none",
+                            help="Reports without photos, with stored photos, or with old inline photos")
+    run_parser.add_argument("--runs", type=int, nargs=2, default=list(DEFAULT_RUNS), metavar=("FAST", "SLOW"),
+                            help="Timed runs for quick paths and for paths that scan every report")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", help="Write results to this JSON file")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+
+    generate = subparsers.add_parser("generate", help="Write a synthetic JSON data file")
+    generate.add_argument("--count", type=int, default=1000)
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--output", default="reports_data.json")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        document = run(args.sizes, args.backend, args.photos, tuple(args.runs), args.seed)
+        if args.output:
+            atomic_write_json(args.output, document, indent=2)
+            print(f"Saved results to {args.output}")
+    elif args.command == "compare":
+        with open(args.before) as f:
+            before = json.load(f)
+        with open(args.after) as f:
+            after = json.load(f)
+        for size, path, old_ms, new_ms, speedup in compare(before, after):
+            change = f"{speedup:6.2f}x" if speedup else "n/a"
+            print(f"{size:>8} {path:<24} {old_ms:10.3f} ms -> {new_ms:10.3f} ms  {change}")
+    elif args.command == "generate":
+        reports = generate_reports(args.count, seed=args.seed)
+        atomic_write_json(args.output, {'reports': reports, 'last_id': args.count}, indent=2)
+        print(f"Wrote {args.count} reports to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Bulk import of legacy reports from CSV or JSON files
+
+Rows are checked with the report form's rules (``validate_report``), issue
+types, statuses and priorities are mapped onto the app's values (so
+"garbage", "closed" or "urgent" are understood), and valid rows are stored
+in batches: each batch gets a block of IDs and is written to storage in one
+go. Rows that fail are reported with their row number and reasons.
+
+Every imported report remembers the file and row it came from
+(``import_ref``), so an import that stopped part way - a crash, a bad
+batch - can be finished by running it again with ``--resume``; rows already
+in storage, or archived since, are skipped::
+
+    python -m communityfix.bulk_import old_reports.csv --rejects rejected.csv
+    python -m communityfix.bulk_import old_reports.csv --resume
+
+Columns are matched by name (``name``, ``contact``, ``issue_type``,
+``location``, ``description``, ``date_reported``, and optionally
+``status``, ``priority``, ``assigned_to``, ``resolved_at``, ``notes``); use
+``--column field=Header`` for spreadsheets with other headings. JSON files
+hold a list of objects (or ``{"reports": [...]}``) with the same keys.
+"""
+import argparse
+import csv
+import datetime
+import hashlib
+import io
+import json
+import sys
+from pathlib import Path
+
+from communityfix.records import DATE_FORMAT
+from communityfix.report_index import ISSUE_TYPES, PRIORITIES, STATUSES
+from communityfix.service import ReportService, validate_report
+
+
+DEFAULT_BATCH_SIZE = 500
+
+FIELDS = ('name', 'contact', 'issue_type', 'location', 'description', 'date_reported',
+          'status', 'priority', 'assigned_to', 'resolved_at', 'notes')
+
+# Spellings found in old spreadsheets, lower-cased
+ISSUE_TYPE_ALIASES = {
+    'garbage': 'Garbage Accumulation',
+    'trash': 'Garbage Accumulation',
+    'basura': 'Garbage Accumulation',
+    'streetlight': 'Broken Streetlight',
+    'street light': 'Broken Streetlight',
+    'drainage': 'Clogged Drainage',
+    'canal': 'Clogged Drainage',
+    'flood': 'Clogged Drainage',
+    'flooding': 'Clogged Drainage',
+    'road': 'Damaged Road',
+    'road damage': 'Damaged Road',
+    'leak': 'Water Leak',
+    'water': 'Water Leak',
+    'noise': 'Noise Complaint',
+    'hazard': 'Safety Hazard',
+    'vandalism': 'Graffiti',
+}
+STATUS_ALIASES = {
+    'new': 'Received',
+    'open': 'Received',
+    'pending': 'Received',
+    'ongoing': 'In Progress',
+    'in-progress': 'In Progress',
+    'assigned': 'In Progress',
+    'closed': 'Resolved',
+    'done': 'Resolved',
+    'fixed': 'Resolved',
+    'completed': 'Resolved',
+}
+PRIORITY_ALIASES = {
+    'urgent': 'Emergency',
+    'critical': 'Emergency',
+    'normal': 'Medium',
+    'moderate': 'Medium',
+    'minor': 'Low',
+}
+
+# Date formats accepted in date_reported and resolved_at
+DATE_INPUT_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%m/%d/%Y %H:%M", "%m/%d/%Y")
+
+
+class AlreadyImported(Exception):
+    """Rows from this file are already stored and ``resume`` was not set"""
+
+
+class ImportResult:
+    """Running totals of an import"""
+
+    def __init__(self, total):
+        self.total = total
+        self.processed = 0
+        self.imported = 0
+        self.skipped = 0
+        self.rejected = []  # (row number, row, errors)
+        self.report_ids = []
+
+
+def read_rows(data, file_format):
+    """Rows (dicts) from CSV or JSON file contents (bytes)"""
+    text = data.decode('utf-8-sig')
+    if file_format == 'csv':
+        return list(csv.DictReader(io.StringIO(text)))
+    if file_format == 'json':
+        rows = json.loads(text)
+        if isinstance(rows, dict):
+            rows = rows.get('reports', [])
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("JSON imports must be a list of objects")
+        return rows
+    raise ValueError(f"Unknown import format: {file_format!r} (expected 'csv' or 'json')")
+
+
+def source_key(data):
+    """Short fingerprint of a file's contents, used in ``import_ref``"""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _choice(value, choices, aliases):
+    """The app value for ``value`` (matched case-insensitively), or None"""
+    folded = value.lower()
+    for choice in choices:
+        if choice.lower() == folded:
+            return choice
+    return aliases.get(folded)
+
+
+def _parse_date(value):
+    for date_format in DATE_INPUT_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).strftime(DATE_FORMAT)
+        except ValueError:
+            continue
+    return None
+
+
+def map_row(row, columns=None):
+    """Turn one file row into a report dict; returns ``(report, errors)``
+
+    ``columns`` maps report fields to the file's column names where they
+    differ.
+    """
+    columns = columns or {}
+    values = {}
+    for field in FIELDS:
+        value = row.get(columns.get(field, field))
+        values[field] = '' if value is None else str(value).strip()
+
+    errors = []
+    extra = {}
+    issue_type = None
+    if values['issue_type']:
+        issue_type = _choice(values['issue_type'], ISSUE_TYPES, ISSUE_TYPE_ALIASES)
+        if issue_type is None:
+            issue_type = 'Other'
+            extra['legacy_issue_type'] = values['issue_type']
+    errors.extend(validate_report(values['name'], values['contact'], issue_type,
+                                  values['location'], values['description']))
+
+    status = _choice(values['status'], STATUSES, STATUS_ALIASES) if values['status'] else 'Received'
+    if status is None:
+        errors.append(f"Unknown status: {values['status']!r}")
+    priority = _choice(values['priority'], PRIORITIES, PRIORITY_ALIASES) if values['priority'] else 'Medium'
+    if priority is None:
+        errors.append(f"Unknown priority: {values['priority']!r}")
+    date_reported = _parse_date(values['date_reported'])
+    if date_reported is None:
+        errors.append(f"Missing or unreadable date_reported: {values['date_reported']!r}")
+    resolved_at = None
+    if values['resolved_at']:
+        resolved_at = _parse_date(values['resolved_at'])
+        if resolved_at is None:
+            errors.append(f"Unreadable resolved_at: {values['resolved_at']!r}")
+    if errors:
+        return None, errors
+
+    history = [{'status': 'Received', 'timestamp': date_reported, 'by': values['name']}]
+    if status != 'Received':
+        history.append({'status': status, 'timestamp': resolved_at or date_reported, 'by': 'Import'})
+    comments = []
+    if values['notes']:
+        comments.append({'author': 'Import', 'text': values['notes'], 'timestamp': date_reported})
+    return {
+        'name': values['name'],
+        'contact': values['contact'],
+        'issue_type': issue_type,
+        'location': values['location'],
+        'description': values['description'],
+        'status': status,
+        'assigned_to': values['assigned_to'] or 'Not assigned',
+        'date_reported': date_reported,
+        'comments': comments,
+        'photo_ref': None,
+        'thumb_ref': None,
+        'priority': priority,
+        'status_history': history,
+        'resolved_at': resolved_at if status == 'Resolved' else None,
+        **extra,
+    }, []
+
+
+def import_rows(service, rows, source, columns=None, batch_size=DEFAULT_BATCH_SIZE, resume=False,
+                progress=None):
+    """Validate ``rows`` and store the valid ones in batches; returns an ImportResult
+
+    ``source`` identifies the file (see ``source_key``). Raises
+    AlreadyImported if rows from it are stored already, unless ``resume`` is
+    set, in which case those rows are skipped. ``progress(result)`` is
+    called after every batch.
+    """
+    service.refresh()
+    prefix = f"{source}:"
+    done = {report['import_ref'] for report in service.reports()
+            if report.get('import_ref', '').startswith(prefix)}
+    # Old resolved imports may have moved to the archive since
+    done |= service.archive.import_refs(source)
+    if done and not resume:
+        raise AlreadyImported(f"{len(done)} rows of this file were imported before; resume to import the rest")
+
+    result = ImportResult(len(rows))
+    batch = []
+
+    def flush():
+        if batch:
+            result.report_ids.extend(service.add_reports(batch))
+            result.imported += len(batch)
+            batch.clear()
+        if progress:
+            progress(result)
+
+    for row_number, row in enumerate(rows, start=1):
+        result.processed = row_number
+        import_ref = f"{prefix}{row_number}"
+        if import_ref in done:
+            result.skipped += 1
+            continue
+        report, errors = map_row(row, columns)
+        if errors:
+            result.rejected.append((row_number, row, errors))
+            continue
+        report['import_ref'] = import_ref
+        batch.append(report)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return result
+
+
+def write_rejects(rejected, target):
+    """Write rejected rows, with their row number and errors, as CSV"""
+    columns = []
+    for _, row, _ in rejected:
+        columns.extend(key for key in row if key not in columns)
+    writer = csv.DictWriter(target, fieldnames=['row', 'errors'] + columns)
+    writer.writeheader()
+    for row_number, row, errors in rejected:
+        writer.writerow({**row, 'row': row_number, 'errors': "; ".join(errors)})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import legacy reports from a CSV or JSON file")
+    parser.add_argument("file", help="CSV or JSON file to import")
+    parser.add_argument("--format", choices=("csv", "json"), help="File format (default: from the extension)")
+    parser.add_argument("--column", action="append", default=[], metavar="FIELD=HEADER",
+                        help="Read a report field from a differently named column (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Reports stored per write")
+    parser.add_argument("--resume", action="store_true", help="Skip rows an earlier run of this file already imported")
+    parser.add_argument("--rejects", help="Write rejected rows and their errors to this CSV file")
+    args = parser.parse_args(argv)
+
+    path = Path(args.file)
+    columns = {}
+    for mapping in args.column:
+        field, _, header = mapping.partition('=')
+        if field not in FIELDS or not header:
+            parser.error(f"--column expects FIELD=HEADER with FIELD one of {', '.join(FIELDS)}")
+        columns[field] = header
+    data = path.read_bytes()
+    rows = read_rows(data, args.format or path.suffix.lstrip('.').lower())
+
+    def progress(result):
+        print(f"\r{result.processed}/{result.total} rows: {result.imported} imported, "
+              f"{result.skipped} skipped, {len(result.rejected)} rejected", end="", file=sys.stderr)
+
+    try:
+        result = import_rows(ReportService(), rows, source_key(data), columns, args.batch_size, args.resume, progress)
+    except AlreadyImported as e:
+        sys.exit(f"{path}: {e} (run again with --resume)")
+    finally:
+        print(file=sys.stderr)
+
+    for row_number, _, errors in result.rejected[:20]:
+        print(f"Row {row_number}: {'; '.join(errors)}")
+    if len(result.rejected) > 20:
+        print(f"... and {len(result.rejected) - 20} more rejected rows")
+    if args.rejects and result.rejected:
+        with open(args.rejects, 'w', newline='') as f:
+            write_rejects(result.rejected, f)
+        print(f"Rejected rows written to {args.rejects}")
+    print(f"Imported {result.imported} reports from {path}")
+
+
+if __name__ == "__main__":
+    main()
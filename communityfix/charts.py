@@ -0,0 +1,111 @@
+"""Plotly figures for the Progress Dashboard
+
+Built from the ``ChartData`` summary of ``ReportAggregates`` (and the
+``HeatmapData`` per-cell counts of ``PlaceIndex``) rather than from the
+reports, so the cost does not depend on the number of reports.
+Kept apart from the rest of the package so only code that draws charts
+loads Plotly and pandas.
+"""
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+
+def progress_figures(chart_data):
+    """Status pie, issue-type bar, timeline and resolution-time figures
+
+    The resolution figure is None when no resolution times are recorded.
+    """
+    # 1. Status Distribution Pie Chart
+    status_names, status_values = zip(*chart_data.status_counts)
+    status_colors = {'Received': '#ffc107', 'In Progress': '#17a2b8', 'Resolved': '#28a745'}
+
+    fig_pie = px.pie(
+        values=status_values,
+        names=status_names,
+        title="Report Status Distribution",
+        color_discrete_map=status_colors
+    )
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+
+    # 2. Issue Type Bar Chart
+    issue_names, issue_values = zip(*chart_data.issue_counts)
+    fig_bar = px.bar(
+        x=issue_names,
+        y=issue_values,
+        title="Reports by Issue Type",
+        labels={'x': 'Issue Type', 'y': 'Number of Reports'},
+        color=issue_values,
+        color_continuous_scale='Blues'
+    )
+    fig_bar.update_layout(showlegend=False)
+
+    # 3. Timeline Chart
+    df_daily = pd.DataFrame(chart_data.daily_counts, columns=['date_reported', 'count'])
+    fig_timeline = px.line(
+        df_daily,
+        x='date_reported',
+        y='count',
+        title="Reports Over Time",
+        labels={'date_reported': 'Date', 'count': 'Number of Reports'}
+    )
+    fig_timeline.update_traces(line=dict(width=3))
+
+    # 4. Resolution Time Analysis (submission to recorded resolution)
+    if chart_data.resolution_days:
+        days, counts = zip(*chart_data.resolution_days)
+
+        fig_resolution = px.histogram(
+            x=days,
+            y=counts,
+            histfunc='sum',
+            title=f"Resolution Time Distribution (Avg: {chart_data.resolution_mean:.1f} days)",
+            labels={'x': 'Days to Resolution', 'y': 'Number of Reports'},
+            nbins=10
+        )
+        fig_resolution.update_layout(yaxis_title='Number of Reports')
+    else:
+        fig_resolution = None
+
+    return fig_pie, fig_bar, fig_timeline, fig_resolution
+
+
+def hotspot_figure(heatmap_data, title="Report Hotspots"):
+    """Heatmap of report counts per map cell, or None if no cell has reports
+
+    Cells are laid out as on a map (north up); axes show metres from the
+    south-west corner, and hovering a cell shows the places in it.
+    """
+    if not heatmap_data.cells:
+        return None
+    size = heatmap_data.cell_meters
+    rows = [cell[0] for cell in heatmap_data.cells]
+    columns = [cell[1] for cell in heatmap_data.cells]
+    first_row, first_column = min(rows), min(columns)
+    height = max(rows) - first_row + 1
+    width = max(columns) - first_column + 1
+
+    counts = [[None] * width for _ in range(height)]
+    labels = [[""] * width for _ in range(height)]
+    for row, column, count, places in heatmap_data.cells:
+        counts[row - first_row][column - first_column] = count
+        labels[row - first_row][column - first_column] = places or "(no listed place)"
+
+    fig = go.Figure(go.Heatmap(
+        z=counts,
+        x=[column * size for column in range(width)],
+        y=[row * size for row in range(height)],
+        text=labels,
+        texttemplate="%{z}",
+        hovertemplate="%{text}<br>%{z} reports<extra></extra>",
+        colorscale='YlOrRd',
+        xgap=2,
+        ygap=2,
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title="Metres east",
+        yaxis_title="Metres north",
+        yaxis_scaleanchor='x',
+    )
+    return fig
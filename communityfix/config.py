@@ -0,0 +1,118 @@
+"""Configuration for CommUnityFix
+
+Every setting can be overridden with an environment variable of the same
+name prefixed with ``COMMUNITYFIX_`` (for example ``COMMUNITYFIX_STORAGE=sqlite``).
+"""
+import os
+
+
+def _env(name, default):
+    """Read a setting from the environment, falling back to the default"""
+    return os.environ.get(f"COMMUNITYFIX_{name}", default)
+
+
+def _env_int(name, default):
+    """Read an integer setting from the environment"""
+    return int(_env(name, default))
+
+
+# Storage backend: "json" (single file, fine for small installs) or "sqlite"
+STORAGE_BACKEND = _env("STORAGE", "json").lower()
+
+# Data files
+JSON_DATA_FILE = _env("JSON_DATA_FILE", "reports_data.json")
+SQLITE_DATA_FILE = _env("SQLITE_DATA_FILE", "reports_data.db")
+
+# The JSON backend appends each change to an event log; a background job
+# folds the log into the snapshot every COMPACT_INTERVAL_SECONDS once it has
+# COMPACT_MIN_EVENTS events, and keeps folded logs in EVENT_ARCHIVE_DIR
+EVENT_ARCHIVE_DIR = _env("EVENT_ARCHIVE_DIR", "event_archive")
+COMPACT_INTERVAL_SECONDS = _env_int("COMPACT_INTERVAL_SECONDS", 60)
+COMPACT_MIN_EVENTS = _env_int("COMPACT_MIN_EVENTS", 500)
+
+# Background jobs (see communityfix/jobs.py): WORKER_THREADS threads work
+# through at most JOB_QUEUE_SIZE waiting jobs (beyond that, work is done
+# during the request); admins see the last JOB_HISTORY jobs of each kind.
+# With BACKGROUND_PHOTOS, photos are resized after the report is stored
+# instead of before.
+WORKER_THREADS = _env_int("WORKER_THREADS", 2)
+JOB_QUEUE_SIZE = _env_int("JOB_QUEUE_SIZE", 200)
+JOB_HISTORY = _env_int("JOB_HISTORY", 50)
+BACKGROUND_PHOTOS = _env("BACKGROUND_PHOTOS", "1") not in ("0", "false", "no", "off")
+
+# Uploads waiting to be processed that no report uses (the citizen left
+# before submitting) are deleted once UPLOAD_MAX_AGE_SECONDS old; a
+# background job checks every UPLOAD_SWEEP_INTERVAL_SECONDS.
+UPLOAD_MAX_AGE_SECONDS = _env_int("UPLOAD_MAX_AGE_SECONDS", 24 * 3600)
+UPLOAD_SWEEP_INTERVAL_SECONDS = _env_int("UPLOAD_SWEEP_INTERVAL_SECONDS", 3600)
+
+# Reports resolved ARCHIVE_AFTER_DAYS days ago move out of the live store
+# into compressed monthly files in ARCHIVE_DIR (see communityfix/archive.py);
+# a background job checks every ARCHIVE_INTERVAL_SECONDS. 0 days turns
+# archiving off.
+ARCHIVE_DIR = _env("ARCHIVE_DIR", "archive")
+ARCHIVE_AFTER_DAYS = _env_int("ARCHIVE_AFTER_DAYS", 365)
+ARCHIVE_INTERVAL_SECONDS = _env_int("ARCHIVE_INTERVAL_SECONDS", 6 * 3600)
+
+# Timestamped copies made by the admin "Backup" buttons
+BACKUP_DIR = _env("BACKUP_DIR", "backups")
+
+# Directory for uploaded photos, stored once each under their content hash
+PHOTO_DIR = _env("PHOTO_DIR", "photos")
+
+# Uploaded photos are resized and re-encoded at submit time. The display
+# version fits in PHOTO_MAX_EDGE pixels and (where possible) PHOTO_MAX_BYTES;
+# list views use the small thumbnail instead.
+PHOTO_FORMAT = _env("PHOTO_FORMAT", "JPEG").upper()  # "JPEG" or "WEBP"
+PHOTO_MAX_EDGE = _env_int("PHOTO_MAX_EDGE", 1600)
+PHOTO_MAX_BYTES = _env_int("PHOTO_MAX_BYTES", 400_000)
+PHOTO_QUALITY = _env_int("PHOTO_QUALITY", 82)
+THUMBNAIL_EDGE = _env_int("THUMBNAIL_EDGE", 320)
+THUMBNAIL_DISPLAY_WIDTH = _env_int("THUMBNAIL_DISPLAY_WIDTH", 160)
+
+# Before a report is stored, open reports of the same issue type that look
+# like the same problem are looked up (see communityfix/duplicates.py).
+# DUPLICATE_ACTION: "offer" lets the citizen add their report to the match,
+# "link" adds it automatically, "off" skips the check. Matches need a score
+# of DUPLICATE_THRESHOLD (0-1); photos count as the same within
+# PHOTO_HASH_MAX_DISTANCE differing bits.
+DUPLICATE_ACTION = _env("DUPLICATE_ACTION", "offer").lower()
+DUPLICATE_THRESHOLD = float(_env("DUPLICATE_THRESHOLD", 0.45))
+PHOTO_HASH_MAX_DISTANCE = _env_int("PHOTO_HASH_MAX_DISTANCE", 6)
+
+# Streets, puroks and landmarks that report locations are matched to (see
+# communityfix/places.py); the built-in list is used if the file does not
+# exist. A location names a place when at least PLACE_MATCH_THRESHOLD (0-1)
+# of the place's trigrams occur in it. The hotspot map counts reports in
+# squares of HOTSPOT_CELL_METERS.
+GAZETTEER_FILE = _env("GAZETTEER_FILE", "gazetteer.json")
+PLACE_MATCH_THRESHOLD = float(_env("PLACE_MATCH_THRESHOLD", 0.8))
+HOTSPOT_CELL_METERS = _env_int("HOTSPOT_CELL_METERS", 150)
+
+# Number of report cards shown per page in the admin report lists
+REPORTS_PAGE_SIZE = _env_int("REPORTS_PAGE_SIZE", 10)
+
+# HTTP API (python -m communityfix.api): where it listens and the largest
+# photo upload it accepts, before resizing
+API_HOST = _env("API_HOST", "127.0.0.1")
+API_PORT = _env_int("API_PORT", 8000)
+API_MAX_PHOTO_BYTES = _env_int("API_MAX_PHOTO_BYTES", 10_000_000)
+
+# Append one JSON line of timings and counters per app rerun to this file
+# (empty to turn off); summarise it with ``python -m communityfix.metrics``
+METRICS_LOG_FILE = _env("METRICS_LOG_FILE", "")
+
+# Target number of days to resolve each issue type (used for SLA figures)
+ISSUE_TYPE_SLA_DAYS = {
+    "Pothole": 7,
+    "Garbage Accumulation": 2,
+    "Broken Streetlight": 5,
+    "Clogged Drainage": 3,
+    "Graffiti": 14,
+    "Damaged Road": 14,
+    "Water Leak": 2,
+    "Noise Complaint": 3,
+    "Safety Hazard": 1,
+    "Other": 7,
+}
+DEFAULT_SLA_DAYS = _env_int("DEFAULT_SLA_DAYS", 7)
@@ -0,0 +1,244 @@
+"""Near-duplicate detection for new reports
+
+During outages the same problem is reported many times. Before a report is
+stored, the app looks for open reports (Received or In Progress) of the
+same issue type that describe the same thing, and offers to add the new
+report to the existing one instead (or does so itself, see
+``config.DUPLICATE_ACTION``).
+
+Similarity is estimated from MinHash signatures of the location and the
+description: each text is cut into overlapping 4-character shingles, and
+one-permutation hashing keeps the smallest shingle hash in each of
+``SIGNATURE_BINS`` bins. The share of equal bins between two signatures
+estimates how much the shingle sets overlap (their Jaccard similarity).
+Signatures are split into bands and indexed (LSH), so only reports sharing
+a whole band with the new one are compared, however many reports there are.
+
+Photos contribute through a 64-bit difference hash (dHash, see
+``imaging.perceptual_hash``); near-identical photos differ in only a few
+bits. The hash is split into 8 bytes that are indexed the same way, which
+finds every stored photo within 7 bits of the new one.
+"""
+import functools
+import re
+import zlib
+
+from communityfix import config
+
+
+SIGNATURE_BINS = 32  # a power of two: bins are picked with a bit mask
+BAND_ROWS = 4
+SHINGLE_SIZE = 4
+
+# How location and description similarity add up to a report's score, and
+# how much a matching photo adds
+LOCATION_WEIGHT = 0.6
+DESCRIPTION_WEIGHT = 0.4
+PHOTO_BONUS = 0.25
+
+# Shingles are hashed with CRC-32 spread over 64 bits by an odd multiplier:
+# unlike hash(), the result is the same in every process (the app, the API
+# and scripts agree on what is a duplicate)
+_MULTIPLIER = 0x9E3779B97F4A7C15
+_WORD_MASK = (1 << 64) - 1
+_BIN_BITS = SIGNATURE_BINS.bit_length() - 1
+_EMPTY = _WORD_MASK
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def _normalize(text):
+    return _NON_WORD_RE.sub(' ', text.lower()).strip() if text else ''
+
+
+def shingles(text):
+    """Overlapping character shingles of normalized text"""
+    text = _normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+@functools.lru_cache(maxsize=8192)
+def signature(text):
+    """One-permutation MinHash signature of a text, or None if it is empty
+
+    Empty bins (short texts) borrow the value of the next filled bin, so
+    equal texts always get equal signatures. Cached, as locations repeat a
+    lot; equal texts then also share one signature object.
+    """
+    text = _normalize(text)
+    if not text:
+        return None
+    bins = [_EMPTY] * SIGNATURE_BINS
+    value_bits = 64 - _BIN_BITS
+    value_mask = (1 << value_bits) - 1
+    crc32 = zlib.crc32
+    multiplier = _MULTIPLIER
+    word_mask = _WORD_MASK
+    data = text.encode()
+    if len(data) != len(text):
+        data = None  # Non-ASCII text: encode shingle by shingle
+    # Repeated shingles do not change the minimums, so no set is needed
+    for i in range(max(1, len(text) - SHINGLE_SIZE + 1)):
+        shingle = data[i:i + SHINGLE_SIZE] if data is not None else text[i:i + SHINGLE_SIZE].encode()
+        # The high bits of the product are the well mixed ones: the top
+        # bits pick the bin, the rest is the value
+        h = (crc32(shingle) * multiplier) & word_mask
+        slot = h >> value_bits
+        value = h & value_mask
+        if value < bins[slot]:
+            bins[slot] = value
+    if _EMPTY in bins:
+        # Walk backwards so each empty bin sees the next filled one; the
+        # last bins wrap round to the first filled bin
+        first = next(i for i, value in enumerate(bins) if value != _EMPTY)
+        donor = (bins[first], first)
+        for i in range(SIGNATURE_BINS - 1, -1, -1):
+            if bins[i] == _EMPTY:
+                bins[i] = donor
+            elif not isinstance(bins[i], tuple):
+                donor = (bins[i], i)
+    return tuple(bins)
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures (0 if either is missing)"""
+    if first is None or second is None:
+        return 0.0
+    return sum(a == b for a, b in zip(first, second)) / SIGNATURE_BINS
+
+
+def _bands(sig):
+    """One hash per band of a signature"""
+    return [hash(sig[start:start + BAND_ROWS]) for start in range(0, SIGNATURE_BINS, BAND_ROWS)]
+
+
+def _photo_bands(photo_hash):
+    return [(photo_hash >> shift) & 0xFF for shift in range(0, 64, 8)]
+
+
+def hamming(first, second):
+    return bin(first ^ second).count('1')
+
+
+@functools.lru_cache(maxsize=512)
+def photo_hash(path):
+    """Perceptual hash of a stored photo (hex), or None if it cannot be read
+
+    Cached by path: stored photos are named by their content, so a path
+    always holds the same picture.
+    """
+    # Imported here so Pillow is only loaded when a photo is hashed
+    from communityfix.imaging import perceptual_hash
+
+    try:
+        with open(path, 'rb') as f:
+            return f"{perceptual_hash(f.read()):016x}"
+    except (OSError, ValueError):
+        return None
+
+
+class DuplicateIndex:
+    """LSH buckets over the signatures of open reports, per issue type"""
+
+    # Band tables per issue type: location bands, then description bands,
+    # then photo bands
+    _TABLES = 2 * (SIGNATURE_BINS // BAND_ROWS) + 8
+
+    def __init__(self, reports=()):
+        # Report ID -> (issue_type, location signature, description signature, photo hash)
+        self._entries = {}
+        # Issue type -> one {band value: report IDs} dict per band
+        self._buckets = {}
+        for report in reports:
+            self.add(report)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _band_values(location_sig, description_sig, photo):
+        """(table number, band value) pairs for a report's signatures"""
+        values = []
+        for offset, sig in ((0, location_sig), (SIGNATURE_BINS // BAND_ROWS, description_sig)):
+            if sig is not None:
+                values.extend(enumerate(_bands(sig), start=offset))
+        if photo is not None:
+            values.extend(enumerate(_photo_bands(photo), start=2 * (SIGNATURE_BINS // BAND_ROWS)))
+        return values
+
+    def add(self, report):
+        """Index a report if it is still open"""
+        if report.status == 'Resolved':
+            return
+        hex_hash = report.get('photo_hash')
+        entry = (report.issue_type, signature(report.location), signature(report.description),
+                 int(hex_hash, 16) if hex_hash else None)
+        self._entries[report.id] = entry
+        tables = self._buckets.get(report.issue_type)
+        if tables is None:
+            tables = self._buckets[report.issue_type] = [{} for _ in range(self._TABLES)]
+        for table, value in self._band_values(*entry[1:]):
+            bucket = tables[table].get(value)
+            if bucket is None:
+                tables[table][value] = {report.id}
+            else:
+                bucket.add(report.id)
+
+    def remove(self, report_id):
+        entry = self._entries.pop(report_id, None)
+        if entry is None:
+            return
+        tables = self._buckets[entry[0]]
+        for table, value in self._band_values(*entry[1:]):
+            bucket = tables[table][value]
+            bucket.discard(report_id)
+            if not bucket:
+                del tables[table][value]
+
+    def update(self, report):
+        """Re-index a changed report (resolved reports drop out)"""
+        self.remove(report.id)
+        self.add(report)
+
+    def find(self, issue_type, location, description, photo_hash=None,
+             threshold=None, max_distance=None, limit=3):
+        """IDs and scores of likely duplicates, best first: [(report_id, score)]
+
+        The score is the weighted location and description similarity, plus
+        ``PHOTO_BONUS`` if the photos are within ``max_distance`` bits.
+        """
+        threshold = config.DUPLICATE_THRESHOLD if threshold is None else threshold
+        max_distance = config.PHOTO_HASH_MAX_DISTANCE if max_distance is None else max_distance
+        location_sig = signature(location)
+        description_sig = signature(description)
+        photo = int(photo_hash, 16) if photo_hash else None
+
+        candidates = set()
+        tables = self._buckets.get(issue_type)
+        if tables is not None:
+            for table, value in self._band_values(location_sig, description_sig, photo):
+                bucket = tables[table].get(value)
+                if bucket:
+                    candidates |= bucket
+
+        # Many open reports share a location (and signature object), so
+        # each distinct signature is compared once
+        location_scores = {}
+        description_scores = {}
+        matches = []
+        for report_id in candidates:
+            _, other_location, other_description, other_photo = self._entries[report_id]
+            location_score = location_scores.get(id(other_location))
+            if location_score is None:
+                location_score = location_scores[id(other_location)] = similarity(location_sig, other_location)
+            description_score = description_scores.get(id(other_description))
+            if description_score is None:
+                description_score = description_scores[id(other_description)] = similarity(description_sig, other_description)
+            score = LOCATION_WEIGHT * location_score + DESCRIPTION_WEIGHT * description_score
+            if photo is not None and other_photo is not None and hamming(photo, other_photo) <= max_distance:
+                score += PHOTO_BONUS
+            if score >= threshold:
+                matches.append((report_id, min(score, 1.0)))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
@@ -0,0 +1,112 @@
+"""Export reports as CSV, gzip-compressed CSV or Parquet
+
+Rows are produced one report at a time and written in chunks to a spooled
+temporary file (kept in memory while small, moved to disk when large), so
+an export never holds a DataFrame or a second full copy of the data.
+Photos are not embedded: the export links to the photo file instead, and
+comments are flattened into a single text column.
+"""
+import csv
+import gzip
+import io
+import itertools
+import tempfile
+
+from communityfix.photos import PhotoStore
+
+
+EXPORT_COLUMNS = [
+    'id', 'name', 'contact', 'issue_type', 'location', 'description', 'status',
+    'priority', 'assigned_to', 'date_reported', 'resolved_at', 'comments', 'photo_file',
+]
+
+# Format name -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'CSV (gzip)': ('csv.gz', 'application/gzip'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+# Exports larger than this are spooled to disk instead of memory
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+
+def flatten_comments(comments):
+    """All comments on a report as one line of text"""
+    return " | ".join(f"{c['timestamp']} {c['author']}: {c['text']}" for c in comments or [])
+
+
+def export_row(report, photo_store):
+    """Flat export record for one report (no photo payload)"""
+    if report.get('photo_ref'):
+        photo_file = str(photo_store.path(report['photo_ref']))
+    elif report.get('photo'):
+        photo_file = "(inline photo not exported)"
+    else:
+        photo_file = ""
+    return [
+        report['id'], report['name'], report['contact'], report['issue_type'],
+        report['location'], report['description'], report['status'],
+        report.get('priority', 'Medium'), report['assigned_to'], report['date_reported'],
+        report.get('resolved_at') or "", flatten_comments(report.get('comments')), photo_file,
+    ]
+
+
+def _chunks(reports, photo_store, chunk_size):
+    """Export rows in lists of at most ``chunk_size``"""
+    rows = (export_row(report, photo_store) for report in reports)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_csv(reports, fileobj, photo_store, chunk_size=1000, compress=False):
+    """Write reports as (optionally gzip-compressed) CSV to a binary file"""
+    target = gzip.GzipFile(fileobj=fileobj, mode='wb') if compress else fileobj
+    text = io.TextIOWrapper(target, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in _chunks(reports, photo_store, chunk_size):
+        writer.writerows(chunk)
+    text.flush()
+    # Detach so closing the wrapper does not close the caller's file
+    text.detach()
+    if compress:
+        target.close()
+
+
+def write_parquet(reports, fileobj, photo_store, chunk_size=10000):
+    """Write reports as Parquet, one row group per chunk"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('id', pa.int64()),
+        *[(column, pa.string()) for column in EXPORT_COLUMNS[1:]],
+    ])
+    with pq.ParquetWriter(fileobj, schema, compression='snappy') as writer:
+        for chunk in _chunks(reports, photo_store, chunk_size):
+            columns = [list(column) for column in zip(*chunk)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+
+def export_reports(reports, export_format, photo_store=None):
+    """Export reports in one of EXPORT_FORMATS
+
+    Returns a file object positioned at the start of the export. The caller
+    should close it when done.
+    """
+    photo_store = photo_store or PhotoStore()
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    if export_format == 'CSV':
+        write_csv(reports, output, photo_store)
+    elif export_format == 'CSV (gzip)':
+        write_csv(reports, output, photo_store, compress=True)
+    elif export_format == 'Parquet':
+        write_parquet(reports, output, photo_store)
+    else:
+        raise ValueError(f"Unknown export format: {export_format!r}")
+    output.seek(0)
+    return output
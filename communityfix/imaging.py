@@ -0,0 +1,97 @@
+"""Resizing and re-encoding of uploaded photos
+
+Phone photos are several megabytes. ``process_photo`` turns an upload into a
+display image bounded in pixels and bytes, plus a small thumbnail for list
+views, both rotated upright according to their EXIF orientation.
+``perceptual_hash`` fingerprints a photo for duplicate detection.
+"""
+import io
+
+from PIL import Image, ImageOps, features
+
+from communityfix import config
+from communityfix.metrics import count
+
+
+# Lowest quality tried when squeezing a photo under PHOTO_MAX_BYTES
+_MIN_QUALITY = 50
+
+
+def _output_format():
+    """Configured output format, falling back to JPEG if Pillow lacks WebP"""
+    if config.PHOTO_FORMAT == "WEBP" and features.check("webp"):
+        return "WEBP"
+    return "JPEG"
+
+
+def _to_rgb(image):
+    """Drop transparency (onto white) since JPEG has no alpha channel"""
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    return image
+
+
+def _encode(image, image_format, quality, max_bytes=None):
+    """Encode an image, lowering quality until it fits in ``max_bytes``"""
+    while True:
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, quality=quality, optimize=True)
+        data = buffer.getvalue()
+        if max_bytes is None or len(data) <= max_bytes or quality <= _MIN_QUALITY:
+            return data
+        quality -= 10
+
+
+def _resized(image, max_edge):
+    """Copy of ``image`` scaled down to fit in a max_edge x max_edge box"""
+    resized = image.copy()
+    resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    return resized
+
+
+def process_photo(data):
+    """Return ``(display_bytes, thumbnail_bytes)`` for uploaded image bytes
+
+    Raises ``PIL.UnidentifiedImageError`` if the data is not an image.
+    """
+    image_format = _output_format()
+    count('photos.decoded')
+    with Image.open(io.BytesIO(data)) as original:
+        image = _to_rgb(ImageOps.exif_transpose(original))
+
+    display = _encode(_resized(image, config.PHOTO_MAX_EDGE), image_format,
+                      config.PHOTO_QUALITY, config.PHOTO_MAX_BYTES)
+    thumbnail = _encode(_resized(image, config.THUMBNAIL_EDGE), image_format, config.PHOTO_QUALITY)
+    return display, thumbnail
+
+
+def make_thumbnail(data):
+    """Thumbnail bytes for an already processed photo"""
+    count('photos.decoded')
+    with Image.open(io.BytesIO(data)) as original:
+        image = _to_rgb(ImageOps.exif_transpose(original))
+    return _encode(_resized(image, config.THUMBNAIL_EDGE), _output_format(), config.PHOTO_QUALITY)
+
+
+def perceptual_hash(data):
+    """64-bit difference hash (dHash) of image bytes
+
+    The image is shrunk to 9x8 grey pixels and each bit records whether a
+    pixel is brighter than its right-hand neighbour, so re-encoded, resized
+    or slightly recoloured copies of a photo get (nearly) the same hash.
+    """
+    count('photos.decoded')
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original).convert('L').resize((9, 8), Image.LANCZOS)
+    pixels = list(image.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            bits = (bits << 1) | (left > pixels[row * 9 + col + 1])
+    return bits
@@ -0,0 +1,234 @@
+"""Background jobs: slow work taken off the citizen's submit
+
+A ``JobQueue`` is a bounded queue served by a few worker threads. The app
+uses one per process (see ``start_worker_pool``) for:
+
+- photo processing: a submitted photo is stored as uploaded (one file
+  write) and the report saved with it as ``pending_photo``, so the submit
+  returns at once; a ``photo`` job then resizes it, makes the thumbnail and
+  the duplicate-detection hash, and updates the report,
+- deleting uploads no report ended up using (``uploads``), at startup and
+  every ``config.UPLOAD_SWEEP_INTERVAL_SECONDS``,
+- compaction of the JSON store's event log (``compact``), every
+  ``config.COMPACT_INTERVAL_SECONDS``,
+- building the near-duplicate index at startup (``duplicates``),
+- moving old resolved reports to the archive (``archive``, see
+  communityfix/archive.py), at startup and every
+  ``config.ARCHIVE_INTERVAL_SECONDS``.
+
+The report and the uploaded photo are on disk before the job is queued, so
+nothing is lost if the process stops first: ``start_worker_pool`` queues
+the photos still pending when it starts. When the queue is full, ``submit``
+raises ``QueueFull`` and the caller does the work itself.
+
+Every job is timed under ``jobs.<kind>`` in the metrics registry, and the
+last few jobs of each kind are kept, with per-kind totals, for the admin
+dashboard.
+"""
+import itertools
+import queue
+import threading
+import time
+from collections import Counter, deque
+
+from communityfix import config
+from communityfix.metrics import count, timed
+
+
+class QueueFull(Exception):
+    """The job queue has ``max_queued`` jobs waiting already"""
+
+
+class Job:
+    """One unit of background work and how it went"""
+
+    __slots__ = ('id', 'kind', 'label', 'status', 'submitted_at', 'started_at', 'finished_at',
+                 'result', 'error', '_call')
+
+    def __init__(self, job_id, kind, label, call):
+        self.id = job_id
+        self.kind = kind
+        self.label = label
+        self.status = 'queued'
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self._call = call
+
+    def to_dict(self):
+        """Summary for display: id, kind, label, status, times (s since 1970), error"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'label': self.label,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'waited_s': (self.started_at or time.time()) - self.submitted_at,
+            'ran_s': (self.finished_at or time.time()) - self.started_at if self.started_at else None,
+            'error': self.error,
+        }
+
+
+class JobQueue:
+    """A bounded job queue served by ``workers`` daemon threads"""
+
+    def __init__(self, workers=None, max_queued=None, history=None):
+        self.workers = workers or config.WORKER_THREADS
+        self._queue = queue.Queue(maxsize=max_queued or config.JOB_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._active = {}     # job ID -> queued or running job
+        self._history = {}    # kind -> deque of finished jobs, newest last
+        self._history_size = history or config.JOB_HISTORY
+        self._totals = Counter()  # (kind, 'done' or 'failed') -> jobs
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._work, name=f"job-worker-{number}", daemon=True)
+                         for number in range(1, self.workers + 1)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, kind, func, *args, label="", **kwargs):
+        """Queue ``func(*args, **kwargs)``; returns the Job
+
+        Raises QueueFull if the queue is at its limit.
+        """
+        job = Job(next(self._ids), kind, label, lambda: func(*args, **kwargs))
+        with self._lock:
+            self._active[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._active[job.id]
+            count('jobs.rejected')
+            raise QueueFull(f"{self._queue.maxsize} jobs are waiting already")
+        return job
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            job.status = 'running'
+            job.started_at = time.time()
+            try:
+                with timed(f'jobs.{job.kind}'):
+                    job.result = job._call()
+                job.status = 'done'
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = 'failed'
+            job.finished_at = time.time()
+            job._call = None
+            with self._lock:
+                del self._active[job.id]
+                history = self._history.get(job.kind)
+                if history is None:
+                    history = self._history[job.kind] = deque(maxlen=self._history_size)
+                history.append(job)
+                self._totals[(job.kind, job.status)] += 1
+            self._queue.task_done()
+
+    def schedule_every(self, interval, kind, func, label=""):
+        """Submit ``func`` as a job every ``interval`` seconds, unless one is still pending
+
+        Returns the scheduling thread.
+        """
+        def run():
+            while not self._stop.wait(interval):
+                if self.pending(kind):
+                    continue
+                try:
+                    self.submit(kind, func, label=label)
+                except QueueFull:
+                    continue
+
+        thread = threading.Thread(target=run, name=f"{kind}-schedule", daemon=True)
+        thread.start()
+        return thread
+
+    def pending(self, kind=None):
+        """Number of queued or running jobs (of one kind)"""
+        with self._lock:
+            return sum(1 for job in self._active.values() if kind is None or job.kind == kind)
+
+    def depth(self):
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize()
+
+    def stats(self):
+        """Per kind: queued, running, done and failed job counts"""
+        with self._lock:
+            kinds = {kind for kind, _ in self._totals} | {job.kind for job in self._active.values()}
+            stats = {kind: {'queued': 0, 'running': 0, 'done': self._totals[(kind, 'done')],
+                            'failed': self._totals[(kind, 'failed')]} for kind in sorted(kinds)}
+            for job in self._active.values():
+                stats[job.kind][job.status] += 1
+        return stats
+
+    def jobs(self, limit=20):
+        """Running, queued and recently finished jobs, newest first"""
+        with self._lock:
+            jobs = list(self._active.values())
+            for history in self._history.values():
+                jobs.extend(history)
+        jobs.sort(key=lambda job: job.id, reverse=True)
+        return jobs[:limit]
+
+    def wait(self, timeout=None):
+        """Wait until no job is queued or running; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self):
+        """Stop scheduling and end the workers once queued jobs are done"""
+        self._stop.set()
+        for _ in self._threads:
+            self._queue.put(None)
+
+
+def _process_photos(service, report_id):
+    """Photo job: fails (for the admin's job list) if a photo had to be dropped"""
+    processed, dropped = service.process_photos(report_id)
+    if dropped:
+        raise ValueError(f"{dropped} photo(s) could not be read and were dropped")
+    return processed
+
+
+def queue_photo_processing(jobs, service, report_id):
+    """Process a report's pending photos in the background, or right away if the queue is full"""
+    try:
+        jobs.submit('photo', _process_photos, service, report_id, label=f"Photos of report #{report_id}")
+    except QueueFull:
+        service.process_photos(report_id)
+
+
+def start_worker_pool(service, workers=None):
+    """A JobQueue doing the background work for ``service``
+
+    Schedules compaction, the sweep of unused uploads and archiving (unless
+    it is off), builds the duplicate index (unless duplicate detection is
+    off) and queues the photos left pending by an earlier run.
+    """
+    jobs = JobQueue(workers)
+    repository = service.repository
+    jobs.schedule_every(config.COMPACT_INTERVAL_SECONDS, 'compact',
+                        lambda: repository.compact(config.COMPACT_MIN_EVENTS), label="Compact event log")
+    jobs.submit('uploads', service.sweep_uploads, label="Delete unused uploads")
+    jobs.schedule_every(config.UPLOAD_SWEEP_INTERVAL_SECONDS, 'uploads', service.sweep_uploads,
+                        label="Delete unused uploads")
+    if config.ARCHIVE_AFTER_DAYS > 0:
+        jobs.submit('archive', service.archive_old_reports, label="Archive old resolved reports")
+        jobs.schedule_every(config.ARCHIVE_INTERVAL_SECONDS, 'archive', service.archive_old_reports,
+                            label="Archive old resolved reports")
+    if config.DUPLICATE_ACTION != "off":
+        jobs.submit('duplicates', repository.prepare_duplicates, label="Build duplicate index")
+    for report_id in service.pending_photo_reports():
+        queue_photo_processing(jobs, service, report_id)
+    return jobs
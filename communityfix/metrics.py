@@ -0,0 +1,234 @@
+"""Timing and counters for the data layer and the app's reruns
+
+``timed(name)`` (a context manager and decorator) measures a block of code
+and ``count(name, amount)`` bumps a counter, e.g. bytes read from storage or
+photos decoded. Both feed a process-wide ``Metrics`` registry that keeps
+call counts, totals and recent samples for percentiles.
+
+The app wraps every rerun in ``start_trace()`` / ``finish_trace()``; while a
+trace is active on the current thread, timings and counters are also
+recorded in it, giving a per-rerun breakdown. Finished traces are appended
+as JSON lines to ``config.METRICS_LOG_FILE`` when that is set, and can be
+summarised later with::
+
+    python -m communityfix.metrics summarize metrics.jsonl
+"""
+import argparse
+import functools
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+from communityfix import config
+
+
+# Recent samples kept per timer for the percentiles
+SAMPLE_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Timer:
+    """Call count, total and recent samples of one timed operation"""
+
+    __slots__ = ('count', 'total', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def summary(self):
+        """count, mean/p50/p99/max in milliseconds"""
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': _percentile(ordered, 0.5) * 1000,
+            'p99_ms': _percentile(ordered, 0.99) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+
+class Metrics:
+    """Process-wide timers and counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timers = {}
+        self.counters = Counter()
+        self.started_at = time.time()
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = Timer()
+            timer.add(seconds)
+
+    def add_count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def snapshot(self):
+        """JSON-ready summary of every timer and counter"""
+        with self._lock:
+            return {
+                'since': self.started_at,
+                'uptime_s': time.time() - self.started_at,
+                'timers': {name: timer.summary() for name, timer in sorted(self.timers.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.started_at = time.time()
+
+
+METRICS = Metrics()
+
+# The rerun trace being recorded on this thread, if any
+_local = threading.local()
+
+
+class Trace:
+    """Timings and counters recorded during one rerun"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.timings = []  # (name, milliseconds) in completion order
+        self.counters = Counter()
+        self.total_ms = None
+
+    def to_dict(self):
+        return {
+            'trace': self.name,
+            'at': self.started_at,
+            'total_ms': self.total_ms,
+            'timings': [{'name': name, 'ms': ms} for name, ms in self.timings],
+            'counters': dict(self.counters),
+        }
+
+
+def start_trace(name):
+    """Start recording a trace on this thread; returns it"""
+    _local.trace = Trace(name)
+    _local.trace_start = time.perf_counter()
+    return _local.trace
+
+
+def finish_trace():
+    """Stop the current trace, record its total and log it; returns it (or None)"""
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return None
+    _local.trace = None
+    trace.total_ms = (time.perf_counter() - _local.trace_start) * 1000
+    METRICS.add_time(f"trace.{trace.name}", trace.total_ms / 1000)
+    if config.METRICS_LOG_FILE:
+        _write_log(trace)
+    return trace
+
+
+_log_lock = threading.Lock()
+
+
+def _write_log(trace):
+    line = json.dumps(trace.to_dict(), separators=(',', ':')) + '\n'
+    try:
+        with _log_lock, open(config.METRICS_LOG_FILE, 'a') as f:
+            f.write(line)
+    except OSError as e:
+        # Metrics must never break the app
+        logger.warning("Could not write metrics log: %s", e)
+
+
+class timed:
+    """Time a block (``with timed("storage.load"):``) or function (``@timed(...)``)"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self._start
+        METRICS.add_time(self.name, seconds)
+        trace = getattr(_local, 'trace', None)
+        if trace is not None:
+            trace.timings.append((self.name, seconds * 1000))
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(self.name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def count(name, amount=1):
+    """Add ``amount`` to a counter (and to the current trace)"""
+    METRICS.add_count(name, amount)
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.counters[name] += amount
+
+
+def summarize_log(lines):
+    """Per-timing count and p50/p99 (ms) from metrics log lines"""
+    samples = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        samples.setdefault(f"trace.{entry['trace']}", []).append(entry['total_ms'])
+        for timing in entry['timings']:
+            samples.setdefault(timing['name'], []).append(timing['ms'])
+    summary = {}
+    for name, values in sorted(samples.items()):
+        values.sort()
+        summary[name] = {
+            'count': len(values),
+            'p50_ms': _percentile(values, 0.5),
+            'p99_ms': _percentile(values, 0.99),
+        }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CommUnityFix metrics tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    summarize = subparsers.add_parser("summarize", help="Percentiles per timing from a metrics log")
+    summarize.add_argument("log", nargs="?", default=config.METRICS_LOG_FILE or "metrics.jsonl")
+
+    args = parser.parse_args(argv)
+    if args.command == "summarize":
+        with open(args.log) as f:
+            summary = summarize_log(f)
+        for name, stats in summary.items():
+            print(f"{name:<36} {stats['count']:>7}  p50 {stats['p50_ms']:10.3f} ms  p99 {stats['p99_ms']:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Content-addressed storage for report photos
+
+Photos are written once to ``config.PHOTO_DIR`` under the SHA-256 of their
+bytes, so uploading the same picture twice stores it only once. Reports keep
+just the reference (``photo_ref``), e.g. ``"3fa9...e1.jpg"``, which lives at
+``photos/3f/3fa9...e1.jpg``.
+
+Uploads are resized before they are stored (see ``imaging.py``): reports
+reference the bounded display image in ``photo_ref`` and a small thumbnail
+in ``thumb_ref``.
+
+Photos submitted for processing later (see communityfix/jobs.py) wait as
+uploaded in a separate ``PhotoStore`` under ``uploads/``; reports name them
+in ``pending_photo``. ``PendingUploads`` counts the reports waiting for each
+one, so an upload can be removed as soon as none does without looking at
+every report.
+
+Reports saved before this store existed carry the photo inline as base64 in
+``photo``. Move them out (and create missing thumbnails) with::
+
+    python -m communityfix.photos migrate
+"""
+import argparse
+import base64
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+from communityfix import config
+from communityfix.metrics import count
+from communityfix.storage import create_store
+
+
+# Leading bytes of the image formats the report form accepts
+_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+]
+
+
+def guess_extension(data):
+    """File extension for image bytes, based on their leading signature"""
+    for signature, extension in _SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return 'bin'
+
+
+class PhotoStore:
+    """Photos on disk, named by the hash of their contents"""
+
+    def __init__(self, root=config.PHOTO_DIR):
+        self.root = Path(root)
+
+    def path(self, ref):
+        """Location of a stored photo on disk"""
+        return self.root / ref[:2] / ref
+
+    def exists(self, ref):
+        """Whether a photo reference points at a stored file"""
+        return self.path(ref).exists()
+
+    def put(self, data):
+        """Store photo bytes and return their reference
+
+        Identical photos map to the same file, which is only written once.
+        """
+        ref = f"{hashlib.sha256(data).hexdigest()}.{guess_extension(data)}"
+        target = self.path(ref)
+        if target.exists():
+            return ref
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see half a photo
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            count('photos.bytes_written', len(data))
+            os.replace(tmp_path, target)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return ref
+
+    def read(self, ref):
+        """Return the bytes of a stored photo"""
+        data = self.path(ref).read_bytes()
+        count('photos.bytes_read', len(data))
+        return data
+
+
+def pending_uploads(report):
+    """Pending photo references of a report and its linked reports"""
+    refs = [report.get('pending_photo')]
+    refs.extend(linked.get('pending_photo') for linked in report.get('linked_reports') or ())
+    return [ref for ref in refs if ref]
+
+
+class PendingUploads:
+    """Which reports wait for which uploads, with a count per upload"""
+
+    def __init__(self, reports=()):
+        self._refs = {}          # report ID -> its pending refs
+        self._counts = Counter()  # ref -> reports waiting for it
+        for report in reports:
+            self.add(report)
+
+    def __contains__(self, ref):
+        return ref in self._counts
+
+    def __len__(self):
+        return len(self._refs)
+
+    def report_ids(self):
+        """IDs of the reports with pending photos, in ID order"""
+        return sorted(self._refs)
+
+    def add(self, report):
+        refs = set(pending_uploads(report))
+        if refs:
+            self._refs[report.id] = refs
+            self._counts.update(refs)
+
+    def update(self, report):
+        self.remove(report.id)
+        self.add(report)
+
+    def remove(self, report_id):
+        refs = self._refs.pop(report_id, ())
+        self._counts.subtract(refs)
+        for ref in refs:
+            if self._counts[ref] <= 0:
+                del self._counts[ref]
+
+
+def save_uploaded_photo(photo_store, data):
+    """Resize an upload and store it, returning ``(photo_ref, thumb_ref)``"""
+    # Imported here so Pillow is only loaded once a photo is processed
+    from communityfix.imaging import process_photo
+
+    display, thumbnail = process_photo(data)
+    return photo_store.put(display), photo_store.put(thumbnail)
+
+
+def add_missing_thumbnails(reports, photo_store):
+    """Create thumbnails for stored photos that do not have one yet
+
+    Changes ``reports`` in place and returns the reports that were changed.
+    """
+    from communityfix.imaging import make_thumbnail
+
+    changed = []
+    for report in reports:
+        if report.get('photo_ref') and not report.get('thumb_ref'):
+            thumbnail = make_thumbnail(photo_store.read(report['photo_ref']))
+            report['thumb_ref'] = photo_store.put(thumbnail)
+            changed.append(report)
+    return changed
+
+
+def migrate_inline_photos(reports, photo_store):
+    """Move base64 ``photo`` fields out of reports and into the photo store
+
+    Changes ``reports`` in place and returns the reports that were changed.
+    Their thumbnails are made by ``add_missing_thumbnails``.
+    """
+    changed = []
+    for report in reports:
+        inline = report.get('photo')
+        if inline:
+            report['photo_ref'] = photo_store.put(base64.b64decode(inline))
+            del report['photo']
+            changed.append(report)
+    return changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CommUnityFix photo tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate", help="Move inline base64 photos into the photo store and add thumbnails")
+    migrate.add_argument("--backend", default=None, help="Storage backend (default: from config)")
+    migrate.add_argument("--photo-dir", default=config.PHOTO_DIR, help="Photo store directory")
+
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        store = create_store(args.backend)
+        reports = store.load_reports()
+        photo_store = PhotoStore(args.photo_dir)
+        moved = migrate_inline_photos(reports, photo_store)
+        thumbnailed = add_missing_thumbnails(reports, photo_store)
+        if moved or thumbnailed:
+            store.save_all(reports)
+        print(f"Moved {len(moved)} photos into {args.photo_dir}, created {len(thumbnailed)} thumbnails")
+
+
+if __name__ == "__main__":
+    main()
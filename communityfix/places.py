@@ -0,0 +1,355 @@
+"""Canonical places for free-text locations, and report counts per map cell
+
+Locations are typed freely ("near brgy hall, main st."), so one place is
+spelled many ways. The gazetteer lists the barangay's streets, puroks and
+landmarks with the spellings people use (aliases) and, optionally, their
+coordinates. ``Gazetteer.match`` maps a location to the place it names by
+comparing character trigrams (three-letter pieces of each word): a place
+matches when enough of its trigrams occur in the location, which tolerates
+abbreviations, word order and small typos. When a location names several
+places ("Barangay Hall, Main Street"), the most specific one wins:
+landmarks before streets before puroks.
+
+New reports get their place stored in ``place`` when they are saved;
+older reports are matched when the repository loads (results are cached,
+as locations repeat). ``python -m communityfix.places assign`` stores the
+place on every report so that loading needs no matching.
+
+``PlaceIndex`` keeps reports grouped by place and counts them per place and
+per grid cell (squares of ``config.HOTSPOT_CELL_METERS``), adjusting the
+counts as reports are added or change status. The admin "By Location" view
+and the Progress Dashboard hotspot map read these counts instead of
+scanning reports.
+
+The gazetteer is read from ``config.GAZETTEER_FILE`` - a JSON list of
+``{"name", "kind", "aliases", "lat", "lon"}`` objects - if that file
+exists; otherwise the built-in ``DEFAULT_PLACES`` are used. Their
+coordinates are only a sample layout: replace them with your barangay's.
+"""
+import argparse
+import functools
+import itertools
+import json
+import math
+import re
+from collections import Counter, namedtuple
+from pathlib import Path
+
+from communityfix import config
+
+
+Place = namedtuple('Place', ['name', 'kind', 'aliases', 'lat', 'lon'])
+
+# More specific kinds win when a location names several places
+KINDS = ('landmark', 'street', 'purok')
+
+# Built-in gazetteer: the places used in examples and generated data, on a
+# sample layout (latitude, longitude)
+DEFAULT_PLACES = [
+    Place("Barangay Hall", 'landmark', ("brgy hall", "barangay office", "municipal hall"), 14.6502, 121.0301),
+    Place("Chapel", 'landmark', ("church", "kapilya"), 14.6511, 121.0289),
+    Place("Elementary School", 'landmark', ("school", "paaralan"), 14.6489, 121.0315),
+    Place("Health Center", 'landmark', ("health centre", "clinic"), 14.6505, 121.0308),
+    Place("Public Market", 'landmark', ("market", "palengke"), 14.6478, 121.0296),
+    Place("Basketball Court", 'landmark', ("court", "covered court"), 14.6520, 121.0322),
+    Place("Main Street", 'street', (), 14.6500, 121.0300),
+    Place("Rizal Avenue", 'street', (), 14.6515, 121.0330),
+    Place("Mabini Street", 'street', (), 14.6485, 121.0320),
+    Place("Luna Road", 'street', (), 14.6530, 121.0290),
+    Place("Bonifacio Drive", 'street', (), 14.6470, 121.0280),
+    Place("Market Lane", 'street', (), 14.6476, 121.0299),
+    Place("Purok 1", 'purok', (), 14.6525, 121.0275),
+    Place("Purok 2", 'purok', (), 14.6525, 121.0310),
+    Place("Purok 3", 'purok', (), 14.6525, 121.0345),
+    Place("Purok 4", 'purok', (), 14.6495, 121.0275),
+    Place("Purok 5", 'purok', (), 14.6495, 121.0345),
+    Place("Purok 6", 'purok', (), 14.6465, 121.0285),
+    Place("Purok 7", 'purok', (), 14.6465, 121.0330),
+]
+
+# Abbreviations expanded before matching
+ABBREVIATIONS = {
+    'st': 'street', 'str': 'street', 'ave': 'avenue', 'av': 'avenue', 'rd': 'road',
+    'dr': 'drive', 'ln': 'lane', 'brgy': 'barangay', 'bgy': 'barangay', 'prk': 'purok',
+    'sch': 'school', 'ctr': 'center', 'cntr': 'center',
+}
+
+# Last words of street names that people leave out ("along Mabini")
+STREET_WORDS = frozenset({'street', 'avenue', 'road', 'drive', 'lane', 'highway', 'extension'})
+
+# Metres per degree of latitude
+_METERS_PER_DEGREE = 111_320
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_LETTER_DIGIT_RE = re.compile(r"(?<=[a-z])(?=[0-9])|(?<=[0-9])(?=[a-z])")
+
+
+def normalize(text):
+    """Lower-cased words of a location, with abbreviations spelled out"""
+    if not text:
+        return []
+    # "purok3" is "purok 3"
+    text = _LETTER_DIGIT_RE.sub(' ', _NON_WORD_RE.sub(' ', text.lower()))
+    return [ABBREVIATIONS.get(word, word) for word in text.split()]
+
+
+@functools.lru_cache(maxsize=16384)
+def _word_trigrams(word):
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def trigrams(words):
+    """Character trigrams of each word, padded the way PostgreSQL's pg_trgm does"""
+    return set().union(*map(_word_trigrams, words))
+
+
+def cell_of(lat, lon, cell_meters=None):
+    """Grid cell (row, column) holding a point"""
+    cell_meters = cell_meters or config.HOTSPOT_CELL_METERS
+    row = math.floor(lat * _METERS_PER_DEGREE / cell_meters)
+    column = math.floor(lon * _METERS_PER_DEGREE * math.cos(math.radians(lat)) / cell_meters)
+    return row, column
+
+
+class Gazetteer:
+    """The places report locations are matched against"""
+
+    def __init__(self, places=DEFAULT_PLACES, threshold=None):
+        self.places = {place.name: place for place in places}
+        self.threshold = config.PLACE_MATCH_THRESHOLD if threshold is None else threshold
+        # One entry per spelling: (place, trigram count, numbers it contains)
+        self._spellings = []
+        # Trigrams a location must share with each spelling to match it
+        self._needed = []
+        # Trigram -> numbers of the spellings that contain it
+        self._by_trigram = {}
+        for place in self.places.values():
+            for words in self._spellings_of(place):
+                grams = trigrams(words)
+                if not grams:
+                    continue
+                number = len(self._spellings)
+                self._spellings.append((place, len(grams), {word for word in words if word.isdigit()}))
+                self._needed.append(math.ceil(self.threshold * len(grams) - 1e-9))
+                for gram in grams:
+                    self._by_trigram.setdefault(gram, []).append(number)
+        # Locations repeat a lot, so matches are cached per instance
+        self.match = functools.lru_cache(maxsize=8192)(self._match)
+
+    def __len__(self):
+        return len(self.places)
+
+    @staticmethod
+    def _spellings_of(place):
+        """Normalized words of each way a place is written"""
+        spellings = [normalize(spelling) for spelling in (place.name,) + tuple(place.aliases)]
+        if place.kind == 'street':
+            # Streets are often named without "Street"
+            spellings.extend(words[:-1] for words in list(spellings)
+                             if len(words) > 1 and words[-1] in STREET_WORDS)
+        return spellings
+
+    def get(self, name):
+        """The place with the given name, or None"""
+        return self.places.get(name)
+
+    def _match(self, location):
+        words = normalize(location)
+        by_trigram = self._by_trigram
+        hits = Counter(itertools.chain.from_iterable(
+            by_trigram[gram] for gram in trigrams(words) if gram in by_trigram))
+        needed = self._needed
+        best = None
+        best_key = None
+        for number in [number for number, count in hits.items() if count >= needed[number]]:
+            place, size, numbers = self._spellings[number]
+            score = hits[number] / size
+            # "Purok 1" is not "Purok 12": numbers have to match exactly
+            if not numbers.issubset(words):
+                continue
+            key = (score, -KINDS.index(place.kind) if place.kind in KINDS else -len(KINDS), size)
+            if best_key is None or key > best_key:
+                best, best_key = place, key
+        return best
+
+    def place_of(self, report):
+        """The place a report is at: its stored ``place`` if still known, else a match"""
+        place = self.places.get(report.get('place'))
+        return place if place is not None else self.match(report['location'])
+
+    def cells(self, cell_meters=None):
+        """Names of the places in each grid cell: {(row, column): [names]}"""
+        cells = {}
+        for place in self.places.values():
+            if place.lat is not None and place.lon is not None:
+                cells.setdefault(cell_of(place.lat, place.lon, cell_meters), []).append(place.name)
+        return cells
+
+
+def load_gazetteer(path=None):
+    """The gazetteer from ``path`` (default ``config.GAZETTEER_FILE``), or the built-in one"""
+    path = Path(path or config.GAZETTEER_FILE)
+    if not path.exists():
+        return Gazetteer()
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    places = []
+    for entry in entries:
+        kind = entry.get('kind', 'landmark')
+        if kind not in KINDS:
+            raise ValueError(f"{path}: unknown kind {kind!r} for {entry.get('name')!r}")
+        places.append(Place(entry['name'], kind, tuple(entry.get('aliases', ())),
+                            entry.get('lat'), entry.get('lon')))
+    return Gazetteer(places)
+
+
+HeatmapData = namedtuple('HeatmapData', [
+    'cells',          # ((row, column, count, place names), ...)
+    'cell_meters',    # size of a cell
+])
+
+
+class PlaceIndex:
+    """Reports grouped by place, and report counts per place and grid cell"""
+
+    def __init__(self, gazetteer, reports=(), cell_meters=None):
+        self.gazetteer = gazetteer
+        self.cell_meters = cell_meters or config.HOTSPOT_CELL_METERS
+        cells = gazetteer.cells(self.cell_meters)
+        self._cell_names = {cell: ", ".join(names) for cell, names in cells.items()}
+        self._place_cells = {name: cell for cell, names in cells.items() for name in names}
+        # Place name (None: not recognised) -> {report ID: record}
+        self.by_place = {}
+        self.place_counts = Counter()  # (place name, status) -> reports
+        self.cell_counts = Counter()   # (cell, status) -> reports
+        # (place name, cell, status) of each report, to move it on update
+        self._keys = {}
+        self._unsorted = set()
+        for report in reports:
+            self.add(report)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _count(self, keys, delta):
+        name, cell, status = keys
+        for counter, key in ((self.place_counts, (name, status)), (self.cell_counts, (cell, status))):
+            if key[0] is None:
+                continue
+            counter[key] += delta
+            if not counter[key]:
+                del counter[key]
+
+    def add(self, report):
+        """Index a newly created report"""
+        place = self.gazetteer.place_of(report)
+        name = place.name if place else None
+        keys = (name, self._place_cells.get(name), report.status)
+        bucket = self.by_place.setdefault(name, {})
+        if bucket and report.id < next(reversed(bucket)):
+            self._unsorted.add(name)
+        bucket[report.id] = report
+        self._count(keys, 1)
+        self._keys[report.id] = keys
+
+    def update(self, report):
+        """Swap in a changed report and move its counts if its status changed"""
+        old_keys = self._keys.get(report.id)
+        if old_keys is None:
+            self.add(report)
+            return
+        # The location never changes after submission
+        self.by_place[old_keys[0]][report.id] = report
+        keys = old_keys[:2] + (report.status,)
+        if keys != old_keys:
+            self._count(old_keys, -1)
+            self._count(keys, 1)
+            self._keys[report.id] = keys
+
+    def remove(self, report_id):
+        """Drop a report from the index"""
+        keys = self._keys.pop(report_id, None)
+        if keys is None:
+            return
+        self._count(keys, -1)
+        bucket = self.by_place[keys[0]]
+        del bucket[report_id]
+        if not bucket:
+            del self.by_place[keys[0]]
+
+    def _reports(self, name):
+        bucket = self.by_place.get(name, {})
+        if name in self._unsorted:
+            self.by_place[name] = bucket = dict(sorted(bucket.items()))
+            self._unsorted.discard(name)
+        return list(bucket.values())
+
+    def organize_by_location(self, unmatched_label="Other Locations"):
+        """Reports grouped by place, busiest first; unrecognised locations last"""
+        names = sorted((name for name in self.by_place if name is not None),
+                       key=lambda name: (-len(self.by_place[name]), name))
+        organized = {name: self._reports(name) for name in names}
+        if None in self.by_place:
+            organized[unmatched_label] = self._reports(None)
+        return organized
+
+    def hotspots(self, count=10, open_only=True):
+        """The places with the most (open) reports: [(place name, reports)]"""
+        totals = Counter()
+        for (name, status), reports in self.place_counts.items():
+            if not open_only or status != 'Resolved':
+                totals[name] += reports
+        return totals.most_common(count)
+
+    def heatmap_data(self, open_only=True):
+        """Hashable per-cell report counts for the hotspot map"""
+        totals = Counter()
+        for (cell, status), reports in self.cell_counts.items():
+            if not open_only or status != 'Resolved':
+                totals[cell] += reports
+        cells = tuple(sorted((row, column, reports, self._cell_names.get((row, column), ""))
+                             for (row, column), reports in totals.items()))
+        return HeatmapData(cells, self.cell_meters)
+
+
+def main(argv=None):
+    # Imported here so matching a location needs no storage
+    from communityfix.storage import create_store
+
+    parser = argparse.ArgumentParser(description="CommUnityFix location tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    match = subparsers.add_parser("match", help="Show the place a location text matches")
+    match.add_argument("location", nargs="+")
+    assign = subparsers.add_parser("assign", help="Store the matched place on every report")
+    assign.add_argument("--backend", default=None, help="Storage backend (default: from config)")
+    for subparser in (match, assign):
+        subparser.add_argument("--gazetteer", default=None, help="Gazetteer JSON file (default: from config)")
+
+    args = parser.parse_args(argv)
+    gazetteer = load_gazetteer(args.gazetteer)
+    if args.command == "match":
+        for location in args.location:
+            place = gazetteer.match(location)
+            print(f"{location!r}: {place.name + ' (' + place.kind + ')' if place else 'no match'}")
+    elif args.command == "assign":
+        store = create_store(args.backend)
+        reports = store.load_reports()
+        changed = []
+        for report in reports:
+            place = gazetteer.match(report['location'])
+            name = place.name if place else None
+            if report.get('place') != name:
+                if name is None:
+                    report.pop('place', None)
+                else:
+                    report['place'] = name
+                changed.append(report)
+        if changed:
+            store.save_all(reports)
+        matched = sum(1 for report in reports if report.get('place'))
+        print(f"Matched {matched} of {len(reports)} reports to a place, updated {len(changed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Compact in-memory report records
+
+Storage keeps reports as plain dicts (that is the JSON/SQLite format), but
+the shared repository holds them as ``ReportRecord`` objects:
+
+- ``__slots__`` instead of a per-report dict,
+- submission and resolution times as integer seconds since 1970 (local
+  time, like the stored strings) instead of "%Y-%m-%d %H:%M" text, so date
+  grouping and resolution times need no parsing,
+- status, priority, issue type and assignee interned, so every report with
+  the same value points at one shared string,
+- comments and status history as tuples (the empty tuple is shared).
+
+Records are read-only. They still answer ``record['field']`` and
+``record.get('field')`` with the stored values, including ``date_reported``
+and ``resolved_at`` as text, so display and export code can treat them like
+the stored dicts.
+"""
+import datetime
+import sys
+
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+
+
+def parse_timestamp(text):
+    """Seconds since 1970 for a "%Y-%m-%d %H:%M" time, or None"""
+    if not text:
+        return None
+    return int((datetime.datetime.fromisoformat(text) - _EPOCH).total_seconds())
+
+
+def format_timestamp(timestamp):
+    """The "%Y-%m-%d %H:%M" text for a timestamp from ``parse_timestamp``"""
+    if timestamp is None:
+        return None
+    return (_EPOCH + datetime.timedelta(seconds=timestamp)).isoformat(sep=' ', timespec='minutes')
+
+
+def timestamp_day(timestamp):
+    """Calendar day of a timestamp from ``parse_timestamp``"""
+    return datetime.date.fromordinal(_EPOCH_ORDINAL + timestamp // 86400)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ReportRecord:
+    """One report, read-only, in a fraction of the memory of its dict"""
+
+    # Fields kept as they are stored, plus the two timestamps and a dict
+    # for any other (rare or legacy) fields such as inline photos
+    _PLAIN_FIELDS = (
+        'id', 'name', 'contact', 'issue_type', 'location', 'description',
+        'status', 'priority', 'assigned_to', 'photo_ref', 'thumb_ref',
+        'comments', 'status_history',
+    )
+    __slots__ = _PLAIN_FIELDS + ('reported_ts', 'resolved_ts', 'extra')
+
+    _PLAIN_KEYS = frozenset(_PLAIN_FIELDS)
+    _KNOWN_KEYS = frozenset(_PLAIN_FIELDS + ('date_reported', 'resolved_at'))
+
+    @classmethod
+    def from_dict(cls, report):
+        """Build a record from a stored report dict"""
+        record = cls.__new__(cls)
+        record.id = report['id']
+        record.name = report['name']
+        record.contact = report['contact']
+        record.issue_type = _intern(report['issue_type'])
+        record.location = report['location']
+        record.description = report['description']
+        record.status = _intern(report['status'])
+        record.priority = _intern(report.get('priority', 'Medium'))
+        record.assigned_to = _intern(report.get('assigned_to', 'Not assigned'))
+        record.photo_ref = report.get('photo_ref')
+        record.thumb_ref = report.get('thumb_ref')
+        record.comments = tuple(report.get('comments') or ())
+        record.status_history = tuple(report.get('status_history') or ())
+        record.reported_ts = parse_timestamp(report['date_reported'])
+        record.resolved_ts = parse_timestamp(report.get('resolved_at'))
+        extra = {key: value for key, value in report.items() if key not in cls._KNOWN_KEYS}
+        record.extra = extra or None
+        return record
+
+    def __getitem__(self, key):
+        if key in self._PLAIN_KEYS:
+            return getattr(self, key)
+        if key == 'date_reported':
+            return format_timestamp(self.reported_ts)
+        if key == 'resolved_at':
+            return format_timestamp(self.resolved_ts)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self._KNOWN_KEYS:
+            return self[key]
+        # Rare fields are absent from most records; skip raising KeyError
+        return self.extra.get(key, default) if self.extra else default
+
+    def __contains__(self, key):
+        return key in self._KNOWN_KEYS or bool(self.extra and key in self.extra)
+
+    def __repr__(self):
+        return f"ReportRecord(id={self.id!r}, issue_type={self.issue_type!r}, status={self.status!r})"
+
+    @property
+    def day(self):
+        """Calendar day the report was submitted"""
+        return timestamp_day(self.reported_ts)
+
+    def to_dict(self):
+        """The stored-dict form of the report"""
+        report = {key: self[key] for key in self._PLAIN_FIELDS + ('date_reported', 'resolved_at')}
+        report['comments'] = list(self.comments)
+        report['status_history'] = list(self.status_history)
+        report.update(self.extra or {})
+        return report
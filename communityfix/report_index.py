@@ -0,0 +1,177 @@
+"""In-memory index of reports by status, priority, issue type and date
+
+The admin dashboard groups reports several ways on every rerun. Instead of
+walking the whole report list for each grouping, ``ReportIndex`` keeps the
+groups (buckets) up to date as reports are added or changed. Buckets map
+report ID to the report record (see communityfix/records.py) itself;
+``update`` also accepts a new record for the same report and swaps it in.
+"""
+import datetime
+
+
+STATUSES = ('Received', 'In Progress', 'Resolved')
+PRIORITIES = ('Emergency', 'High', 'Medium', 'Low')
+ISSUE_TYPES = (
+    "Pothole", "Garbage Accumulation", "Broken Streetlight", "Clogged Drainage", "Graffiti",
+    "Damaged Road", "Water Leak", "Noise Complaint", "Safety Hazard", "Other",
+)
+
+
+class ReportIndex:
+    """Status, priority, issue-type and per-day buckets over report records"""
+
+    def __init__(self, reports=()):
+        self.by_status = {}
+        self.by_priority = {}
+        self.by_issue_type = {}
+        self.by_day = {}
+        self._by_id = {}
+        # Bucket keys each report was filed under, to move it on update
+        self._keys = {}
+        # Buckets that received an out-of-order ID and need re-sorting
+        self._unsorted = set()
+        for report in reports:
+            self.add(report)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, report_id):
+        return report_id in self._keys
+
+    def _bucket_maps(self):
+        return (self.by_status, self.by_priority, self.by_issue_type, self.by_day)
+
+    def _file(self, keys, report):
+        """Put a report into the buckets named by ``keys``"""
+        for buckets, key in zip(self._bucket_maps(), keys):
+            bucket = buckets.setdefault(key, {})
+            if bucket and report.id < next(reversed(bucket)):
+                self._unsorted.add((id(buckets), key))
+            bucket[report.id] = report
+
+    def _unfile(self, keys, report_id):
+        """Take a report out of the buckets named by ``keys``"""
+        for buckets, key in zip(self._bucket_maps(), keys):
+            bucket = buckets[key]
+            del bucket[report_id]
+            if not bucket:
+                del buckets[key]
+
+    def add(self, report):
+        """Index a newly created report"""
+        keys = (report.status, report.priority, report.issue_type, report.day)
+        self._file(keys, report)
+        self._keys[report.id] = keys
+        self._by_id[report.id] = report
+
+    def update(self, report):
+        """Re-index a report after its status, priority or issue type changed"""
+        old_keys = self._keys.get(report.id)
+        if old_keys is None:
+            self.add(report)
+            return
+        # The submission date never changes, so the day is reused
+        keys = (report.status, report.priority, report.issue_type, old_keys[3])
+        if keys != old_keys:
+            self._unfile(old_keys, report.id)
+            self._file(keys, report)
+            self._keys[report.id] = keys
+        else:
+            # Same buckets, but the report may be a new record (copy-on-write)
+            for buckets, key in zip(self._bucket_maps(), keys):
+                buckets[key][report.id] = report
+        self._by_id[report.id] = report
+
+    def remove(self, report_id):
+        """Drop a report from the index"""
+        keys = self._keys.pop(report_id, None)
+        if keys is not None:
+            self._unfile(keys, report_id)
+            del self._by_id[report_id]
+
+    def get(self, report_id):
+        """The report with the given ID, or None"""
+        return self._by_id.get(report_id)
+
+    def filter_ids(self, status=None, priority=None, issue_type=None, start_day=None, end_day=None):
+        """IDs of reports matching every given filter, using the buckets"""
+        ids = set(self._keys)
+        for buckets, key in ((self.by_status, status), (self.by_priority, priority),
+                             (self.by_issue_type, issue_type)):
+            if key is not None:
+                ids &= buckets.get(key, {}).keys()
+        if start_day is not None or end_day is not None:
+            in_range = set()
+            for day, bucket in self.by_day.items():
+                if (start_day is None or day >= start_day) and (end_day is None or day <= end_day):
+                    in_range.update(bucket)
+            ids &= in_range
+        return ids
+
+    def _reports(self, buckets, key):
+        """Reports in one bucket, in ID order"""
+        bucket = buckets.get(key)
+        if not bucket:
+            return []
+        if (id(buckets), key) in self._unsorted:
+            buckets[key] = bucket = dict(sorted(bucket.items()))
+            self._unsorted.discard((id(buckets), key))
+        return list(bucket.values())
+
+    def with_status(self, status):
+        """Reports with the given status, in ID order"""
+        return self._reports(self.by_status, status)
+
+    def count_status(self, status):
+        """Number of reports with the given status"""
+        return len(self.by_status.get(status, ()))
+
+    def issue_types(self):
+        """Issue types that have at least one report"""
+        return list(self.by_issue_type)
+
+    def count_in_month(self, year, month):
+        """Number of reports submitted in the given month"""
+        return sum(len(bucket) for day, bucket in self.by_day.items()
+                   if day.year == year and day.month == month)
+
+    def organize_by_status(self):
+        """Reports grouped by status"""
+        return {status: self.with_status(status) for status in STATUSES}
+
+    def organize_by_priority(self):
+        """Reports grouped by priority, most urgent first"""
+        return {priority: self._reports(self.by_priority, priority) for priority in PRIORITIES}
+
+    def organize_by_issue_type(self):
+        """Reports grouped by issue type"""
+        return {issue_type: self._reports(self.by_issue_type, issue_type) for issue_type in self.by_issue_type}
+
+    def organize_by_date(self, today=None):
+        """Reports grouped into Today, This Week, This Month and Older
+
+        Works over the per-day buckets, so the cost depends on the number of
+        distinct days rather than the number of reports.
+        """
+        today = today or datetime.date.today()
+        week_ago = today - datetime.timedelta(days=7)
+        month_ago = today - datetime.timedelta(days=30)
+
+        organized = {
+            'Today': [],
+            'This Week': [],
+            'This Month': [],
+            'Older': []
+        }
+        for day in sorted(self.by_day):
+            if day == today:
+                category = 'Today'
+            elif day >= week_ago:
+                category = 'This Week'
+            elif day >= month_ago:
+                category = 'This Month'
+            else:
+                category = 'Older'
+            organized[category].extend(self._reports(self.by_day, day))
+        return organized
@@ -0,0 +1,328 @@
+"""One shared, in-process view of all reports
+
+A ``ReportRepository`` holds the reports and the indexes over them (status
+and date buckets, text search, chart aggregates, places and map cells, the
+triage queue, the photo uploads reports wait for, and - from the first
+duplicate check on - near-duplicate signatures) once per process, for every
+browser session, instead of each session keeping its own copy.
+
+Reports are held as compact, read-only ``ReportRecord`` objects (see
+communityfix/records.py) and are copy-on-write: an update replaces the
+record with one built from the new version returned by the store, so
+anything a session is still rendering stays consistent. ``snapshot()``
+returns a read-only tuple of all records, built at most once per change, and
+``version`` goes up with every change so callers can tell cheaply whether
+what they hold is stale.
+
+Index methods are called through ``index``, ``search``, ``aggregates``,
+``places``, ``triage`` and ``uploads``, which take the repository lock for
+the duration of each call; writes take the same lock. Changes made by other processes
+are picked up by ``refresh()``, which compares the store's signature (a
+file stat) and reloads if it moved.
+
+Old resolved reports move out to ``archive`` (see communityfix/archive.py)
+with ``archive_reports``; only the chart aggregates still count them, from
+the archive's rollups.
+"""
+import heapq
+import threading
+from collections import namedtuple
+
+from communityfix.analytics import ReportAggregates
+from communityfix.archive import ReportArchive
+from communityfix.duplicates import DuplicateIndex
+from communityfix.metrics import timed
+from communityfix.photos import PendingUploads
+from communityfix.places import PlaceIndex, load_gazetteer
+from communityfix.records import ReportRecord
+from communityfix.report_index import ReportIndex
+from communityfix.search_index import SearchIndex
+from communityfix.triage import TriageQueue
+
+
+ReportSnapshot = namedtuple('ReportSnapshot', [
+    'version',    # repository version the snapshot was taken at
+    'reports',    # tuple of ReportRecords in ID order
+])
+
+
+class _Locked:
+    """Calls the methods of one of the repository's indexes under its lock"""
+
+    def __init__(self, repository, attribute):
+        self._repository = repository
+        self._attribute = attribute
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            with self._repository._lock:
+                return getattr(getattr(self._repository, self._attribute), name)(*args, **kwargs)
+        return call
+
+    # len() and ``in`` look these up on the class, bypassing __getattr__
+    def __len__(self):
+        return self.__getattr__('__len__')()
+
+    def __contains__(self, item):
+        return self.__getattr__('__contains__')(item)
+
+
+class ReportRepository:
+    """All reports plus their indexes, shared by every session in the process"""
+
+    def __init__(self, store, gazetteer=None, archive=None):
+        self.store = store
+        self.gazetteer = load_gazetteer() if gazetteer is None else gazetteer
+        self.archive = ReportArchive() if archive is None else archive
+        self.version = 0
+        self._lock = threading.RLock()
+        self._duplicates_lock = threading.Lock()
+        self.index = _Locked(self, '_index')
+        self.search = _Locked(self, '_search')
+        self.aggregates = _Locked(self, '_aggregates')
+        self.places = _Locked(self, '_places')
+        self.triage = _Locked(self, '_triage')
+        self.uploads = _Locked(self, '_uploads')
+        self._load()
+
+    @property
+    def name(self):
+        return self.store.name
+
+    def __len__(self):
+        return len(self._reports)
+
+    def _load(self):
+        """(Re)build everything from storage (lock held, or during __init__)"""
+        # Read the signature first: a write during the load then shows up
+        # as a change on the next refresh instead of being missed
+        self._signature = self.store.signature()
+        with timed('storage.load'):
+            stored = self.store.load_reports()
+        with timed('repository.build'):
+            reports = [ReportRecord.from_dict(report) for report in stored]
+            self._reports = {report['id']: report for report in reports}
+            self._index = ReportIndex(reports)
+            self._search = SearchIndex(reports)
+            self._aggregates = ReportAggregates(reports)
+            self._archive_signature = self.archive.signature()
+            self._aggregates.add_archived(self.archive.rollup())
+            self._places = PlaceIndex(self.gazetteer, reports)
+            self._triage = TriageQueue(reports)
+            self._uploads = PendingUploads(reports)
+        # Built on the first duplicate check, so loading stays fast
+        self._duplicates = None
+        self._changed()
+
+    def _indexes(self):
+        """The indexes to keep up to date on writes (lock held)"""
+        indexes = [self._index, self._search, self._aggregates, self._places, self._triage, self._uploads]
+        if self._duplicates is not None:
+            indexes.append(self._duplicates)
+        return indexes
+
+    def _changed(self):
+        self.version += 1
+        self._snapshot = None
+        self._recent = None
+
+    def refresh(self, force=False):
+        """Reload if another process changed storage; returns True if it did"""
+        if not force and self.store.signature() == self._signature:
+            return False
+        with self._lock:
+            # Another session may have reloaded while this one waited
+            if not force and self.store.signature() == self._signature:
+                return False
+            self._load()
+            return True
+
+    def snapshot(self):
+        """Read-only view of all reports at the current version"""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = ReportSnapshot(self.version, tuple(self._reports.values()))
+            return self._snapshot
+
+    def get(self, report_id):
+        """The current version of a report, or None"""
+        return self._reports.get(report_id)
+
+    def recent(self, count=10):
+        """The ``count`` most recently submitted reports, newest first"""
+        with self._lock:
+            if self._recent is None or len(self._recent) < count:
+                self._recent = heapq.nlargest(count, self._reports.values(), key=lambda r: r.reported_ts)
+            return self._recent[:count]
+
+    def prepare_duplicates(self):
+        """Build the near-duplicate index if it is not built yet; returns it
+
+        The index is built from a copy of the records without holding the
+        repository lock, so sessions keep working meanwhile; records that
+        changed during the build (records are replaced, never modified, so
+        an identity check finds them) are brought up to date afterwards.
+        """
+        with self._duplicates_lock:
+            if self._duplicates is not None:
+                return self._duplicates
+            with self._lock:
+                built_from = dict(self._reports)
+            with timed('repository.build_duplicates'):
+                duplicates = DuplicateIndex(built_from.values())
+            with self._lock:
+                for report_id, report in self._reports.items():
+                    if built_from.get(report_id) is not report:
+                        duplicates.update(report)
+                for report_id in built_from.keys() - self._reports.keys():
+                    duplicates.remove(report_id)
+                self._duplicates = duplicates
+            return duplicates
+
+    def find_duplicates(self, issue_type, location, description, photo_hash=None):
+        """Open reports that look like the same problem: [(record, score)], best first
+
+        See communityfix/duplicates.py.
+        """
+        while True:
+            duplicates = self.prepare_duplicates()
+            with self._lock:
+                # Unless a reload dropped the index meanwhile
+                if self._duplicates is duplicates:
+                    with timed('repository.find_duplicates'):
+                        matches = duplicates.find(issue_type, location, description, photo_hash)
+                    return [(self._reports[report_id], score) for report_id, score in matches]
+
+    def _write(self, write):
+        """Run a store write, keeping track of whether storage still matches
+
+        If storage had already changed under the repository (another process
+        wrote), the old signature is kept so the next refresh reloads.
+        """
+        in_sync = self.store.signature() == self._signature
+        result = write()
+        if in_sync:
+            self._signature = self.store.signature()
+        return result
+
+    def insert(self, report):
+        """Store a new report dict (the store assigns its ID) and index it
+
+        Returns the new ID.
+        """
+        with self._lock:
+            with timed('storage.insert'):
+                report_id = self._write(lambda: self.store.insert_report(report))
+            report = ReportRecord.from_dict(report)
+            self._reports[report_id] = report
+            for index in self._indexes():
+                index.add(report)
+            self._changed()
+            return report_id
+
+    def insert_many(self, reports):
+        """Store and index a batch of new report dicts with one store write
+
+        Returns their IDs.
+        """
+        with self._lock:
+            with timed('storage.insert_many'):
+                report_ids = self._write(lambda: self.store.insert_reports(reports))
+            for report in reports:
+                report = ReportRecord.from_dict(report)
+                self._reports[report.id] = report
+                for index in self._indexes():
+                    index.add(report)
+            self._changed()
+            return report_ids
+
+    def modify(self, report_id, change):
+        """Apply ``change`` to a stored report (see ReportStore.modify_report)
+
+        A new record for the updated report replaces the old one rather than
+        changing it. Returns the new record, or None if there is no such
+        report.
+        """
+        with self._lock:
+            with timed('storage.modify'):
+                updated = self._write(lambda: self.store.modify_report(report_id, change))
+            if updated is None:
+                return None
+            updated = ReportRecord.from_dict(updated)
+            self._reports[report_id] = updated
+            for index in self._indexes():
+                index.update(updated)
+            self._changed()
+            return updated
+
+    def modify_many(self, report_ids, change):
+        """Apply ``change`` to several reports with one store write
+
+        Returns the new records of the reports that exist.
+        """
+        with self._lock:
+            with timed('storage.modify_many'):
+                updated = self._write(lambda: self.store.modify_reports(report_ids, change))
+            updated = [ReportRecord.from_dict(report) for report in updated]
+            for report in updated:
+                self._reports[report.id] = report
+                for index in self._indexes():
+                    index.update(report)
+            if updated:
+                self._changed()
+            return updated
+
+    def archive_reports(self, report_ids, eligible=None):
+        """Move reports from the store into the archive; returns how many moved
+
+        The store reads each report again under its write lock, so a change
+        another process saved since the last load is neither lost nor
+        ignored: ``eligible`` is checked against the stored version, which
+        is what gets archived. The reports are written to the archive
+        before they are deleted from the store. If another process added to
+        the archive since the last load, everything is reloaded afterwards
+        rather than updated, so no report is counted twice.
+        """
+        def select(stored):
+            return eligible is None or eligible(ReportRecord.from_dict(stored))
+
+        archived = []
+
+        def move(reports):
+            with timed('archive.add'):
+                archived.append(self.archive.add(reports))
+
+        with self._lock:
+            in_sync = self.archive.signature() == self._archive_signature
+            with timed('storage.delete_many'):
+                deleted = self._write(lambda: self.store.delete_reports(report_ids, select, move))
+            if not deleted:
+                return 0
+            if not in_sync:
+                self._load()
+                return len(deleted)
+            self._archive_signature = self.archive.signature()
+            for report in deleted:
+                if self._reports.pop(report['id'], None) is not None:
+                    for index in self._indexes():
+                        index.remove(report['id'])
+            self._aggregates.add_archived(archived[0])
+            self._changed()
+            return len(deleted)
+
+    def compact(self, min_events=0):
+        """Compact the store (a background job, see communityfix/jobs.py)
+
+        Runs without the repository lock, so sessions keep reading while
+        the snapshot is written.
+        """
+        signature = self._signature
+        in_sync = self.store.signature() == signature
+        with timed('storage.compact'):
+            folded = self.store.compact(min_events)
+        if folded and in_sync:
+            with self._lock:
+                # Only if no write moved the signature in the meantime
+                if self._signature == signature:
+                    self._signature = self.store.signature()
+        return folded
@@ -0,0 +1,113 @@
+"""Inverted text index for the admin search boxes
+
+Each searchable field is split into lowercase word tokens. The index maps
+every token to the IDs of the reports containing it, and keeps a sorted
+vocabulary so a query word matches every token it is a prefix of ("drain"
+finds "drainage"). All query words must match for a report to be found.
+Reports are indexed as report records (see communityfix/records.py).
+"""
+import bisect
+import re
+
+
+SEARCH_FIELDS = ('name', 'location', 'issue_type', 'description')
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lowercase word tokens in a piece of text"""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+class SearchIndex:
+    """Token -> report ID postings for name, location, issue type and description"""
+
+    def __init__(self, reports=()):
+        self._postings = {field: {} for field in SEARCH_FIELDS}
+        # Sorted list of every token in any field, for prefix lookups
+        self._vocabulary = []
+        # How many postings lists each token appears in across fields
+        self._token_refs = {}
+        # Tokens indexed for each report, to diff on update
+        self._report_tokens = {}
+        for report in reports:
+            self.add(report)
+
+    def __len__(self):
+        return len(self._report_tokens)
+
+    def _add_token(self, field, token, report_id):
+        postings = self._postings[field].get(token)
+        if postings is None:
+            postings = self._postings[field][token] = set()
+            if token not in self._token_refs:
+                bisect.insort(self._vocabulary, token)
+                self._token_refs[token] = 0
+            self._token_refs[token] += 1
+        postings.add(report_id)
+
+    def _remove_token(self, field, token, report_id):
+        postings = self._postings[field][token]
+        postings.discard(report_id)
+        if postings:
+            return
+        del self._postings[field][token]
+        self._token_refs[token] -= 1
+        if not self._token_refs[token]:
+            del self._token_refs[token]
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+    def add(self, report):
+        """Index a newly created report"""
+        tokens = {field: frozenset(tokenize(getattr(report, field))) for field in SEARCH_FIELDS}
+        for field, field_tokens in tokens.items():
+            for token in field_tokens:
+                self._add_token(field, token, report.id)
+        self._report_tokens[report.id] = tokens
+
+    def update(self, report):
+        """Re-index the text of a report that was edited"""
+        old_tokens = self._report_tokens.get(report.id)
+        if old_tokens is None:
+            self.add(report)
+            return
+        new_tokens = {field: frozenset(tokenize(getattr(report, field))) for field in SEARCH_FIELDS}
+        for field in SEARCH_FIELDS:
+            for token in old_tokens[field] - new_tokens[field]:
+                self._remove_token(field, token, report.id)
+            for token in new_tokens[field] - old_tokens[field]:
+                self._add_token(field, token, report.id)
+        self._report_tokens[report.id] = new_tokens
+
+    def remove(self, report_id):
+        """Drop a report from the index"""
+        tokens = self._report_tokens.pop(report_id, None)
+        if tokens is None:
+            return
+        for field, field_tokens in tokens.items():
+            for token in field_tokens:
+                self._remove_token(field, token, report_id)
+
+    def _expand(self, prefix):
+        """Indexed tokens that start with ``prefix``"""
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + '\U0010ffff', start)
+        return self._vocabulary[start:end]
+
+    def search(self, query, fields=SEARCH_FIELDS):
+        """IDs of reports where every query word prefixes a token in ``fields``"""
+        words = tokenize(query)
+        if not words:
+            return set()
+
+        result = None
+        for word in words:
+            matches = set()
+            for token in self._expand(word):
+                for field in fields:
+                    matches |= self._postings[field].get(token, set())
+            result = matches if result is None else result & matches
+            if not result:
+                break
+        return result
@@ -0,0 +1,487 @@
+"""Report operations shared by the Streamlit app, scripts and the API
+
+``ReportService`` is the UI-free entry point to the data layer: it owns the
+storage backend, the photo store and the shared report repository, and
+implements what the app's pages do - submitting reports, admin updates and
+comments, the report groupings, search and exports. It raises exceptions
+instead of showing messages, so any front end can present errors its own
+way.
+
+Importing this module loads neither Streamlit nor Plotly (nor Pillow, until
+a photo is stored), so batch jobs and workers start quickly.
+"""
+import datetime
+import os
+import time
+
+from communityfix import config
+from communityfix import duplicates
+from communityfix.archive import month_of
+from communityfix.export import export_reports
+from communityfix.photos import PhotoStore, guess_extension, pending_uploads, save_uploaded_photo
+from communityfix.records import DATE_FORMAT, parse_timestamp
+from communityfix.report_index import ISSUE_TYPES, PRIORITIES, STATUSES
+from communityfix.repository import ReportRepository
+from communityfix.storage import create_store
+
+
+class ValidationError(ValueError):
+    """A submitted report is incomplete; ``errors`` lists what to fix"""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class ReportNotFound(LookupError):
+    """No report with the given ID"""
+
+
+def now_text():
+    """The current time in the stored "%Y-%m-%d %H:%M" format"""
+    return datetime.datetime.now().strftime(DATE_FORMAT)
+
+
+def validate_report(name, contact, issue_type, location, description):
+    """Problems with a report submission, as messages for the citizen"""
+    errors = []
+    if not name or len(name.strip()) < 2:
+        errors.append("Please enter a valid name (at least 2 characters)")
+    if not contact or len(contact.strip()) < 10:
+        errors.append("Please enter a valid contact number (at least 10 digits)")
+    if issue_type not in ISSUE_TYPES:
+        errors.append("Please choose one of the listed issue types")
+    if not location or len(location.strip()) < 5:
+        errors.append("Please provide a more specific location")
+    if not description or len(description.strip()) < 10:
+        errors.append("Please provide a more detailed description (at least 10 characters)")
+    return errors
+
+
+def new_comment(comment_text, author="Admin"):
+    """Build a comment entry stamped with the current time"""
+    return {
+        'author': author,
+        'text': comment_text,
+        'timestamp': now_text()
+    }
+
+
+class ReportService:
+    """Everything the app does with reports, without any UI"""
+
+    def __init__(self, store=None, photo_store=None, repository=None):
+        self.store = store or create_store()
+        self.photo_store = photo_store or PhotoStore()
+        # Photos as uploaded, until process_photos resizes them
+        self.upload_store = PhotoStore(self.photo_store.root / 'uploads')
+        self.repository = ReportRepository(self.store) if repository is None else repository
+
+    # Reading
+
+    def refresh(self, force=False):
+        """Pick up changes other processes made to storage"""
+        return self.repository.refresh(force)
+
+    def reports(self):
+        """Read-only tuple of all reports (ReportRecords), in ID order"""
+        return self.repository.snapshot().reports
+
+    def get(self, report_id):
+        """The current version of a report, or None"""
+        return self.repository.get(report_id)
+
+    @property
+    def index(self):
+        """Status, priority, issue-type and date buckets (see ReportIndex)"""
+        return self.repository.index
+
+    @property
+    def aggregates(self):
+        """Chart and metric counts (see ReportAggregates)"""
+        return self.repository.aggregates
+
+    @property
+    def places(self):
+        """Reports by place and map cell (see PlaceIndex)"""
+        return self.repository.places
+
+    @property
+    def triage(self):
+        """Open reports by priority and due time (see TriageQueue)"""
+        return self.repository.triage
+
+    @property
+    def archive(self):
+        """Old resolved reports, moved out of the live store (see ReportArchive)"""
+        return self.repository.archive
+
+    def organize_by_status(self):
+        """Reports grouped by status"""
+        return self.index.organize_by_status()
+
+    def organize_by_priority(self):
+        """Reports grouped by priority, most urgent first"""
+        return self.index.organize_by_priority()
+
+    def organize_by_date(self, today=None):
+        """Reports grouped into Today, This Week, This Month and Older"""
+        return self.index.organize_by_date(today or datetime.date.today())
+
+    def organize_by_issue_type(self):
+        """Reports grouped by issue type"""
+        return self.index.organize_by_issue_type()
+
+    def organize_by_location(self):
+        """Reports grouped by place, busiest first"""
+        return self.places.organize_by_location()
+
+    def next_reports(self, count=10, priority=None, offset=0):
+        """The open reports to work on next: most urgent priority, then earliest due"""
+        return self.triage.next(count, priority, offset)
+
+    def recent(self, count=10):
+        """The most recently submitted reports, newest first"""
+        return self.repository.recent(count)
+
+    def find_reports(self, status=None, priority=None, issue_type=None, start_day=None, end_day=None,
+                     name="", location="", description="", text=""):
+        """Reports matching the admin search filters, in ID order
+
+        Exact filters come from the report index buckets; ``name``,
+        ``location`` and ``description`` match word prefixes in that field,
+        ``text`` in any searchable field.
+        """
+        index = self.repository.index
+        search = self.repository.search
+        matching_ids = index.filter_ids(status=status, priority=priority, issue_type=issue_type,
+                                        start_day=start_day, end_day=end_day)
+        for query, fields in ((name, ('name',)), (location, ('location',)),
+                              (description, ('description',))):
+            if query:
+                matching_ids &= search.search(query, fields=fields)
+        if text:
+            matching_ids &= search.search(text)
+        return [index.get(report_id) for report_id in sorted(matching_ids)]
+
+    def match_place(self, location):
+        """Name of the gazetteer place a location names, or None"""
+        place = self.repository.gazetteer.match(location)
+        return place.name if place else None
+
+    def photo_hash(self, photo_ref):
+        """Perceptual hash (hex) of a stored photo, or None"""
+        if not photo_ref:
+            return None
+        return duplicates.photo_hash(str(self.photo_store.path(photo_ref)))
+
+    def find_duplicates(self, issue_type, location, description, photo_refs=(None, None), pending_photo=None):
+        """Open reports that look like the same problem: [(report, score)], best first
+
+        Compares location and description, and the photo if there is one
+        (see communityfix/duplicates.py): its thumbnail, or the upload
+        itself while it waits to be processed.
+        """
+        if photo_refs[1]:
+            photo_hash = self.photo_hash(photo_refs[1])
+        else:
+            photo_hash = pending_photo and duplicates.photo_hash(str(self.upload_store.path(pending_photo)))
+        return self.repository.find_duplicates(issue_type, location, description, photo_hash or None)
+
+    def export(self, export_format):
+        """All reports in one of export.EXPORT_FORMATS, as a rewound file"""
+        return export_reports(self.reports(), export_format, self.photo_store)
+
+    def find_archived_reports(self, **criteria):
+        """Archived reports matching ``find_reports`` filters, in ID order"""
+        return self.archive.search(**criteria)
+
+    def export_archive(self, export_format, months=None):
+        """Archived reports of all (or the given) months, exported like ``export``"""
+        return export_reports(self.archive.reports(months), export_format, self.photo_store)
+
+    # Writing
+
+    def store_photo(self, data):
+        """Resize and store an uploaded photo; returns (photo_ref, thumb_ref)"""
+        return save_uploaded_photo(self.photo_store, data)
+
+    def store_upload(self, data):
+        """Store an uploaded photo as it is, to be processed later; returns its reference
+
+        Much faster than ``store_photo``: nothing is decoded. Pass the
+        reference to ``submit_report`` or ``link_report`` as
+        ``pending_photo`` and run ``process_photos`` afterwards (see
+        communityfix/jobs.py). Raises ValueError if the data is not a PNG,
+        JPEG, GIF or WebP image. Uploads no report uses are removed by
+        ``sweep_uploads`` once they are old.
+        """
+        if guess_extension(data) == 'bin':
+            raise ValueError("The upload is not a PNG, JPEG, GIF or WebP image")
+        ref = self.upload_store.put(data)
+        # Uploaded again: it counts as new for sweep_uploads
+        os.utime(self.upload_store.path(ref))
+        return ref
+
+    def pending_photo_reports(self):
+        """IDs of reports with photos that still need processing"""
+        self.refresh()
+        return self.repository.uploads.report_ids()
+
+    def process_photos(self, report_id):
+        """Resize the pending photos of a report and its linked reports
+
+        Stores the display image and thumbnail as ``store_photo`` does, sets
+        the report's ``photo_hash`` and removes the uploads once no other
+        report waits for them. The slow part runs without holding the
+        repository lock. A photo that cannot be decoded is dropped. Returns
+        the number of photos processed and the number dropped.
+        """
+        report = self.get(report_id)
+        if report is None:
+            return 0, 0
+        processed = {}
+        failed = []
+        for ref in set(pending_uploads(report)):
+            try:
+                processed[ref] = self.store_photo(self.upload_store.read(ref))
+            except Exception:
+                # Not an image after all, or the upload is gone: the report
+                # is kept, without the photo
+                failed.append(ref)
+        hashes = {ref: self.photo_hash(thumb_ref) for ref, (_, thumb_ref) in processed.items()}
+
+        def resolve(entry):
+            # Only the photos handled here: a submission linked meanwhile
+            # gets its own job
+            ref = entry.get('pending_photo')
+            if ref in processed:
+                entry['photo_ref'], entry['thumb_ref'] = processed[ref]
+                del entry['pending_photo']
+            elif ref in failed:
+                del entry['pending_photo']
+            return ref
+
+        def change(stored):
+            ref = resolve(stored)
+            if hashes.get(ref):
+                stored['photo_hash'] = hashes[ref]
+            for linked in stored.get('linked_reports') or ():
+                resolve(linked)
+
+        self._modify(report_id, change)
+        self._remove_uploads(processed.keys() | set(failed))
+        return len(processed), len(failed)
+
+    def _remove_uploads(self, refs):
+        """Delete uploads no report waits for"""
+        uploads = self.repository.uploads
+        for ref in refs:
+            if ref not in uploads:
+                self.upload_store.path(ref).unlink(missing_ok=True)
+
+    def discard_upload(self, ref):
+        """Delete an upload from ``store_upload`` that was not submitted after all
+
+        Kept if a report waits for the same photo.
+        """
+        self.refresh()
+        self._remove_uploads([ref])
+
+    def sweep_uploads(self, max_age=None, now=None):
+        """Delete uploads older than ``max_age`` seconds that no report waits for
+
+        Catches uploads left behind when a session ended between the upload
+        and the submit, or a process stopped half way through writing one.
+        Defaults to ``config.UPLOAD_MAX_AGE_SECONDS``. Returns the number of
+        files deleted.
+        """
+        max_age = config.UPLOAD_MAX_AGE_SECONDS if max_age is None else max_age
+        cutoff = (time.time() if now is None else now) - max_age
+        self.refresh()
+        uploads = self.repository.uploads
+        removed = 0
+        for path in self.upload_store.root.glob('*/*'):
+            try:
+                if path.stat().st_mtime > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            if path.suffix == '.tmp' or path.name not in uploads:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def submit_report(self, name, contact, issue_type, location, description, photo_refs=(None, None),
+                      priority='Medium', pending_photo=None):
+        """Validate and store a new report; returns its ID
+
+        ``photo_refs`` comes from ``store_photo``, or ``pending_photo`` from
+        ``store_upload`` for a photo processed later; ``priority`` is the
+        reporter's estimate of the urgency. Raises ValidationError if a
+        field is missing or too short.
+        """
+        errors = validate_report(name, contact, issue_type, location, description)
+        if priority not in PRIORITIES:
+            errors.append("Please choose one of the listed priority levels")
+        if errors:
+            raise ValidationError(errors)
+        now = now_text()
+        photo_ref, thumb_ref = photo_refs
+        report = {
+            'name': name,
+            'contact': contact,
+            'issue_type': issue_type,
+            'location': location,
+            'description': description,
+            'status': 'Received',
+            'assigned_to': 'Not assigned',
+            'date_reported': now,
+            'comments': [],
+            'photo_ref': photo_ref,
+            'thumb_ref': thumb_ref,
+            'priority': priority,
+            'status_history': [{'status': 'Received', 'timestamp': now, 'by': name}],
+            'resolved_at': None
+        }
+        place = self.match_place(location)
+        if place:
+            # For the location views (see communityfix/places.py)
+            report['place'] = place
+        if thumb_ref:
+            # For duplicate detection (see communityfix/duplicates.py)
+            report['photo_hash'] = self.photo_hash(thumb_ref)
+        if pending_photo:
+            report['pending_photo'] = pending_photo
+        return self.repository.insert(report)
+
+    def link_report(self, report_id, name, contact, issue_type, location, description, photo_refs=(None, None),
+                    priority='Medium', pending_photo=None):
+        """Add a submission to an existing report instead of storing a new one
+
+        For duplicates found by ``find_duplicates``: the reporter, their
+        wording and photo are kept in the report's ``linked_reports``. If
+        the submission is more urgent than the report, the report's priority
+        is raised to match. Validates like ``submit_report``; returns the
+        updated report.
+        """
+        errors = validate_report(name, contact, issue_type, location, description)
+        if priority not in PRIORITIES:
+            errors.append("Please choose one of the listed priority levels")
+        if errors:
+            raise ValidationError(errors)
+        photo_ref, thumb_ref = photo_refs
+        linked = {
+            'name': name,
+            'contact': contact,
+            'location': location,
+            'description': description,
+            'photo_ref': photo_ref,
+            'thumb_ref': thumb_ref,
+            'priority': priority,
+            'timestamp': now_text(),
+        }
+        if pending_photo:
+            linked['pending_photo'] = pending_photo
+
+        def change(stored):
+            stored.setdefault('linked_reports', []).append(linked)
+            if PRIORITIES.index(priority) < PRIORITIES.index(stored.get('priority', 'Medium')):
+                stored['priority'] = priority
+
+        return self._modify(report_id, change)
+
+    def add_reports(self, reports):
+        """Store a batch of complete report dicts with one write; returns their IDs
+
+        Used by bulk imports (see communityfix/bulk_import.py), which build
+        and validate the reports themselves. Reports without a ``place`` get
+        the place their location names, as in ``submit_report``.
+        """
+        for report in reports:
+            if 'place' not in report:
+                place = self.match_place(report['location'])
+                if place:
+                    report['place'] = place
+        return self.repository.insert_many(reports)
+
+    def _modify(self, report_id, change):
+        updated = self.repository.modify(report_id, change)
+        if updated is None:
+            raise ReportNotFound(f"Report #{report_id} no longer exists")
+        return updated
+
+    def add_comment(self, report_id, comment_text, author="Admin"):
+        """Add a comment to a report; returns the updated report"""
+        comment = new_comment(comment_text, author)
+        return self._modify(report_id, lambda stored: stored['comments'].append(comment))
+
+    @staticmethod
+    def _update_change(status, priority, assigned_to, comment, author):
+        """The change function for an admin update; None leaves a field as it is"""
+        if status is not None and status not in STATUSES:
+            raise ValueError(f"Unknown status: {status!r}")
+        if priority is not None and priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority!r}")
+        now = now_text()
+
+        def change(stored):
+            if status is not None and status != stored['status']:
+                stored.setdefault('status_history', []).append({'status': status, 'timestamp': now, 'by': author})
+                stored['resolved_at'] = now if status == 'Resolved' else None
+                stored['status'] = status
+            if priority is not None:
+                stored['priority'] = priority
+            if assigned_to is not None:
+                stored['assigned_to'] = assigned_to
+            if comment:
+                stored['comments'].append(new_comment(comment, author))
+
+        return change
+
+    def update_report(self, report_id, status, priority, assigned_to, comment=None, author="Admin"):
+        """Apply an admin update (and optional comment); returns the updated report
+
+        Status changes are appended to the report's status history, and the
+        time a report becomes Resolved is kept in ``resolved_at``.
+        """
+        return self._modify(report_id, self._update_change(status, priority, assigned_to, comment, author))
+
+    def update_reports(self, report_ids, status=None, priority=None, assigned_to=None, comment=None, author="Admin"):
+        """Apply one admin update to many reports in a single write
+
+        Fields left as None keep each report's current value. Either every
+        report is updated or, if storing fails, none is. Returns the updated
+        reports.
+        """
+        change = self._update_change(status, priority, assigned_to, comment, author)
+        return self.repository.modify_many(list(report_ids), change)
+
+    def archive_old_reports(self, after_days=None, now_ts=None):
+        """Move reports resolved at least ``after_days`` days ago to the archive
+
+        Defaults to ``config.ARCHIVE_AFTER_DAYS``; 0 (or less) archives
+        nothing. Reports resolved before resolution times were recorded
+        count from their submission. Works one month of reports at a time,
+        so sessions are only held up briefly. Returns the number of reports
+        archived.
+        """
+        after_days = config.ARCHIVE_AFTER_DAYS if after_days is None else after_days
+        if after_days <= 0:
+            return 0
+        cutoff = (now_ts or parse_timestamp(now_text())) - after_days * 86400
+
+        def eligible(report):
+            return report.status == 'Resolved' and (report.resolved_ts or report.reported_ts) <= cutoff
+
+        self.refresh()
+        by_month = {}
+        for report in self.reports():
+            if eligible(report):
+                by_month.setdefault(month_of(report), []).append(report.id)
+        return sum(self.repository.archive_reports(report_ids, eligible)
+                   for _, report_ids in sorted(by_month.items()))
+
+    def backup(self, backup_dir=config.BACKUP_DIR):
+        """Copy the stored reports into the backup directory; returns the path"""
+        return self.store.backup(backup_dir)
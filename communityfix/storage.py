@@ -0,0 +1,817 @@
+"""Storage backends for community reports
+
+Two backends are available:
+
+- ``JsonReportStore`` keeps a JSON snapshot plus an append-only log of
+  changes, folded into the snapshot now and then. Fine for small installs.
+- ``SqliteReportStore`` keeps one row per report in an SQLite database (WAL
+  mode), so adding a report or changing its status only touches that row.
+
+Both are safe with several sessions, threads and processes writing at once:
+report IDs are handed out by the store, and every change is a
+read-modify-write of the stored report done under the store's write lock
+(a lock file for JSON, a write transaction for SQLite). Readers never take
+the lock - the JSON snapshot is replaced atomically and SQLite readers see
+the last committed state.
+
+Use ``create_store()`` to get the backend selected in ``config.STORAGE_BACKEND``.
+Existing JSON data can be moved into SQLite once with::
+
+    python -m communityfix.storage migrate
+"""
+import argparse
+import copy
+import datetime
+import errno
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from communityfix import config
+from communityfix.metrics import count
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive lock held through a lock file, across threads and processes"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        # flock() locks are per process, so threads also need a local lock
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth == 1:
+            try:
+                self._file = open(self.path, 'a+b')
+                if fcntl:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+                else:
+                    self._lock_windows()
+            except BaseException:
+                self._release()
+                raise
+        return self
+
+    def _lock_windows(self):
+        """msvcrt gives up after ~10 seconds, so keep retrying while the lock is busy"""
+        while True:
+            try:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError as e:
+                # Any other error (bad handle, no permission) will not go away
+                if e.errno not in (errno.EDEADLK, errno.EACCES):
+                    raise
+                time.sleep(0.05)
+
+    def _release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            if not fcntl:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()  # Also releases the flock
+            self._file = None
+        self._thread_lock.release()
+
+    def __exit__(self, *exc_info):
+        self._release()
+
+
+def atomic_write_json(path, data, indent=None):
+    """Write JSON to a temp file and rename it over ``path``
+
+    Readers see either the old file or the new one, never a partial write.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent or '.', prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            count('storage.bytes_written', f.tell())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+class ReportStore:
+    """Interface shared by all storage backends"""
+
+    name = "base"
+
+    def load_reports(self):
+        """Return all stored reports as a list of dicts"""
+        raise NotImplementedError
+
+    def signature(self):
+        """Cheap fingerprint of the stored data that changes on every write
+
+        Used to skip re-reading storage when nothing has changed.
+        """
+        raise NotImplementedError
+
+    def insert_report(self, report):
+        """Store a new report, assigning its ID; returns the ID"""
+        raise NotImplementedError
+
+    def insert_reports(self, reports):
+        """Store new reports in one write, assigning a block of IDs; returns the IDs
+
+        Backends override this to write the whole batch at once; by default
+        each report is inserted on its own.
+        """
+        return [self.insert_report(report) for report in reports]
+
+    def modify_report(self, report_id, change):
+        """Apply ``change(report)`` to the stored report and save it
+
+        ``change`` edits the report dict in place and runs while the store's
+        write lock is held, so it always sees the latest stored version and
+        concurrent changes to the same report are never lost. Returns a copy
+        of the updated report, or None if there is no such report.
+        """
+        raise NotImplementedError
+
+    def modify_reports(self, report_ids, change):
+        """Apply ``change`` to several stored reports in one write
+
+        All the changes are stored together (or, if one fails, none are).
+        Returns copies of the updated reports; IDs with no report are
+        skipped. By default each report is modified on its own.
+        """
+        updated = (self.modify_report(report_id, change) for report_id in report_ids)
+        return [report for report in updated if report is not None]
+
+    def delete_reports(self, report_ids, select=None, before_delete=None):
+        """Delete reports in one write (used when they move to the archive)
+
+        Under the write lock, the stored version of each report is read and
+        kept only if ``select(report)`` is true (all are, without it);
+        ``before_delete(reports)`` is called with those before they are
+        deleted, and nothing is deleted if it raises. Returns the deleted
+        reports. IDs are never handed out again.
+        """
+        raise NotImplementedError
+
+    def save_all(self, reports):
+        """Write every report in ``reports`` (used by migrations)"""
+        raise NotImplementedError
+
+    def backup(self, backup_dir=config.BACKUP_DIR):
+        """Copy the stored data to a timestamped file; returns its path"""
+        raise NotImplementedError
+
+    def compact(self, min_events=0):
+        """Fold logged changes into the main data file; returns how many
+
+        Nothing to do by default (SQLite checkpoints its own WAL).
+        """
+        return 0
+
+    @staticmethod
+    def _backup_path(backup_dir, source):
+        backup_dir = Path(backup_dir)
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        return backup_dir / f"{source.stem}_{stamp}{source.suffix}"
+
+
+def report_change(before, after):
+    """Describe how a report changed, as the fields of an ``update`` event
+
+    Lists that only grew (comments, status history) are recorded as the
+    appended items, everything else as the new value.
+    """
+    changes = {}
+    for key, value in after.items():
+        old = before.get(key)
+        if key in before and old == value:
+            continue
+        if isinstance(old, list) and isinstance(value, list) and value[:len(old)] == old:
+            changes.setdefault('append', {})[key] = value[len(old):]
+        else:
+            changes.setdefault('set', {})[key] = value
+    removed = [key for key in before if key not in after]
+    if removed:
+        changes['unset'] = removed
+    return changes
+
+
+def apply_event(reports, by_id, event):
+    """Replay one event-log entry onto a report list and its ID lookup"""
+    if event['op'] == 'insert':
+        report = event['report']
+        reports.append(report)
+        by_id[report['id']] = report
+    elif event['op'] == 'update':
+        report = by_id[event['id']]
+        report.update(event.get('set', {}))
+        for key, items in event.get('append', {}).items():
+            report.setdefault(key, []).extend(items)
+        for key in event.get('unset', []):
+            report.pop(key, None)
+    elif event['op'] == 'delete':
+        deleted = set(event['ids'])
+        reports[:] = [report for report in reports if report['id'] not in deleted]
+        for report_id in deleted:
+            by_id.pop(report_id, None)
+    else:
+        raise ValueError(f"Unknown event type: {event['op']!r}")
+
+
+def _read_events(path, offset=0):
+    """Events in a JSON-lines log from ``offset``, and the offset after them
+
+    A last line without its newline is a write that is still in progress (or
+    was cut off by a crash); it is left out and the returned offset stops
+    before it.
+    """
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    count('storage.bytes_read', len(data))
+    complete = data[:data.rfind(b'\n') + 1]
+    events = [json.loads(line) for line in complete.splitlines() if line.strip()]
+    return events, offset + len(complete)
+
+
+class JsonReportStore(ReportStore):
+    """Reports in a JSON snapshot file plus an append-only event log
+
+    Each change is appended to ``<name>.events.jsonl`` as one small JSON line
+    (a new report, the fields an update changed, or the IDs of reports
+    moved to the archive), so a write costs the same however many reports
+    there are. Loading reads the snapshot and replays the events after it.
+    ``compact()`` - run periodically as a background job - folds the log into a new snapshot and moves the
+    folded log into ``EVENT_ARCHIVE_DIR``, where it stays as an audit trail.
+
+    Writers hold ``<file>.lock`` and catch up on events appended by other
+    processes before making their own change. The snapshot records the
+    highest ID ever used (``last_id``) and the last event folded into it
+    (``log_seq``).
+    """
+
+    name = "json"
+
+    def __init__(self, path=config.JSON_DATA_FILE, archive_dir=config.EVENT_ARCHIVE_DIR):
+        self.path = Path(path)
+        self.log_path = self.path.with_name(self.path.stem + '.events.jsonl')
+        self.archive_dir = Path(archive_dir)
+        self._lock = FileLock(self.path.with_name(self.path.name + '.lock'))
+        # Writer state: snapshot plus replayed events, and how far into
+        # the snapshot/log it has read
+        self._data = None
+        self._by_id = {}
+        self._snapshot_signature = None
+        self._log_offset = 0
+        self._seq = 0
+        self._pending = 0  # Events not yet folded into the snapshot
+
+    def _read_snapshot(self):
+        if not self.path.exists():
+            return {'reports': []}
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        count('storage.bytes_read', len(raw))
+        data = json.loads(raw)
+        data.setdefault('reports', [])
+        return data
+
+    def load_reports(self):
+        """Load the snapshot and replay the event log onto it"""
+        # Read the log before the snapshot: if a compaction runs in between,
+        # the newer snapshot already contains every event read here
+        events, _ = _read_events(self.log_path)
+        data = self._read_snapshot()
+        reports = data['reports']
+        by_id = {r['id']: r for r in reports}
+        for event in events:
+            if event['seq'] > data.get('log_seq', 0):
+                apply_event(reports, by_id, event)
+        return reports
+
+    def signature(self):
+        """Modification time and size of the snapshot and the event log"""
+        return _file_signature(self.path) + _file_signature(self.log_path)
+
+    def _refresh(self):
+        """Catch up with the files on disk (call with the lock held)"""
+        snapshot_signature = _file_signature(self.path)
+        if self._data is None or snapshot_signature != self._snapshot_signature:
+            self._data = self._read_snapshot()
+            self._by_id = {r['id']: r for r in self._data['reports']}
+            self._snapshot_signature = snapshot_signature
+            self._log_offset = 0
+            self._seq = self._data.get('log_seq', 0)
+            self._pending = 0
+        events, offset = _read_events(self.log_path, self._log_offset)
+        for event in events:
+            if event['seq'] > self._seq:
+                apply_event(self._data['reports'], self._by_id, event)
+                if event['op'] == 'delete':
+                    self._keep_ids(event['ids'])
+                self._seq = event['seq']
+                self._pending += 1
+        if self.log_path.exists() and self.log_path.stat().st_size > offset:
+            # A writer crashed mid-line; drop the partial event
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(offset)
+        self._log_offset = offset
+
+    def _append(self, *events):
+        """Write events to the log and flush them to disk in one go (lock held)"""
+        now = datetime.datetime.now().isoformat()
+        lines = []
+        for event in events:
+            self._seq += 1
+            lines.append(json.dumps({'seq': self._seq, 'time': now, **event}, separators=(',', ':')) + '\n')
+        data = ''.join(lines).encode('utf-8')
+        with open(self.log_path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        count('storage.bytes_written', len(data))
+        self._log_offset += len(data)
+        self._pending += len(events)
+
+    def _logged(self, write):
+        """Run ``write`` under the lock; on failure, re-read state next time"""
+        with self._lock:
+            self._refresh()
+            try:
+                return write()
+            except BaseException:
+                self._data = None
+                raise
+
+    def insert_report(self, report):
+        """Append an insert event for a report with the next free ID"""
+        def write():
+            last_id = max(self._data.get('last_id', 0), max(self._by_id, default=0))
+            report['id'] = last_id + 1
+            stored = copy.deepcopy(report)
+            self._append({'op': 'insert', 'report': stored})
+            self._data['reports'].append(stored)
+            self._by_id[stored['id']] = stored
+            return report['id']
+        return self._logged(write)
+
+    def insert_reports(self, reports):
+        """Append insert events for a batch of reports, flushed to disk once"""
+        def write():
+            last_id = max(self._data.get('last_id', 0), max(self._by_id, default=0))
+            stored_reports = []
+            for report_id, report in enumerate(reports, start=last_id + 1):
+                report['id'] = report_id
+                stored_reports.append(copy.deepcopy(report))
+            if stored_reports:
+                self._append(*({'op': 'insert', 'report': stored} for stored in stored_reports))
+            for stored in stored_reports:
+                self._data['reports'].append(stored)
+                self._by_id[stored['id']] = stored
+            return [report['id'] for report in reports]
+        return self._logged(write)
+
+    def modify_report(self, report_id, change):
+        """Append an update event with the fields ``change`` touched"""
+        def write():
+            stored = self._by_id.get(report_id)
+            if stored is None:
+                return None
+            before = copy.deepcopy(stored)
+            change(stored)
+            changes = report_change(before, stored)
+            if changes:
+                self._append({'op': 'update', 'id': report_id, **changes})
+            return copy.deepcopy(stored)
+        return self._logged(write)
+
+    def modify_reports(self, report_ids, change):
+        """Append the update events for a batch of reports, flushed to disk once"""
+        def write():
+            events = []
+            updated = []
+            for report_id in report_ids:
+                stored = self._by_id.get(report_id)
+                if stored is None:
+                    continue
+                before = copy.deepcopy(stored)
+                change(stored)
+                changes = report_change(before, stored)
+                if changes:
+                    events.append({'op': 'update', 'id': report_id, **changes})
+                updated.append(copy.deepcopy(stored))
+            if events:
+                self._append(*events)
+            return updated
+        return self._logged(write)
+
+    def _keep_ids(self, report_ids):
+        """Make sure deleted IDs are not handed out again (lock held)"""
+        self._data['last_id'] = max(self._data.get('last_id', 0), max(report_ids, default=0))
+
+    def delete_reports(self, report_ids, select=None, before_delete=None):
+        """Append one delete event for the (selected) reports that exist"""
+        def write():
+            deleted = [copy.deepcopy(self._by_id[report_id]) for report_id in report_ids
+                       if report_id in self._by_id and (select is None or select(self._by_id[report_id]))]
+            if deleted:
+                if before_delete is not None:
+                    before_delete(deleted)
+                event = {'op': 'delete', 'ids': [report['id'] for report in deleted]}
+                self._keep_ids(event['ids'])
+                self._append(event)
+                apply_event(self._data['reports'], self._by_id, event)
+            return deleted
+        return self._logged(write)
+
+    def _write_snapshot(self):
+        """Fold everything so far into a new snapshot and archive the log (lock held)"""
+        self._data['last_updated'] = datetime.datetime.now().isoformat()
+        self._data['last_id'] = max(self._data.get('last_id', 0), max(self._by_id, default=0))
+        self._data['log_seq'] = self._seq
+        atomic_write_json(self.path, self._data, indent=2)
+        # The new snapshot covers the whole log, so a crash before the log is
+        # moved away only means its events are skipped on the next load
+        if self.log_path.exists():
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            os.replace(self.log_path, self.archive_dir / f"{self.log_path.stem}.{self._seq:08d}.jsonl")
+        self._snapshot_signature = _file_signature(self.path)
+        self._log_offset = 0
+        self._pending = 0
+
+    def compact(self, min_events=0):
+        """Fold the event log into the snapshot once it has ``min_events`` events
+
+        Returns the number of events folded.
+        """
+        with self._lock:
+            self._refresh()
+            folded = self._pending
+            if folded == 0 or folded < min_events:
+                return 0
+            self._write_snapshot()
+            return folded
+
+    def save_all(self, reports):
+        """Replace the stored reports with ``reports`` (written as a new snapshot)"""
+        def write():
+            self._data['reports'] = copy.deepcopy(reports)
+            self._by_id = {r['id']: r for r in self._data['reports']}
+            self._write_snapshot()
+        self._logged(write)
+
+    def backup(self, backup_dir=config.BACKUP_DIR):
+        """Write the current reports (snapshot plus log) as one JSON file"""
+        target = self._backup_path(backup_dir, self.path)
+        with self._lock:
+            self._refresh()
+            atomic_write_json(target, {**self._data, 'log_seq': self._seq}, indent=2)
+        return target
+
+
+class SqliteReportStore(ReportStore):
+    """One row per report in an SQLite database running in WAL mode
+
+    The columns used for filtering are stored next to the full report, which
+    is kept as JSON in ``body`` so new report fields need no schema change.
+    IDs come from AUTOINCREMENT, so they are never reused.
+    """
+
+    name = "sqlite"
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            issue_type TEXT NOT NULL,
+            date_reported TEXT NOT NULL,
+            resolved_at TEXT,
+            body TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_reports_status ON reports(status);
+        CREATE INDEX IF NOT EXISTS idx_reports_priority ON reports(priority);
+        CREATE INDEX IF NOT EXISTS idx_reports_issue_type ON reports(issue_type);
+        CREATE INDEX IF NOT EXISTS idx_reports_date ON reports(date_reported);
+        CREATE INDEX IF NOT EXISTS idx_reports_resolved_at ON reports(resolved_at);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path=config.SQLITE_DATA_FILE):
+        self.path = Path(path)
+        # Streamlit runs every session in its own thread, and sqlite3
+        # connections must stay on the thread that created them
+        self._local = threading.local()
+        with self._transaction() as conn:
+            self._upgrade_schema(conn)
+        self._connect().executescript(self._SCHEMA)
+
+    @staticmethod
+    def _upgrade_schema(conn):
+        """Add columns introduced after a database was first created"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(reports)")}
+        if columns and 'resolved_at' not in columns:
+            conn.execute("ALTER TABLE reports ADD COLUMN resolved_at TEXT")
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode: transactions are started explicitly below
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        """Context manager for a write transaction (BEGIN IMMEDIATE)"""
+        return _SqliteTransaction(self._connect())
+
+    @staticmethod
+    def _row(report):
+        """Column values for a report, in schema order"""
+        return (
+            report['id'],
+            report['status'],
+            report.get('priority', 'Medium'),
+            report['issue_type'],
+            report['date_reported'],
+            report.get('resolved_at'),
+            json.dumps(report),
+        )
+
+    def load_reports(self):
+        """Load all reports ordered by ID"""
+        rows = self._connect().execute("SELECT body FROM reports ORDER BY id")
+        reports = []
+        size = 0
+        for (body,) in rows:
+            size += len(body)
+            reports.append(json.loads(body))
+        count('storage.bytes_read', size)
+        return reports
+
+    def signature(self):
+        """Modification time and size of the database and its WAL file"""
+        wal_path = self.path.with_name(self.path.name + "-wal")
+        return _file_signature(self.path) + _file_signature(wal_path)
+
+    def count(self):
+        """Number of stored reports"""
+        return self._connect().execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    @staticmethod
+    def _last_id(conn):
+        """Highest report ID ever used, including deleted (archived) reports"""
+        return conn.execute(
+            "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'reports'), 0), "
+            "COALESCE((SELECT MAX(id) FROM reports), 0))"
+        ).fetchone()[0]
+
+    def last_id(self):
+        """Highest report ID ever used; 0 if the database never held a report"""
+        return self._last_id(self._connect())
+
+    def _write_row(self, conn, report):
+        report_id, *values = self._row(report)
+        count('storage.bytes_written', len(values[-1]))
+        conn.execute(
+            "UPDATE reports SET status = ?, priority = ?, issue_type = ?, date_reported = ?, resolved_at = ?, body = ? "
+            "WHERE id = ?",
+            (*values, report_id)
+        )
+
+    def save_all(self, reports):
+        """Upsert every report in one transaction"""
+        rows = [self._row(r) for r in reports]
+        count('storage.bytes_written', sum(len(row[-1]) for row in rows))
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO reports (id, status, priority, issue_type, date_reported, resolved_at, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def insert_report(self, report):
+        """Insert a single report row, letting SQLite pick the ID"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO reports (status, priority, issue_type, date_reported, resolved_at, body) "
+                "VALUES (?, ?, ?, ?, ?, '{}')",
+                self._row({**report, 'id': None})[1:-1]
+            )
+            report['id'] = cursor.lastrowid
+            self._write_row(conn, report)
+        return report['id']
+
+    def insert_reports(self, reports):
+        """Insert a batch of rows in one transaction, with a block of IDs
+
+        The block starts after the highest ID ever used (AUTOINCREMENT's
+        counter), so IDs of deleted reports are not reused here either.
+        """
+        with self._transaction() as conn:
+            last_id = self._last_id(conn)
+            for report_id, report in enumerate(reports, start=last_id + 1):
+                report['id'] = report_id
+            rows = [self._row(report) for report in reports]
+            count('storage.bytes_written', sum(len(row[-1]) for row in rows))
+            conn.executemany(
+                "INSERT INTO reports (id, status, priority, issue_type, date_reported, resolved_at, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return [report['id'] for report in reports]
+
+    def modify_report(self, report_id, change):
+        """Read, change and rewrite a single report row in one transaction"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT body FROM reports WHERE id = ?", (report_id,)).fetchone()
+            if row is None:
+                return None
+            count('storage.bytes_read', len(row[0]))
+            report = json.loads(row[0])
+            change(report)
+            self._write_row(conn, report)
+        return report
+
+    def modify_reports(self, report_ids, change):
+        """Read, change and rewrite several report rows in one transaction"""
+        updated = []
+        with self._transaction() as conn:
+            for report_id in report_ids:
+                row = conn.execute("SELECT body FROM reports WHERE id = ?", (report_id,)).fetchone()
+                if row is None:
+                    continue
+                count('storage.bytes_read', len(row[0]))
+                report = json.loads(row[0])
+                change(report)
+                self._write_row(conn, report)
+                updated.append(report)
+        return updated
+
+    def delete_reports(self, report_ids, select=None, before_delete=None):
+        """Delete the (selected) report rows in one transaction"""
+        with self._transaction() as conn:
+            deleted = []
+            for report_id in report_ids:
+                row = conn.execute("SELECT body FROM reports WHERE id = ?", (report_id,)).fetchone()
+                if row is None:
+                    continue
+                count('storage.bytes_read', len(row[0]))
+                report = json.loads(row[0])
+                if select is None or select(report):
+                    deleted.append(report)
+            if deleted and before_delete is not None:
+                before_delete(deleted)
+            conn.executemany("DELETE FROM reports WHERE id = ?", [(report['id'],) for report in deleted])
+        return deleted
+
+    def get_meta(self, key, default=None):
+        """A bookkeeping value recorded with ``set_meta``"""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def set_meta(self, key, value):
+        """Record a bookkeeping value (e.g. where data was migrated from)"""
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def backup(self, backup_dir=config.BACKUP_DIR):
+        """Copy the database with SQLite's online backup API"""
+        target = self._backup_path(backup_dir, self.path)
+        with sqlite3.connect(target) as destination:
+            self._connect().backup(destination)
+        destination.close()
+        return target
+
+
+class _SqliteTransaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back if the block raises"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def start_compactor(store, interval=config.COMPACT_INTERVAL_SECONDS, min_events=config.COMPACT_MIN_EVENTS):
+    """Compact ``store`` every ``interval`` seconds in a daemon thread
+
+    Returns the thread; set its ``stop`` event to end it.
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                store.compact(min_events)
+            except Exception:
+                # Compaction is only an optimisation; try again next time
+                continue
+
+    thread = threading.Thread(target=run, name=f"{store.name}-compactor", daemon=True)
+    thread.stop = stop
+    thread.start()
+    return thread
+
+
+def _file_signature(path):
+    """(mtime, size) of a file, or (None, None) if it does not exist"""
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return (None, None)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def migrate_json_to_sqlite(json_path=config.JSON_DATA_FILE, db_path=config.SQLITE_DATA_FILE):
+    """Copy reports from the JSON file into an empty SQLite database
+
+    Returns the number of reports copied. Nothing is copied if the database
+    was migrated before or has ever held reports - even if they have all
+    moved to the archive since - so running this twice is harmless. The JSON
+    file is left untouched as a backup.
+    """
+    target = SqliteReportStore(db_path)
+    if target.get_meta('migrated_from') is not None or target.last_id() > 0:
+        return 0
+    # Recent reports may only be in the event log, not yet in the snapshot
+    reports = JsonReportStore(json_path).load_reports()
+    if not reports:
+        return 0
+    target.save_all(reports)
+    target.set_meta('migrated_from', str(json_path))
+    target.set_meta('migrated_at', datetime.datetime.now().isoformat())
+    return len(reports)
+
+
+def create_store(backend=None):
+    """Create the storage backend named in the config (or ``backend``)"""
+    backend = (backend or config.STORAGE_BACKEND).lower()
+    if backend == "json":
+        return JsonReportStore()
+    if backend == "sqlite":
+        # First start on SQLite: bring over whatever the JSON file holds
+        migrate_json_to_sqlite()
+        return SqliteReportStore()
+    raise ValueError(f"Unknown storage backend: {backend!r} (expected 'json' or 'sqlite')")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CommUnityFix storage tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate", help="Copy reports from the JSON file into SQLite")
+    migrate.add_argument("--json", default=config.JSON_DATA_FILE, help="Source JSON file")
+    migrate.add_argument("--db", default=config.SQLITE_DATA_FILE, help="Target SQLite database")
+
+    subparsers.add_parser("backup", help="Copy the current data into the backup directory")
+    subparsers.add_parser("compact", help="Fold the JSON event log into the snapshot")
+
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        copied = migrate_json_to_sqlite(args.json, args.db)
+        if copied:
+            print(f"Migrated {copied} reports from {args.json} to {args.db}")
+        else:
+            print(f"Nothing to migrate ({args.db} already has data or {args.json} is missing)")
+    elif args.command == "backup":
+        print(f"Backed up to {create_store().backup()}")
+    elif args.command == "compact":
+        print(f"Folded {create_store().compact()} events into the snapshot")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""The admin triage queue: open reports in the order to work on them
+
+Open reports (Received or In Progress) are ordered by priority, most
+urgent first, and within a priority by when they fall due: submission time
+plus the issue type's SLA (see ``analytics.sla_days``). So the oldest
+reports come first, and a Safety Hazard (one day) comes before a Graffiti
+report (two weeks) submitted at the same time.
+
+``TriageQueue`` keeps one heap per priority, ordered by due time, and
+updates it with lazy invalidation: a status or priority change pushes a new
+entry (O(log n)) and leaves the old one in place, marked stale by no longer
+being the report's current entry. Stale entries are skipped when read and
+dropped once they outnumber the live ones. "The next 10 open emergencies"
+walks the emergency heap in order from the top without popping, so only
+about as many entries are looked at as are returned. Overdue counts only
+grow as time passes, so each entry is moved into them once, from a second
+heap of entries not yet overdue.
+"""
+import heapq
+import itertools
+from collections import Counter
+
+from communityfix.analytics import sla_days
+from communityfix.report_index import PRIORITIES
+
+
+OPEN_STATUSES = ('Received', 'In Progress')
+
+_RANKS = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+
+
+def due_ts(report):
+    """Time (seconds since 1970) a report should be resolved by"""
+    return report.reported_ts + int(sla_days(report.issue_type) * 86400)
+
+
+def triage_key(report):
+    """Sort key: priority rank, due time, then ID"""
+    return (_RANKS.get(report.priority, len(PRIORITIES)), due_ts(report), report.id)
+
+
+class TriageQueue:
+    """Heaps of open reports by priority and due time"""
+
+    # Stale entries a heap may hold beyond its live ones before it is rebuilt
+    _SLACK = 64
+
+    def __init__(self, reports=()):
+        self._seq = itertools.count()
+        self._by_id = {}
+        self._entries = {}  # report ID -> current entry: (rank, due, ID, seq)
+        ranks = range(len(PRIORITIES) + 1)  # the last one for unknown priorities
+        self._heaps = {rank: [] for rank in ranks}
+        self._live = Counter()   # rank -> live entries
+        self._stale = Counter()  # rank -> stale entries still in its heap
+        # Entries not yet counted as overdue, and the IDs that are
+        self._upcoming = {rank: [] for rank in ranks}
+        self._overdue = set()
+        self._overdue_counts = Counter()
+        self._overdue_now = None
+        for report in reports:
+            if report.status in OPEN_STATUSES:
+                self._push(report, heapify=False)
+        # Heapified once here; later changes push single entries
+        for rank in ranks:
+            heapq.heapify(self._heaps[rank])
+            self._upcoming[rank] = list(self._heaps[rank])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, report_id):
+        return report_id in self._entries
+
+    def _push(self, report, heapify=True):
+        rank, due, report_id = triage_key(report)
+        entry = (rank, due, report_id, next(self._seq))
+        self._entries[report_id] = entry
+        self._by_id[report_id] = report
+        self._live[rank] += 1
+        if heapify:
+            heapq.heappush(self._heaps[rank], entry)
+            heapq.heappush(self._upcoming[rank], entry)
+        else:
+            self._heaps[rank].append(entry)
+
+    def _current(self, entry):
+        return self._entries.get(entry[2]) is entry
+
+    def _drop(self, report_id):
+        """Mark a report's entry stale"""
+        entry = self._entries.pop(report_id, None)
+        if entry is None:
+            return
+        del self._by_id[report_id]
+        rank = entry[0]
+        self._live[rank] -= 1
+        self._stale[rank] += 1
+        if report_id in self._overdue:
+            self._overdue.discard(report_id)
+            self._overdue_counts[rank] -= 1
+        if self._stale[rank] > self._live[rank] + self._SLACK:
+            self._rebuild(rank)
+
+    def _rebuild(self, rank):
+        """Drop the stale entries of one priority"""
+        heap = [entry for entry in self._heaps[rank] if self._current(entry)]
+        heapq.heapify(heap)
+        self._heaps[rank] = heap
+        self._upcoming[rank] = [entry for entry in heap if entry[2] not in self._overdue]
+        heapq.heapify(self._upcoming[rank])
+        self._stale[rank] = 0
+
+    def add(self, report):
+        """Queue a newly created report if it is open"""
+        self.update(report)
+
+    def update(self, report):
+        """Move a report after its status or priority changed"""
+        if report.status not in OPEN_STATUSES:
+            self.remove(report.id)
+            return
+        entry = self._entries.get(report.id)
+        if entry is not None and entry[:3] == triage_key(report):
+            self._by_id[report.id] = report
+            return
+        self._drop(report.id)
+        self._push(report)
+
+    def remove(self, report_id):
+        """Take a report out of the queue"""
+        self._drop(report_id)
+
+    def _ranks(self, priority):
+        return sorted(self._heaps) if priority is None else [_RANKS[priority]]
+
+    def _in_order(self, rank):
+        """Live entries of one priority in queue order, read without popping
+
+        A heap's smallest entries are found from its root: keep the
+        children of every entry taken in a small candidate heap.
+        """
+        heap = self._heaps[rank]
+        candidates = [(heap[0], 0)] if heap else []
+        while candidates:
+            entry, position = heapq.heappop(candidates)
+            if self._current(entry):
+                yield entry
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heapq.heappush(candidates, (heap[child], child))
+
+    def next(self, count=10, priority=None, offset=0):
+        """The ``count`` open reports to work on next, after skipping ``offset``"""
+        reports = []
+        for rank in self._ranks(priority):
+            if len(reports) >= count:
+                break
+            if offset >= self._live[rank]:
+                offset -= self._live[rank]
+                continue
+            for entry in itertools.islice(self._in_order(rank), offset, offset + count - len(reports)):
+                reports.append(self._by_id[entry[2]])
+            offset = 0
+        return reports
+
+    def count(self, priority=None):
+        """Number of open reports (of one priority)"""
+        return sum(self._live[rank] for rank in self._ranks(priority))
+
+    def count_overdue(self, now_ts, priority=None):
+        """Number of open reports (of one priority) past their due time"""
+        if self._overdue_now is not None and now_ts < self._overdue_now:
+            # Asked about an earlier time: count again from scratch
+            self._overdue.clear()
+            self._overdue_counts.clear()
+            for rank in self._heaps:
+                self._rebuild(rank)
+        self._overdue_now = now_ts
+        for rank, upcoming in self._upcoming.items():
+            while upcoming and upcoming[0][1] < now_ts:
+                entry = heapq.heappop(upcoming)
+                if self._current(entry):
+                    self._overdue.add(entry[2])
+                    self._overdue_counts[rank] += 1
+        priorities = PRIORITIES if priority is None else (priority,)
+        return sum(self._overdue_counts[_RANKS[priority]] for priority in priorities)
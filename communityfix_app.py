@@ -1,1217 +1,1651 @@
-import streamlit as st
-import pandas as pd
-import datetime
-import json
-from pathlib import Path
-import base64
-import io
-from PIL import Image
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-
-# Page configuration
-st.set_page_config(
-    page_title="CommUnityFix - Barangay Union",
-    page_icon="🏘️",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Custom CSS for enhanced styling
-st.markdown("""
-<style>
-    .main-header {
-        background: linear-gradient(90deg, #1f4e79, #2e7d32);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin: 0.5rem 0;
-    }
-    .emergency-card {
-        background: linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin: 0.5rem 0;
-    }
-    .success-card {
-        background: linear-gradient(135deg, #00b894 0%, #00a085 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin: 0.5rem 0;
-    }
-    .report-card {
-        background: #f8f9fa;
-        padding: 1rem;
-        border-radius: 10px;
-        border-left: 4px solid #007bff;
-        margin: 1rem 0;
-    }
-    .status-received { border-left-color: #ffc107; }
-    .status-progress { border-left-color: #17a2b8; }
-    .status-resolved { border-left-color: #28a745; }
-    .sidebar .sidebar-content {
-        background: linear-gradient(180deg, #1f4e79, #2e7d32);
-    }
-    .stButton > button {
-        background: linear-gradient(90deg, #007bff, #0056b3);
-        color: white;
-        border: none;
-        border-radius: 5px;
-        padding: 0.5rem 1rem;
-        font-weight: bold;
-    }
-    .stButton > button:hover {
-        background: linear-gradient(90deg, #0056b3, #004085);
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Initialize session state for data storage
-if 'reports' not in st.session_state:
-    st.session_state.reports = []
-if 'admin_logged_in' not in st.session_state:
-    st.session_state.admin_logged_in = False
-if 'admin_password' not in st.session_state:
-    st.session_state.admin_password = "admin123"  # Default password
-
-# Data persistence functions
-def save_data_to_file():
-    """Save reports data to JSON file"""
-    try:
-        data = {
-            'reports': st.session_state.reports,
-            'last_updated': datetime.datetime.now().isoformat()
-        }
-        with open('reports_data.json', 'w') as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        st.error(f"Error saving data: {e}")
-
-def load_data_from_file():
-    """Load reports data from JSON file"""
-    try:
-        if Path('reports_data.json').exists():
-            with open('reports_data.json', 'r') as f:
-                data = json.load(f)
-                st.session_state.reports = data.get('reports', [])
-    except Exception as e:
-        st.error(f"Error loading data: {e}")
-
-# Load data on startup
-load_data_from_file()
-
-# Sample emergency contacts
-EMERGENCY_CONTACTS = {
-    "Barangay Hall": "123-4567",
-    "Police Station": "911",
-    "Fire Department": "911",
-    "Hospital Emergency": "911",
-    "Rescue Services": "123-4567"
-}
-
-# Sample tips for minor problems
-TIPS = [
-    "For minor garbage issues: Separate biodegradable from non-biodegradable waste",
-    "Small potholes: Mark the area with visible objects to alert others while waiting for repair",
-    "Streetlight issues: Note the exact location and pole number if available",
-    "Drainage problems: Clear visible debris if safe to do so",
-    "Graffiti: Document with photos for proper reporting"
-]
-
-def save_report(name, contact, issue_type, location, description, photo=None):
-    """Save a new report to session state"""
-    report_id = len(st.session_state.reports) + 1
-    
-    # Handle photo upload
-    photo_data = None
-    if photo is not None:
-        try:
-            # Convert uploaded file to base64 for storage
-            photo_data = base64.b64encode(photo.read()).decode()
-        except Exception as e:
-            st.warning(f"Could not process photo: {e}")
-    
-    new_report = {
-        'id': report_id,
-        'name': name,
-        'contact': contact,
-        'issue_type': issue_type,
-        'location': location,
-        'description': description,
-        'status': 'Received',
-        'assigned_to': 'Not assigned',
-        'date_reported': datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
-        'comments': [],
-        'photo': photo_data,
-        'priority': 'Medium'  # Default priority
-    }
-    st.session_state.reports.append(new_report)
-    
-    # Save to file
-    save_data_to_file()
-    
-    return report_id
-
-def add_comment(report_id, comment_text, author="Admin"):
-    """Add a comment to a report"""
-    for report in st.session_state.reports:
-        if report['id'] == report_id:
-            comment = {
-                'author': author,
-                'text': comment_text,
-                'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-            }
-            report['comments'].append(comment)
-            break
-
-def create_progress_charts():
-    """Create various charts for progress tracking"""
-    if not st.session_state.reports:
-        return None, None, None, None
-    
-    # Convert reports to DataFrame for easier analysis
-    df = pd.DataFrame(st.session_state.reports)
-    df['date_reported'] = pd.to_datetime(df['date_reported'])
-    
-    # 1. Status Distribution Pie Chart
-    status_counts = df['status'].value_counts()
-    status_colors = {'Received': '#ffc107', 'In Progress': '#17a2b8', 'Resolved': '#28a745'}
-    
-    fig_pie = px.pie(
-        values=status_counts.values,
-        names=status_counts.index,
-        title="Report Status Distribution",
-        color_discrete_map=status_colors
-    )
-    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
-    
-    # 2. Issue Type Bar Chart
-    issue_counts = df['issue_type'].value_counts()
-    fig_bar = px.bar(
-        x=issue_counts.index,
-        y=issue_counts.values,
-        title="Reports by Issue Type",
-        labels={'x': 'Issue Type', 'y': 'Number of Reports'},
-        color=issue_counts.values,
-        color_continuous_scale='Blues'
-    )
-    fig_bar.update_layout(showlegend=False)
-    
-    # 3. Timeline Chart
-    df_daily = df.groupby(df['date_reported'].dt.date).size().reset_index(name='count')
-    fig_timeline = px.line(
-        df_daily,
-        x='date_reported',
-        y='count',
-        title="Reports Over Time",
-        labels={'date_reported': 'Date', 'count': 'Number of Reports'}
-    )
-    fig_timeline.update_traces(line=dict(width=3))
-    
-    # 4. Resolution Time Analysis
-    resolved_reports = df[df['status'] == 'Resolved'].copy()
-    if not resolved_reports.empty:
-        # Calculate days to resolution (simplified - using current date as resolution date)
-        resolved_reports['days_to_resolution'] = (datetime.datetime.now() - resolved_reports['date_reported']).dt.days
-        avg_resolution_time = resolved_reports['days_to_resolution'].mean()
-        
-        fig_resolution = px.histogram(
-            resolved_reports,
-            x='days_to_resolution',
-            title=f"Resolution Time Distribution (Avg: {avg_resolution_time:.1f} days)",
-            labels={'days_to_resolution': 'Days to Resolution', 'count': 'Number of Reports'},
-            nbins=10
-        )
-    else:
-        fig_resolution = None
-    
-    return fig_pie, fig_bar, fig_timeline, fig_resolution
-
-def organize_reports_by_status():
-    """Organize reports by status for better admin management"""
-    if not st.session_state.reports:
-        return {}
-    
-    organized = {
-        'Received': [],
-        'In Progress': [],
-        'Resolved': []
-    }
-    
-    for report in st.session_state.reports:
-        status = report['status']
-        if status in organized:
-            organized[status].append(report)
-    
-    return organized
-
-def organize_reports_by_priority():
-    """Organize reports by priority level"""
-    if not st.session_state.reports:
-        return {}
-    
-    organized = {
-        'Emergency': [],
-        'High': [],
-        'Medium': [],
-        'Low': []
-    }
-    
-    for report in st.session_state.reports:
-        priority = report.get('priority', 'Medium')
-        if priority in organized:
-            organized[priority].append(report)
-    
-    return organized
-
-def organize_reports_by_date():
-    """Organize reports by date (Today, This Week, This Month, Older)"""
-    if not st.session_state.reports:
-        return {}
-    
-    now = datetime.datetime.now()
-    today = now.date()
-    week_ago = today - datetime.timedelta(days=7)
-    month_ago = today - datetime.timedelta(days=30)
-    
-    organized = {
-        'Today': [],
-        'This Week': [],
-        'This Month': [],
-        'Older': []
-    }
-    
-    for report in st.session_state.reports:
-        report_date = datetime.datetime.strptime(report['date_reported'], "%Y-%m-%d %H:%M").date()
-        
-        if report_date == today:
-            organized['Today'].append(report)
-        elif report_date >= week_ago:
-            organized['This Week'].append(report)
-        elif report_date >= month_ago:
-            organized['This Month'].append(report)
-        else:
-            organized['Older'].append(report)
-    
-    return organized
-
-def organize_reports_by_issue_type():
-    """Organize reports by issue type"""
-    if not st.session_state.reports:
-        return {}
-    
-    organized = {}
-    for report in st.session_state.reports:
-        issue_type = report['issue_type']
-        if issue_type not in organized:
-            organized[issue_type] = []
-        organized[issue_type].append(report)
-    
-    return organized
-
-def display_organized_reports(organized_reports, title, show_actions=True, context=""):
-    """Display organized reports in a clean format"""
-    st.subheader(title)
-    
-    if not organized_reports:
-        st.info("No reports in this category.")
-        return
-    
-    for category, reports in organized_reports.items():
-        if reports:  # Only show categories that have reports
-            with st.expander(f"{category} ({len(reports)} reports)", expanded=False):
-                for report in reports:
-                    # Create a card-like display for each report
-                    status_color = {
-                        'Received': '🟡',
-                        'In Progress': '🔵', 
-                        'Resolved': '🟢'
-                    }.get(report['status'], '⚪')
-                    
-                    priority_emoji = {
-                        'Low': '🟢', 'Medium': '🟡', 'High': '🟠', 'Emergency': '🔴'
-                    }.get(report.get('priority', 'Medium'), '⚪')
-                    
-                    col1, col2, col3 = st.columns([4, 2, 1])
-                    
-                    with col1:
-                        st.write(f"**{status_color} Report #{report['id']}** - {report['issue_type']}")
-                        st.write(f"📍 {report['location']}")
-                        st.write(f"👤 {report['name']} - {report['date_reported']}")
-                        st.write(f"📝 {report['description'][:100]}{'...' if len(report['description']) > 100 else ''}")
-                    
-                    with col2:
-                        st.write(f"**Status:** {report['status']}")
-                        st.write(f"**Priority:** {priority_emoji} {report.get('priority', 'Medium')}")
-                        st.write(f"**Assigned:** {report['assigned_to']}")
-                    
-                    with col3:
-                        if show_actions:
-                            # Make keys unique by adding context
-                            unique_key_base = f"{context}_{category}_{report['id']}"
-                            if st.button(f"Quick Update", key=f"quick_{unique_key_base}"):
-                                st.session_state[f"quick_update_{unique_key_base}"] = True
-                            
-                            if st.button(f"View Full", key=f"full_{unique_key_base}"):
-                                st.session_state[f"view_full_{unique_key_base}"] = True
-                    
-                    # Quick update form
-                    unique_key_base = f"{context}_{category}_{report['id']}"
-                    if st.session_state.get(f"quick_update_{unique_key_base}", False):
-                        with st.form(f"quick_form_{unique_key_base}"):
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                new_status = st.selectbox("Status", 
-                                    ["Received", "In Progress", "Resolved"],
-                                    index=["Received", "In Progress", "Resolved"].index(report['status']),
-                                    key=f"status_{unique_key_base}")
-                            with col2:
-                                new_priority = st.selectbox("Priority",
-                                    ["Low", "Medium", "High", "Emergency"],
-                                    index=["Low", "Medium", "High", "Emergency"].index(report.get('priority', 'Medium')),
-                                    key=f"priority_{unique_key_base}")
-                            
-                            assigned_to = st.text_input("Assign To", value=report['assigned_to'], key=f"assign_{unique_key_base}")
-                            
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                if st.form_submit_button("Update"):
-                                    report['status'] = new_status
-                                    report['priority'] = new_priority
-                                    report['assigned_to'] = assigned_to
-                                    save_data_to_file()
-                                    st.session_state[f"quick_update_{unique_key_base}"] = False
-                                    st.success("Report updated!")
-                                    st.rerun()
-                            with col2:
-                                if st.form_submit_button("Cancel"):
-                                    st.session_state[f"quick_update_{unique_key_base}"] = False
-                                    st.rerun()
-                    
-                    # Full view
-                    if st.session_state.get(f"view_full_{unique_key_base}", False):
-                        with st.expander(f"Full Report #{report['id']} Details", expanded=True):
-                            st.write(f"**Reporter:** {report['name']}")
-                            st.write(f"**Contact:** {report['contact']}")
-                            st.write(f"**Issue Type:** {report['issue_type']}")
-                            st.write(f"**Location:** {report['location']}")
-                            st.write(f"**Description:** {report['description']}")
-                            st.write(f"**Date Reported:** {report['date_reported']}")
-                            st.write(f"**Status:** {report['status']}")
-                            st.write(f"**Priority:** {report.get('priority', 'Medium')}")
-                            st.write(f"**Assigned To:** {report['assigned_to']}")
-                            
-                            # Show photo if available
-                            if report.get('photo'):
-                                try:
-                                    photo_data = base64.b64decode(report['photo'])
-                                    st.image(photo_data, caption="Report Photo", use_column_width=True)
-                                except:
-                                    st.warning("Could not display photo")
-                            
-                            # Show comments
-                            if report.get('comments'):
-                                st.write("**Comments & Updates:**")
-                                for comment in reversed(report['comments']):
-                                    st.write(f"💬 **{comment['author']}** ({comment['timestamp']}): {comment['text']}")
-                            
-                            if st.button(f"Close Full View", key=f"close_full_{unique_key_base}"):
-                                st.session_state[f"view_full_{unique_key_base}"] = False
-                                st.rerun()
-                    
-                    st.divider()
-
-def main():
-    # Main header
-    st.markdown("""
-    <div class="main-header">
-        <h1>🏘️ CommUnityFix</h1>
-        <h3>Barangay Union - Community Issue Reporting System</h3>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Sidebar navigation
-    st.sidebar.title("🏘️ CommUnityFix")
-    st.sidebar.markdown("**Barangay Union**")
-    st.sidebar.markdown("---")
-    
-    if not st.session_state.admin_logged_in:
-        page = st.sidebar.radio("Navigation", ["Report Issue", "Emergency Contacts", "Progress Dashboard", "Admin Login"])
-    else:
-        page = st.sidebar.radio("Navigation", ["Report Issue", "Emergency Contacts", "Progress Dashboard", "Admin Dashboard", "Logout"])
-    
-    # Report Issue Page
-    if page == "Report Issue":
-        show_report_page()
-    
-    # Emergency Contacts Page
-    elif page == "Emergency Contacts":
-        show_contacts_page()
-    
-    # Progress Dashboard Page
-    elif page == "Progress Dashboard":
-        show_progress_dashboard()
-    
-    # Admin Login Page
-    elif page == "Admin Login":
-        show_admin_login()
-    
-    # Admin Dashboard
-    elif page == "Admin Dashboard":
-        if st.session_state.admin_logged_in:
-            show_admin_dashboard()
-        else:
-            st.warning("Please log in first")
-            show_admin_login()
-    
-    # Logout
-    elif page == "Logout":
-        st.session_state.admin_logged_in = False
-        st.success("Logged out successfully!")
-        st.rerun()
-
-def show_report_page():
-    st.title("📝 Report a Community Issue")
-    st.markdown("Use this form to report problems in our community. Your reports help make Barangay Union better!")
-    
-    # Add some helpful information
-    with st.expander("ℹ️ Before Reporting"):
-        st.write("""
-        - **Take a photo** if possible to help us understand the issue better
-        - **Be specific** about the location (street names, landmarks, house numbers)
-        - **Describe the severity** and any safety concerns
-        - **Include your contact** so we can follow up if needed
-        """)
-    
-    with st.form("report_form"):
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            name = st.text_input("Your Name *", placeholder="Enter your full name")
-            contact = st.text_input("Contact Number *", placeholder="09XXXXXXXXX", help="Include area code if applicable")
-            issue_type = st.selectbox(
-                "Issue Type *",
-                ["Pothole", "Garbage Accumulation", "Broken Streetlight", 
-                 "Clogged Drainage", "Graffiti", "Damaged Road", "Water Leak", 
-                 "Noise Complaint", "Safety Hazard", "Other"]
-            )
-            priority = st.selectbox(
-                "Priority Level",
-                ["Low", "Medium", "High", "Emergency"],
-                help="Emergency: Immediate danger to life/property"
-            )
-        
-        with col2:
-            location = st.text_input("Location *", placeholder="Ex: Near Barangay Hall, Main Street")
-            description = st.text_area("Description *", placeholder="Please describe the issue in detail...", height=100)
-            photo = st.file_uploader("Upload Photo (Optional)", type=['png', 'jpg', 'jpeg'], help="Maximum file size: 5MB")
-            
-            # Show photo preview if uploaded
-            if photo is not None:
-                try:
-                    image = Image.open(photo)
-                    st.image(image, caption="Photo Preview", use_column_width=True)
-                except Exception as e:
-                    st.warning(f"Could not preview image: {e}")
-        
-        st.markdown("**Required fields*")
-        submitted = st.form_submit_button("🚀 Submit Report", use_container_width=True)
-        
-        if submitted:
-            # Enhanced validation
-            errors = []
-            if not name or len(name.strip()) < 2:
-                errors.append("Please enter a valid name (at least 2 characters)")
-            if not contact or len(contact.strip()) < 10:
-                errors.append("Please enter a valid contact number (at least 10 digits)")
-            if not location or len(location.strip()) < 5:
-                errors.append("Please provide a more specific location")
-            if not description or len(description.strip()) < 10:
-                errors.append("Please provide a more detailed description (at least 10 characters)")
-            
-            if errors:
-                for error in errors:
-                    st.error(error)
-            else:
-                report_id = save_report(name, contact, issue_type, location, description, photo)
-                st.markdown(f"""
-                <div class="success-card">
-                    <h3>✅ Report Submitted Successfully!</h3>
-                    <p><strong>Report ID:</strong> #{report_id}</p>
-                    <p>Thank you for helping improve our community!</p>
-                </div>
-                """, unsafe_allow_html=True)
-                st.info("📞 You can check the status of your report by contacting Barangay Hall or logging in as admin.")
-
-def show_contacts_page():
-    st.title("📞 Emergency Contacts & Tips")
-    
-    st.header("🚨 Emergency Contacts")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        for service, number in list(EMERGENCY_CONTACTS.items())[:3]:
-            st.markdown(f"""
-            <div class="emergency-card">
-                <h4>{service}</h4>
-                <h2>{number}</h2>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    with col2:
-        for service, number in list(EMERGENCY_CONTACTS.items())[3:]:
-            st.markdown(f"""
-            <div class="emergency-card">
-                <h4>{service}</h4>
-                <h2>{number}</h2>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    st.header("🛠️ Tips for Minor Problems")
-    
-    for i, tip in enumerate(TIPS, 1):
-        st.markdown(f"""
-        <div class="report-card">
-            <strong>{i}.</strong> {tip}
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.header("🚨 Emergency Procedures")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        with st.expander("🏥 Medical Emergency", expanded=False):
-            st.write("""
-            **Immediate Actions:**
-            1. Call emergency services immediately (911)
-            2. Provide clear location details
-            3. Do not move injured person unless necessary
-            4. Have someone wait to guide emergency responders
-            5. Apply first aid if trained
-            """)
-        
-        with st.expander("🔥 Fire Emergency", expanded=False):
-            st.write("""
-            **Immediate Actions:**
-            1. Alert everyone in the area
-            2. Call fire department (911)
-            3. Use fire extinguisher if safe
-            4. Evacuate immediately if fire spreads
-            5. Meet at designated assembly point
-            """)
-    
-    with col2:
-        with st.expander("🌪️ Natural Disasters", expanded=False):
-            st.write("""
-            **General Guidelines:**
-            1. Stay informed through official channels
-            2. Follow evacuation orders immediately
-            3. Have emergency kit ready
-            4. Stay away from windows and doors
-            5. Check on neighbors if safe
-            """)
-        
-        with st.expander("🚨 Security Issues", expanded=False):
-            st.write("""
-            **Safety Measures:**
-            1. Call police immediately (911)
-            2. Do not confront suspicious persons
-            3. Lock doors and windows
-            4. Stay in safe location
-            5. Report to barangay officials
-            """)
-    
-    # Quick action buttons
-    st.header("⚡ Quick Actions")
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("📞 Call Emergency (911)", use_container_width=True):
-            st.info("Dial 911 for immediate emergency assistance")
-    
-    with col2:
-        if st.button("🏛️ Contact Barangay Hall", use_container_width=True):
-            st.info("Barangay Hall: 123-4567")
-    
-    with col3:
-        if st.button("📝 Report Issue", use_container_width=True):
-            st.info("Use the 'Report Issue' page to submit non-emergency problems")
-
-def show_progress_dashboard():
-    st.title("📊 Progress Dashboard")
-    st.markdown("Track the progress of community reports and get insights into issue resolution")
-    
-    if not st.session_state.reports:
-        st.info("No reports available yet. Submit some reports to see progress tracking!")
-        return
-    
-    # Key Metrics Section
-    st.header("📈 Key Metrics")
-    
-    total_reports = len(st.session_state.reports)
-    received = len([r for r in st.session_state.reports if r['status'] == 'Received'])
-    in_progress = len([r for r in st.session_state.reports if r['status'] == 'In Progress'])
-    resolved = len([r for r in st.session_state.reports if r['status'] == 'Resolved'])
-    
-    # Calculate additional metrics
-    resolution_rate = (resolved / total_reports * 100) if total_reports > 0 else 0
-    avg_resolution_time = 0
-    if resolved > 0:
-        resolved_reports = [r for r in st.session_state.reports if r['status'] == 'Resolved']
-        total_days = sum([(datetime.datetime.now() - datetime.datetime.strptime(r['date_reported'], "%Y-%m-%d %H:%M")).days for r in resolved_reports])
-        avg_resolution_time = total_days / resolved if resolved > 0 else 0
-    
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        st.metric("Total Reports", total_reports, delta=None)
-    with col2:
-        st.metric("Resolution Rate", f"{resolution_rate:.1f}%", delta=f"{resolved} resolved")
-    with col3:
-        st.metric("Avg Resolution Time", f"{avg_resolution_time:.1f} days", delta="from submission")
-    with col4:
-        st.metric("In Progress", in_progress, delta=f"{in_progress/total_reports*100:.1f}%" if total_reports > 0 else "0%")
-    with col5:
-        st.metric("Pending", received, delta=f"{received/total_reports*100:.1f}%" if total_reports > 0 else "0%")
-    
-    # Charts Section
-    st.header("📊 Visual Analytics")
-    
-    # Create charts
-    fig_pie, fig_bar, fig_timeline, fig_resolution = create_progress_charts()
-    
-    if fig_pie and fig_bar and fig_timeline:
-        # First row - Status and Issue Type
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.plotly_chart(fig_pie, use_container_width=True)
-        
-        with col2:
-            st.plotly_chart(fig_bar, use_container_width=True)
-        
-        # Second row - Timeline
-        st.plotly_chart(fig_timeline, use_container_width=True)
-        
-        # Third row - Resolution Time (if available)
-        if fig_resolution:
-            st.plotly_chart(fig_resolution, use_container_width=True)
-    
-    # Recent Activity Section
-    st.header("🕒 Recent Activity")
-    
-    # Get recent reports (last 10)
-    recent_reports = sorted(st.session_state.reports, key=lambda x: x['date_reported'], reverse=True)[:10]
-    
-    for report in recent_reports:
-        status_color = {
-            'Received': '🟡',
-            'In Progress': '🔵', 
-            'Resolved': '🟢'
-        }.get(report['status'], '⚪')
-        
-        with st.container():
-            col1, col2, col3 = st.columns([3, 2, 1])
-            
-            with col1:
-                st.write(f"**{status_color} Report #{report['id']}** - {report['issue_type']}")
-                st.write(f"📍 {report['location']}")
-                st.write(f"👤 {report['name']} - {report['date_reported']}")
-            
-            with col2:
-                st.write(f"**Status:** {report['status']}")
-                st.write(f"**Assigned:** {report['assigned_to']}")
-                if report.get('priority'):
-                    priority_emoji = {'Low': '🟢', 'Medium': '🟡', 'High': '🟠', 'Emergency': '🔴'}
-                    st.write(f"**Priority:** {priority_emoji.get(report['priority'], '⚪')} {report['priority']}")
-            
-            with col3:
-                progress_key = f"progress_view_{report['id']}"
-                if st.button(f"View Details", key=progress_key):
-                    st.session_state[f"show_report_{progress_key}"] = True
-            
-            # Show report details if requested
-            if st.session_state.get(f"show_report_{progress_key}", False):
-                with st.expander(f"Report #{report['id']} Details", expanded=True):
-                    st.write(f"**Description:** {report['description']}")
-                    st.write(f"**Contact:** {report['contact']}")
-                    
-                    # Show photo if available
-                    if report.get('photo'):
-                        try:
-                            photo_data = base64.b64decode(report['photo'])
-                            st.image(photo_data, caption="Report Photo", use_column_width=True)
-                        except:
-                            st.warning("Could not display photo")
-                    
-                    # Show comments
-                    if report.get('comments'):
-                        st.write("**Comments & Updates:**")
-                        for comment in reversed(report['comments']):
-                            st.write(f"💬 **{comment['author']}** ({comment['timestamp']}): {comment['text']}")
-                    
-                    if st.button(f"Close Details", key=f"close_{progress_key}"):
-                        st.session_state[f"show_report_{progress_key}"] = False
-                        st.rerun()
-            
-            st.divider()
-    
-    # Issue Type Analysis
-    st.header("🔍 Issue Analysis")
-    
-    # Create issue type breakdown
-    issue_analysis = {}
-    for report in st.session_state.reports:
-        issue_type = report['issue_type']
-        if issue_type not in issue_analysis:
-            issue_analysis[issue_type] = {'total': 0, 'resolved': 0, 'in_progress': 0, 'received': 0}
-        
-        issue_analysis[issue_type]['total'] += 1
-        issue_analysis[issue_type][report['status'].lower().replace(' ', '_')] += 1
-    
-    # Display issue analysis
-    for issue_type, stats in issue_analysis.items():
-        resolution_rate = (stats['resolved'] / stats['total'] * 100) if stats['total'] > 0 else 0
-        
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric(f"{issue_type}", stats['total'])
-        with col2:
-            st.metric("Resolved", stats['resolved'], f"{resolution_rate:.1f}%")
-        with col3:
-            st.metric("In Progress", stats['in_progress'])
-        with col4:
-            st.metric("Pending", stats['received'])
-        
-        # Progress bar
-        progress = resolution_rate / 100
-        st.progress(progress)
-        st.write(f"Resolution Progress: {resolution_rate:.1f}%")
-        st.divider()
-    
-    # Performance Insights
-    st.header("💡 Performance Insights")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("📊 Quick Stats")
-        st.write(f"• **Most Common Issue:** {max(issue_analysis.keys(), key=lambda x: issue_analysis[x]['total']) if issue_analysis else 'N/A'}")
-        st.write(f"• **Best Resolved Issue:** {max(issue_analysis.keys(), key=lambda x: issue_analysis[x]['resolved']/issue_analysis[x]['total'] if issue_analysis[x]['total'] > 0 else 0) if issue_analysis else 'N/A'}")
-        st.write(f"• **Total Reports This Month:** {len([r for r in st.session_state.reports if datetime.datetime.strptime(r['date_reported'], '%Y-%m-%d %H:%M').month == datetime.datetime.now().month])}")
-    
-    with col2:
-        st.subheader("🎯 Recommendations")
-        if resolution_rate < 50:
-            st.warning("⚠️ Resolution rate is below 50%. Consider increasing resources for faster resolution.")
-        elif resolution_rate < 80:
-            st.info("💡 Good progress! Aim for 80%+ resolution rate.")
-        else:
-            st.success("🎉 Excellent resolution rate! Keep up the great work!")
-        
-        if avg_resolution_time > 7:
-            st.warning("⚠️ Average resolution time is over a week. Consider streamlining processes.")
-        elif avg_resolution_time > 3:
-            st.info("💡 Resolution time is acceptable but could be improved.")
-        else:
-            st.success("🎉 Great response time! Issues are being resolved quickly.")
-
-def show_admin_login():
-    st.title("🔐 Admin Login")
-    
-    with st.form("login_form"):
-        password = st.text_input("Password", type="password")
-        login_btn = st.form_submit_button("Login")
-        
-        if login_btn:
-            if password == st.session_state.admin_password:
-                st.session_state.admin_logged_in = True
-                st.success("Login successful! Redirecting to dashboard...")
-                st.rerun()
-            else:
-                st.error("Incorrect password!")
-
-def show_admin_dashboard():
-    st.title("📊 Admin Dashboard")
-    st.markdown("Welcome to the Admin Control Panel - Manage and organize all community reports efficiently")
-    
-    # Statistics
-    total_reports = len(st.session_state.reports)
-    received = len([r for r in st.session_state.reports if r['status'] == 'Received'])
-    in_progress = len([r for r in st.session_state.reports if r['status'] == 'In Progress'])
-    resolved = len([r for r in st.session_state.reports if r['status'] == 'Resolved'])
-    
-    # Calculate resolution rate
-    resolution_rate = (resolved / total_reports * 100) if total_reports > 0 else 0
-    
-    col1, col2, col3, col4, col5 = st.columns(5)
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Total Reports</h3>
-            <h1>{total_reports}</h1>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Received</h3>
-            <h1>{received}</h1>
-        </div>
-        """, unsafe_allow_html=True)
-    with col3:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>In Progress</h3>
-            <h1>{in_progress}</h1>
-        </div>
-        """, unsafe_allow_html=True)
-    with col4:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Resolved</h3>
-            <h1>{resolved}</h1>
-        </div>
-        """, unsafe_allow_html=True)
-    with col5:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Resolution Rate</h3>
-            <h1>{resolution_rate:.1f}%</h1>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Organization Options
-    st.header("🗂️ Organize Reports")
-    
-    # Tabs for different organization methods
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 By Status", "⚡ By Priority", "📅 By Date", "🏷️ By Issue Type"])
-    
-    with tab1:
-        organized_by_status = organize_reports_by_status()
-        display_organized_reports(organized_by_status, "Reports Organized by Status", context="status")
-    
-    with tab2:
-        organized_by_priority = organize_reports_by_priority()
-        display_organized_reports(organized_by_priority, "Reports Organized by Priority", context="priority")
-    
-    with tab3:
-        organized_by_date = organize_reports_by_date()
-        display_organized_reports(organized_by_date, "Reports Organized by Date", context="date")
-    
-    with tab4:
-        organized_by_type = organize_reports_by_issue_type()
-        display_organized_reports(organized_by_type, "Reports Organized by Issue Type", context="type")
-    
-    # Quick Actions Section
-    st.header("⚡ Quick Actions")
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        if st.button("🔄 Refresh Data", use_container_width=True):
-            load_data_from_file()
-            st.success("Data refreshed!")
-            st.rerun()
-    
-    with col2:
-        if st.button("💾 Backup Now", use_container_width=True):
-            save_data_to_file()
-            st.success("Data backed up successfully!")
-    
-    with col3:
-        if st.button("📊 View Analytics", use_container_width=True):
-            st.info("Switch to Progress Dashboard for detailed analytics")
-    
-    with col4:
-        if st.button("📥 Export All", use_container_width=True):
-            if st.session_state.reports:
-                df_export = pd.DataFrame(st.session_state.reports)
-                csv = df_export.to_csv(index=False)
-                st.download_button(
-                    label="Download CSV",
-                    data=csv,
-                    file_name=f"all_reports_export_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv"
-                )
-            else:
-                st.warning("No reports to export")
-    
-    # Advanced Search and Filter
-    st.header("🔍 Advanced Search & Filter")
-    
-    with st.expander("Advanced Search Options", expanded=False):
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            search_name = st.text_input("Search by Reporter Name")
-            search_location = st.text_input("Search by Location")
-            search_issue = st.selectbox("Filter by Issue Type", ["All"] + list(set([r['issue_type'] for r in st.session_state.reports])))
-        
-        with col2:
-            search_status = st.selectbox("Filter by Status", ["All", "Received", "In Progress", "Resolved"])
-            search_priority = st.selectbox("Filter by Priority", ["All", "Low", "Medium", "High", "Emergency"])
-            date_range = st.date_input("Filter by Date Range", value=[datetime.datetime.now().date() - datetime.timedelta(days=30), datetime.datetime.now().date()])
-        
-        if st.button("Apply Filters"):
-            filtered_reports = st.session_state.reports.copy()
-            
-            if search_name:
-                filtered_reports = [r for r in filtered_reports if search_name.lower() in r['name'].lower()]
-            if search_location:
-                filtered_reports = [r for r in filtered_reports if search_location.lower() in r['location'].lower()]
-            if search_issue != "All":
-                filtered_reports = [r for r in filtered_reports if r['issue_type'] == search_issue]
-            if search_status != "All":
-                filtered_reports = [r for r in filtered_reports if r['status'] == search_status]
-            if search_priority != "All":
-                filtered_reports = [r for r in filtered_reports if r.get('priority', 'Medium') == search_priority]
-            
-            # Date filtering
-            if len(date_range) == 2:
-                start_date, end_date = date_range
-                filtered_reports = [r for r in filtered_reports if 
-                                  start_date <= datetime.datetime.strptime(r['date_reported'], "%Y-%m-%d %H:%M").date() <= end_date]
-            
-            st.session_state['filtered_reports'] = filtered_reports
-            st.success(f"Found {len(filtered_reports)} reports matching your criteria")
-    
-    # Display filtered results if available
-    if 'filtered_reports' in st.session_state and st.session_state['filtered_reports']:
-        st.subheader(f"🔍 Search Results ({len(st.session_state['filtered_reports'])} reports)")
-        
-        for report in st.session_state['filtered_reports']:
-            status_color = {'Received': '🟡', 'In Progress': '🔵', 'Resolved': '🟢'}.get(report['status'], '⚪')
-            priority_emoji = {'Low': '🟢', 'Medium': '🟡', 'High': '🟠', 'Emergency': '🔴'}.get(report.get('priority', 'Medium'), '⚪')
-            
-            with st.container():
-                col1, col2, col3 = st.columns([4, 2, 1])
-                
-                with col1:
-                    st.write(f"**{status_color} Report #{report['id']}** - {report['issue_type']}")
-                    st.write(f"📍 {report['location']} | 👤 {report['name']} | 📅 {report['date_reported']}")
-                
-                with col2:
-                    st.write(f"**Status:** {report['status']} | **Priority:** {priority_emoji} {report.get('priority', 'Medium')}")
-                    st.write(f"**Assigned:** {report['assigned_to']}")
-                
-                with col3:
-                    search_key = f"search_manage_{report['id']}"
-                    if st.button(f"Manage", key=search_key):
-                        st.session_state[f"manage_report_{search_key}"] = True
-                
-                # Quick management form
-                if st.session_state.get(f"manage_report_{search_key}", False):
-                    with st.form(f"manage_form_{search_key}"):
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            new_status = st.selectbox("Status", ["Received", "In Progress", "Resolved"], 
-                                                    index=["Received", "In Progress", "Resolved"].index(report['status']),
-                                                    key=f"m_status_{search_key}")
-                            new_priority = st.selectbox("Priority", ["Low", "Medium", "High", "Emergency"],
-                                                      index=["Low", "Medium", "High", "Emergency"].index(report.get('priority', 'Medium')),
-                                                      key=f"m_priority_{search_key}")
-                        with col2:
-                            assigned_to = st.text_input("Assign To", value=report['assigned_to'], key=f"m_assign_{search_key}")
-                            comment = st.text_area("Add Comment", key=f"m_comment_{search_key}")
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            if st.form_submit_button("Update Report"):
-                                report['status'] = new_status
-                                report['priority'] = new_priority
-                                report['assigned_to'] = assigned_to
-                                if comment:
-                                    add_comment(report['id'], comment)
-                                save_data_to_file()
-                                st.session_state[f"manage_report_{search_key}"] = False
-                                st.success("Report updated!")
-                                st.rerun()
-                        with col2:
-                            if st.form_submit_button("Cancel"):
-                                st.session_state[f"manage_report_{search_key}"] = False
-                                st.rerun()
-                
-                st.divider()
-    
-    # Reports table with status management
-    st.header("📋 All Reports (Legacy View)")
-    
-    if st.session_state.reports:
-        # Search and filter options
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            search_term = st.text_input("🔍 Search reports", placeholder="Search by location, issue type, or name")
-        
-        with col2:
-            status_filter = st.selectbox("Filter by Status", ["All", "Received", "In Progress", "Resolved"])
-        
-        with col3:
-            issue_filter = st.selectbox("Filter by Issue Type", ["All"] + list(set([r['issue_type'] for r in st.session_state.reports])))
-        
-        # Filter reports based on search and filters
-        filtered_reports = st.session_state.reports.copy()
-        
-        if search_term:
-            filtered_reports = [r for r in filtered_reports if 
-                              search_term.lower() in r['location'].lower() or 
-                              search_term.lower() in r['issue_type'].lower() or 
-                              search_term.lower() in r['name'].lower()]
-        
-        if status_filter != "All":
-            filtered_reports = [r for r in filtered_reports if r['status'] == status_filter]
-        
-        if issue_filter != "All":
-            filtered_reports = [r for r in filtered_reports if r['issue_type'] == issue_filter]
-        
-        # Create DataFrame for display
-        df_data = []
-        for report in filtered_reports:
-            df_data.append({
-                'ID': report['id'],
-                'Name': report['name'],
-                'Issue Type': report['issue_type'],
-                'Location': report['location'],
-                'Status': report['status'],
-                'Date Reported': report['date_reported'],
-                'Assigned To': report['assigned_to'],
-                'Priority': report.get('priority', 'Medium')
-            })
-        
-        if df_data:
-            df = pd.DataFrame(df_data)
-            st.dataframe(df, use_container_width=True)
-            
-            # Show filtered count
-            st.info(f"Showing {len(filtered_reports)} of {len(st.session_state.reports)} reports")
-        else:
-            st.warning("No reports match your search criteria.")
-        
-        # Report management
-        st.header("🛠️ Manage Reports")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("Update Report Status")
-            report_id = st.selectbox("Select Report", 
-                                   [f"#{r['id']} - {r['issue_type']} - {r['location']}" 
-                                    for r in st.session_state.reports])
-            
-            selected_report = None
-            selected_id = None
-            
-            if report_id:
-                selected_id = int(report_id.split('#')[1].split(' - ')[0])
-                selected_report = next((r for r in st.session_state.reports if r['id'] == selected_id), None)
-                
-                if selected_report:
-                    # Display report details
-                    st.markdown(f"""
-                    <div class="report-card">
-                        <h4>Report #{selected_report['id']}</h4>
-                        <p><strong>Reporter:</strong> {selected_report['name']}</p>
-                        <p><strong>Contact:</strong> {selected_report['contact']}</p>
-                        <p><strong>Issue:</strong> {selected_report['issue_type']}</p>
-                        <p><strong>Location:</strong> {selected_report['location']}</p>
-                        <p><strong>Description:</strong> {selected_report['description']}</p>
-                        <p><strong>Date:</strong> {selected_report['date_reported']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Show photo if available
-                    if selected_report.get('photo'):
-                        try:
-                            photo_data = base64.b64decode(selected_report['photo'])
-                            st.image(photo_data, caption="Report Photo", use_column_width=True)
-                        except:
-                            st.warning("Could not display photo")
-                    
-                    new_status = st.selectbox("Update Status", 
-                                            ["Received", "In Progress", "Resolved"],
-                                            index=["Received", "In Progress", "Resolved"].index(selected_report['status']))
-                    assigned_to = st.text_input("Assign To", value=selected_report['assigned_to'])
-                    priority = st.selectbox("Priority", 
-                                          ["Low", "Medium", "High", "Emergency"],
-                                          index=["Low", "Medium", "High", "Emergency"].index(selected_report.get('priority', 'Medium')))
-                    
-                    if st.button("Update Report", use_container_width=True):
-                        selected_report['status'] = new_status
-                        selected_report['assigned_to'] = assigned_to
-                        selected_report['priority'] = priority
-                        save_data_to_file()  # Save changes
-                        st.success("Report updated successfully!")
-                        st.rerun()
-        
-        with col2:
-            st.subheader("Add Comment")
-            if selected_report:
-                comment = st.text_area("Add comment/update", placeholder="Enter your comment or status update...")
-                if st.button("Add Comment", use_container_width=True):
-                    if comment:
-                        add_comment(selected_id, comment)
-                        save_data_to_file()  # Save changes
-                        st.success("Comment added!")
-                        st.rerun()
-                    else:
-                        st.warning("Please enter a comment")
-        
-        # Display comments for selected report
-        if selected_report and selected_report['comments']:
-            st.subheader("💬 Comments & Updates")
-            for comment in reversed(selected_report['comments']):
-                with st.container():
-                    st.markdown(f"""
-                    <div class="report-card">
-                        <strong>{comment['author']}</strong> - <em>{comment['timestamp']}</em><br>
-                        {comment['text']}
-                    </div>
-                    """, unsafe_allow_html=True)
-        
-        # Export functionality
-        st.header("📊 Export & Backup")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if st.button("📥 Export Reports to CSV", use_container_width=True):
-                if st.session_state.reports:
-                    df_export = pd.DataFrame(st.session_state.reports)
-                    csv = df_export.to_csv(index=False)
-                    st.download_button(
-                        label="Download CSV",
-                        data=csv,
-                        file_name=f"reports_export_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime="text/csv"
-                    )
-                else:
-                    st.warning("No reports to export")
-        
-        with col2:
-            if st.button("💾 Backup Data", use_container_width=True):
-                save_data_to_file()
-                st.success("Data backed up successfully!")
-    
-    else:
-        st.info("No reports submitted yet.")
-
-if __name__ == "__main__":
+import streamlit as st
+import pandas as pd
+import datetime
+import json
+import math
+from pathlib import Path
+import base64
+import io
+from PIL import Image
+
+from communityfix import config, metrics
+from communityfix.analytics import sla_days
+from communityfix.bulk_import import AlreadyImported, import_rows, read_rows, source_key, write_rejects
+from communityfix.charts import hotspot_figure, progress_figures
+from communityfix.export import EXPORT_FORMATS, export_reports
+from communityfix.jobs import QueueFull, queue_photo_processing, start_worker_pool
+from communityfix.metrics import count, timed
+from communityfix.records import DATE_FORMAT, parse_timestamp
+from communityfix.report_index import ISSUE_TYPES, PRIORITIES
+from communityfix.service import ReportService, ValidationError, validate_report
+from communityfix.triage import due_ts
+
+# Custom CSS for enhanced styling
+CUSTOM_CSS = """
+<style>
+    .main-header {
+        background: linear-gradient(90deg, #1f4e79, #2e7d32);
+        padding: 1rem;
+        border-radius: 10px;
+        color: white;
+        text-align: center;
+        margin-bottom: 2rem;
+    }
+    .metric-card {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        padding: 1rem;
+        border-radius: 10px;
+        color: white;
+        text-align: center;
+        margin: 0.5rem 0;
+    }
+    .emergency-card {
+        background: linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%);
+        padding: 1rem;
+        border-radius: 10px;
+        color: white;
+        text-align: center;
+        margin: 0.5rem 0;
+    }
+    .success-card {
+        background: linear-gradient(135deg, #00b894 0%, #00a085 100%);
+        padding: 1rem;
+        border-radius: 10px;
+        color: white;
+        text-align: center;
+        margin: 0.5rem 0;
+    }
+    .report-card {
+        background: #f8f9fa;
+        padding: 1rem;
+        border-radius: 10px;
+        border-left: 4px solid #007bff;
+        margin: 1rem 0;
+    }
+    .status-received { border-left-color: #ffc107; }
+    .status-progress { border-left-color: #17a2b8; }
+    .status-resolved { border-left-color: #28a745; }
+    .sidebar .sidebar-content {
+        background: linear-gradient(180deg, #1f4e79, #2e7d32);
+    }
+    .stButton > button {
+        background: linear-gradient(90deg, #007bff, #0056b3);
+        color: white;
+        border: none;
+        border-radius: 5px;
+        padding: 0.5rem 1rem;
+        font-weight: bold;
+    }
+    .stButton > button:hover {
+        background: linear-gradient(90deg, #0056b3, #004085);
+        transform: translateY(-2px);
+        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
+    }
+</style>
+"""
+
+def configure_page():
+    """Page setup and styling; must run before anything else is drawn"""
+    st.set_page_config(
+        page_title="CommUnityFix - Barangay Union",
+        page_icon="🏘️",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+def init_session_state():
+    """Per-session defaults"""
+    if 'admin_logged_in' not in st.session_state:
+        st.session_state.admin_logged_in = False
+    if 'admin_password' not in st.session_state:
+        st.session_state.admin_password = "admin123"  # Default password
+
+# Data functions (the logic lives in communityfix/service.py)
+@st.cache_resource
+def get_service():
+    """Report service (storage, photos and report repository) shared by all sessions"""
+    return ReportService()
+
+@st.cache_resource
+def get_job_queue():
+    """Background jobs (photos, compaction, duplicate index) shared by all sessions"""
+    return start_worker_pool(get_service())
+
+def show_report_photo(report, thumbnail=False):
+    """Show a report's photo, read straight from the photo store
+
+    List views pass ``thumbnail=True`` to show the small version only.
+    """
+    try:
+        if report.get('pending_photo') and not report.get('photo_ref'):
+            # Resized in the background (see communityfix/jobs.py)
+            st.caption("📷 Photo is being processed")
+        elif thumbnail:
+            if report.get('thumb_ref'):
+                count('photos.shown')
+                st.image(str(get_service().photo_store.path(report['thumb_ref'])), width=config.THUMBNAIL_DISPLAY_WIDTH)
+        elif report.get('photo_ref'):
+            count('photos.shown')
+            st.image(str(get_service().photo_store.path(report['photo_ref'])), caption="Report Photo", use_column_width=True)
+        elif report.get('photo'):
+            # Inline photo from before the photo store (see communityfix/photos.py)
+            count('photos.shown')
+            count('photos.decoded')
+            st.image(base64.b64decode(report['photo']), caption="Report Photo", use_column_width=True)
+    except Exception:
+        st.warning("Could not display photo")
+
+def backup_data():
+    """Copy the stored reports into the backup directory"""
+    try:
+        backup_path = get_service().backup()
+        st.success(f"Data backed up to {backup_path}")
+    except Exception as e:
+        st.error(f"Error backing up data: {e}")
+
+def get_reports():
+    """Read-only tuple of all reports, as ReportRecords shared by all sessions"""
+    return get_service().reports()
+
+def get_report_index():
+    """Status, priority, issue-type and date buckets over all reports"""
+    return get_service().index
+
+def get_aggregates():
+    """Chart and metric counts over all reports"""
+    return get_service().aggregates
+
+def refresh_reports(force=False):
+    """Pick up changes other processes made to storage
+
+    Cheap when nothing changed: the repository only compares the storage
+    signature.
+    """
+    try:
+        with timed('app.refresh'):
+            get_service().refresh(force)
+    except Exception as e:
+        st.error(f"Error loading data: {e}")
+
+# Sample emergency contacts
+EMERGENCY_CONTACTS = {
+    "Barangay Hall": "123-4567",
+    "Police Station": "911",
+    "Fire Department": "911",
+    "Hospital Emergency": "911",
+    "Rescue Services": "123-4567"
+}
+
+# Sample tips for minor problems
+TIPS = [
+    "For minor garbage issues: Separate biodegradable from non-biodegradable waste",
+    "Small potholes: Mark the area with visible objects to alert others while waiting for repair",
+    "Streetlight issues: Note the exact location and pole number if available",
+    "Drainage problems: Clear visible debris if safe to do so",
+    "Graffiti: Document with photos for proper reporting"
+]
+
+def store_report_photo(photo):
+    """Store an uploaded photo; returns ``(photo_refs, pending_photo)``
+
+    With BACKGROUND_PHOTOS the upload is stored as it is and resized after
+    the report is saved (``pending_photo``); otherwise it is resized now.
+    """
+    if photo is None:
+        return (None, None), None
+    try:
+        if config.BACKGROUND_PHOTOS:
+            return (None, None), get_service().store_upload(photo.getvalue())
+        # Resize, then store on disk once; the report only keeps references
+        return get_service().store_photo(photo.getvalue()), None
+    except Exception as e:
+        st.warning(f"Could not process photo: {e}")
+        return (None, None), None
+
+def find_duplicate_reports(issue_type, location, description, photo_refs=(None, None), pending_photo=None):
+    """Open reports that look like the same problem: [(report, score)]"""
+    if config.DUPLICATE_ACTION == "off":
+        return []
+    try:
+        return get_service().find_duplicates(issue_type, location, description, photo_refs, pending_photo)
+    except Exception:
+        # The check only saves work; never block a report because of it
+        return []
+
+@timed('app.save_report')
+def save_report(name, contact, issue_type, location, description, photo_refs=(None, None), priority="Medium",
+                pending_photo=None):
+    """Save a new report; returns its ID (None if saving failed)"""
+    try:
+        report_id = get_service().submit_report(name, contact, issue_type, location, description, photo_refs,
+                                                priority, pending_photo)
+        if pending_photo:
+            queue_photo_processing(get_job_queue(), get_service(), report_id)
+        return report_id
+    except ValidationError as e:
+        for error in e.errors:
+            st.error(error)
+    except Exception as e:
+        st.error(f"Error saving data: {e}")
+    return None
+
+def link_report(report_id, name, contact, issue_type, location, description, photo_refs=(None, None),
+                priority="Medium", pending_photo=None):
+    """Add a submission to an existing report; returns True if it was saved"""
+    try:
+        get_service().link_report(report_id, name, contact, issue_type, location, description, photo_refs,
+                                  priority, pending_photo)
+        if pending_photo:
+            queue_photo_processing(get_job_queue(), get_service(), report_id)
+        return True
+    except Exception as e:
+        st.error(f"Error saving data: {e}")
+        return False
+
+def add_comment(report_id, comment_text, author="Admin"):
+    """Add a comment to a report"""
+    try:
+        get_service().add_comment(report_id, comment_text, author)
+    except Exception as e:
+        st.error(f"Error saving data: {e}")
+
+def bulk_update_reports(report_ids, status=None, priority=None, assigned_to=None, comment=None, author="Admin"):
+    """Apply one update to many reports with a single save; returns how many changed"""
+    try:
+        return len(get_service().update_reports(report_ids, status, priority, assigned_to, comment, author))
+    except Exception as e:
+        st.error(f"Error saving data: {e}")
+        return 0
+
+def update_report(report, status, priority, assigned_to, comment=None, author="Admin"):
+    """Apply an admin update (and optional comment) to a report and save it"""
+    try:
+        get_service().update_report(report['id'], status, priority, assigned_to, comment, author)
+    except Exception as e:
+        st.error(f"Error saving data: {e}")
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def build_progress_charts(chart_data):
+    """Build the progress figures from aggregated counts
+
+    Cached on the counts themselves, so the figures are only rebuilt when
+    the data behind them changes, and sessions with the same data share them.
+    """
+    with timed('charts.build'):
+        return progress_figures(chart_data)
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def build_hotspot_figure(heatmap_data):
+    """Build the hotspot map from per-cell counts, cached like the progress charts"""
+    with timed('charts.build'):
+        return hotspot_figure(heatmap_data)
+
+@timed('app.create_progress_charts')
+def create_progress_charts():
+    """Create various charts for progress tracking"""
+    if not get_aggregates().status_totals():
+        return None, None, None, None
+    
+    return build_progress_charts(get_aggregates().chart_data())
+
+@timed('app.organize_reports_by_status')
+def organize_reports_by_status():
+    """Organize reports by status for better admin management"""
+    if not get_reports():
+        return {}
+    return get_service().organize_by_status()
+
+@timed('app.organize_reports_by_priority')
+def organize_reports_by_priority():
+    """Organize reports by priority level"""
+    if not get_reports():
+        return {}
+    return get_service().organize_by_priority()
+
+@timed('app.organize_reports_by_date')
+def organize_reports_by_date():
+    """Organize reports by date (Today, This Week, This Month, Older)"""
+    if not get_reports():
+        return {}
+    return get_service().organize_by_date(datetime.datetime.now().date())
+
+@timed('app.organize_reports_by_issue_type')
+def organize_reports_by_issue_type():
+    """Organize reports by issue type"""
+    if not get_reports():
+        return {}
+    return get_service().organize_by_issue_type()
+
+@timed('app.organize_reports_by_location')
+def organize_reports_by_location():
+    """Organize reports by the place their location names"""
+    if not get_reports():
+        return {}
+    return get_service().organize_by_location()
+
+def saved_search_results():
+    """Results of the session's last search, re-run only when the data changed
+
+    Results are kept with the repository version they were computed at, so
+    a rerun with unchanged data reuses them and any change (by this or
+    another session) brings them up to date.
+    """
+    criteria = st.session_state.get('search_criteria')
+    if not criteria:
+        return []
+    key = (get_service().repository.version, criteria)
+    cached = st.session_state.get('search_results')
+    if cached is None or cached[0] != key:
+        cached = st.session_state.search_results = (key, get_service().find_reports(**criteria))
+    return cached[1]
+
+def saved_archive_results():
+    """Archived reports matching the session's last search, if it included the archive
+
+    Cached like ``saved_search_results``, until the archive changes.
+    """
+    criteria = st.session_state.get('search_criteria')
+    if not criteria or not st.session_state.get('search_archive'):
+        return []
+    key = (get_service().archive.signature(), criteria)
+    cached = st.session_state.get('archive_results')
+    if cached is None or cached[0] != key:
+        with timed('app.search_archive'):
+            cached = st.session_state.archive_results = (key, get_service().find_archived_reports(**criteria))
+    return cached[1]
+
+def show_export_button(label, key, file_prefix, export=None):
+    """Format picker plus a button that prepares a download of all reports
+
+    The export is written in chunks to a temporary file (see
+    communityfix/export.py) without photos, instead of building a DataFrame,
+    so only the finished (possibly compressed) file is held for the download.
+    ``export`` makes the file for a format instead (e.g. archived reports).
+    """
+    export_format = st.selectbox("Export format", list(EXPORT_FORMATS), key=f"{key}_format",
+                                 label_visibility="collapsed")
+    if st.button(label, key=key, use_container_width=True):
+        if export is not None or get_reports():
+            extension, mime = EXPORT_FORMATS[export_format]
+            with (export or get_service().export)(export_format) as export_file:
+                st.download_button(
+                    label=f"Download {export_format}",
+                    data=export_file.read(),
+                    file_name=f"{file_prefix}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+                    mime=mime,
+                    key=f"{key}_download"
+                )
+        else:
+            st.warning("No reports to export")
+
+def turn_page(page_key, step):
+    """Button callback: runs before the rerun, so the controls draw the new page"""
+    st.session_state[page_key] = st.session_state.get(page_key, 0) + step
+
+def paginate(items, key):
+    """Show page controls and return the items on the current page
+
+    The current page is kept in session state under ``key`` so each list
+    pages independently. Page size comes from config.REPORTS_PAGE_SIZE.
+    """
+    page_size = config.REPORTS_PAGE_SIZE
+    page_count = max(1, math.ceil(len(items) / page_size))
+    page_key = f"page_{key}"
+    page = max(0, min(st.session_state.get(page_key, 0), page_count - 1))
+    st.session_state[page_key] = page
+    
+    if page_count > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("◀ Previous", key=f"prev_{key}", disabled=page == 0,
+                      on_click=turn_page, args=(page_key, -1))
+        with col3:
+            st.button("Next ▶", key=f"next_{key}", disabled=page >= page_count - 1,
+                      on_click=turn_page, args=(page_key, 1))
+        with col2:
+            start = page * page_size
+            st.caption(f"Page {page + 1} of {page_count} (reports {start + 1}-{min(start + page_size, len(items))} of {len(items)})")
+    
+    start = page * page_size
+    return items[start:start + page_size]
+
+def describe_due(report, now_ts):
+    """How long until (or since) a report's target resolution time"""
+    seconds = due_ts(report) - now_ts
+    hours = abs(seconds) // 3600
+    span = f"{hours // 24} days" if hours >= 48 else f"{hours} hours"
+    return f"⏰ Overdue by {span}" if seconds < 0 else f"Due in {span}"
+
+@timed('app.show_triage_queue')
+def show_triage_queue():
+    """The open reports to work on next, most urgent and longest waiting first"""
+    st.header("🚦 Next Up")
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        priority = st.radio("Priority", ["All"] + list(PRIORITIES), horizontal=True,
+                            label_visibility="collapsed", key="triage_priority")
+    with col2:
+        shown = st.selectbox("Show", [5, 10, 25], label_visibility="collapsed", key="triage_count")
+    priority = None if priority == "All" else priority
+    
+    triage = get_service().triage
+    now_ts = parse_timestamp(datetime.datetime.now().strftime(DATE_FORMAT))
+    st.caption(f"{triage.count(priority)} open reports, {triage.count_overdue(now_ts, priority)} past their target resolution time")
+    
+    priority_emoji = {'Low': '🟢', 'Medium': '🟡', 'High': '🟠', 'Emergency': '🔴'}
+    for report in triage.next(shown, priority):
+        col1, col2, col3 = st.columns([4, 2, 1])
+        with col1:
+            st.write(f"**{priority_emoji.get(report['priority'], '⚪')} Report #{report['id']}** - {report['issue_type']} ({report['status']})")
+            st.write(f"📍 {report['location']} | 📅 {report['date_reported']}")
+        with col2:
+            st.write(describe_due(report, now_ts))
+            st.write(f"**Assigned:** {report['assigned_to']}")
+        with col3:
+            if report['status'] == 'Received':
+                if st.button("▶️ Start", key=f"triage_start_{report['id']}", help="Mark as In Progress"):
+                    update_report(report, 'In Progress', report['priority'], report['assigned_to'])
+                    st.rerun()
+            elif st.button("✅ Resolve", key=f"triage_resolve_{report['id']}", help="Mark as Resolved"):
+                update_report(report, 'Resolved', report['priority'], report['assigned_to'])
+                st.rerun()
+
+@timed('app.display_organized_reports')
+def display_organized_reports(organized_reports, title, show_actions=True, context=""):
+    """Display organized reports in a clean format"""
+    st.subheader(title)
+    
+    if not organized_reports:
+        st.info("No reports in this category.")
+        return
+    
+    for category, reports in organized_reports.items():
+        if reports:  # Only show categories that have reports
+            with st.expander(f"{category} ({len(reports)} reports)", expanded=False):
+                # Only the current page of each category is rendered
+                for report in paginate(reports, f"{context}_{category}"):
+                    # Create a card-like display for each report
+                    status_color = {
+                        'Received': '🟡',
+                        'In Progress': '🔵', 
+                        'Resolved': '🟢'
+                    }.get(report['status'], '⚪')
+                    
+                    priority_emoji = {
+                        'Low': '🟢', 'Medium': '🟡', 'High': '🟠', 'Emergency': '🔴'
+                    }.get(report.get('priority', 'Medium'), '⚪')
+                    
+                    col1, col2, col3 = st.columns([4, 2, 1])
+                    
+                    with col1:
+                        st.write(f"**{status_color} Report #{report['id']}** - {report['issue_type']}")
+                        st.write(f"📍 {report['location']}")
+                        st.write(f"👤 {report['name']} - {report['date_reported']}")
+                        st.write(f"📝 {report['description'][:100]}{'...' if len(report['description']) > 100 else ''}")
+                        if report.get('linked_reports'):
+                            st.write(f"👥 {len(report['linked_reports'])} more residents reported this")
+                        show_report_photo(report, thumbnail=True)
+                    
+                    with col2:
+                        st.write(f"**Status:** {report['status']}")
+                        st.write(f"**Priority:** {priority_emoji} {report.get('priority', 'Medium')}")
+                        st.write(f"**Assigned:** {report['assigned_to']}")
+                    
+                    with col3:
+                        if show_actions:
+                            # Make keys unique by adding context
+                            unique_key_base = f"{context}_{category}_{report['id']}"
+                            if st.button(f"Quick Update", key=f"quick_{unique_key_base}"):
+                                st.session_state[f"quick_update_{unique_key_base}"] = True
+                            
+                            if st.button(f"View Full", key=f"full_{unique_key_base}"):
+                                st.session_state[f"view_full_{unique_key_base}"] = True
+                    
+                    # Quick update form
+                    unique_key_base = f"{context}_{category}_{report['id']}"
+                    if st.session_state.get(f"quick_update_{unique_key_base}", False):
+                        with st.form(f"quick_form_{unique_key_base}"):
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                new_status = st.selectbox("Status", 
+                                    ["Received", "In Progress", "Resolved"],
+                                    index=["Received", "In Progress", "Resolved"].index(report['status']),
+                                    key=f"status_{unique_key_base}")
+                            with col2:
+                                new_priority = st.selectbox("Priority",
+                                    ["Low", "Medium", "High", "Emergency"],
+                                    index=["Low", "Medium", "High", "Emergency"].index(report.get('priority', 'Medium')),
+                                    key=f"priority_{unique_key_base}")
+                            
+                            assigned_to = st.text_input("Assign To", value=report['assigned_to'], key=f"assign_{unique_key_base}")
+                            
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                if st.form_submit_button("Update"):
+                                    update_report(report, new_status, new_priority, assigned_to)
+                                    st.session_state[f"quick_update_{unique_key_base}"] = False
+                                    st.success("Report updated!")
+                                    st.rerun()
+                            with col2:
+                                if st.form_submit_button("Cancel"):
+                                    st.session_state[f"quick_update_{unique_key_base}"] = False
+                                    st.rerun()
+                    
+                    # Full view
+                    if st.session_state.get(f"view_full_{unique_key_base}", False):
+                        with st.expander(f"Full Report #{report['id']} Details", expanded=True):
+                            st.write(f"**Reporter:** {report['name']}")
+                            st.write(f"**Contact:** {report['contact']}")
+                            st.write(f"**Issue Type:** {report['issue_type']}")
+                            st.write(f"**Location:** {report['location']}")
+                            st.write(f"**Description:** {report['description']}")
+                            st.write(f"**Date Reported:** {report['date_reported']}")
+                            st.write(f"**Status:** {report['status']}")
+                            st.write(f"**Priority:** {report.get('priority', 'Medium')}")
+                            st.write(f"**Assigned To:** {report['assigned_to']}")
+                            
+                            # Show photo if available
+                            show_report_photo(report)
+                            
+                            # Residents who reported the same problem later
+                            if report.get('linked_reports'):
+                                st.write("**Also Reported By:**")
+                                for linked in report['linked_reports']:
+                                    st.write(f"👥 **{linked['name']}** ({linked['contact']}, {linked['timestamp']}): {linked['description']}")
+                                    show_report_photo(linked, thumbnail=True)
+                            
+                            # Show comments
+                            if report.get('comments'):
+                                st.write("**Comments & Updates:**")
+                                for comment in reversed(report['comments']):
+                                    st.write(f"💬 **{comment['author']}** ({comment['timestamp']}): {comment['text']}")
+                            
+                            if st.button(f"Close Full View", key=f"close_full_{unique_key_base}"):
+                                st.session_state[f"view_full_{unique_key_base}"] = False
+                                st.rerun()
+                    
+                    st.divider()
+
+def main():
+    # Time the whole rerun; the admin diagnostics panel shows the previous one
+    trace = metrics.start_trace("rerun")
+    try:
+        show_page(trace)
+    finally:
+        metrics.finish_trace()
+        st.session_state.last_trace = trace.to_dict()
+
+def show_page(trace):
+    configure_page()
+    init_session_state()
+    # Pick up outside changes on every rerun
+    refresh_reports()
+    # Start the background workers with the first session
+    get_job_queue()
+    
+    # Main header
+    st.markdown("""
+    <div class="main-header">
+        <h1>🏘️ CommUnityFix</h1>
+        <h3>Barangay Union - Community Issue Reporting System</h3>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Sidebar navigation
+    st.sidebar.title("🏘️ CommUnityFix")
+    st.sidebar.markdown("**Barangay Union**")
+    st.sidebar.markdown("---")
+    
+    if not st.session_state.admin_logged_in:
+        page = st.sidebar.radio("Navigation", ["Report Issue", "Emergency Contacts", "Progress Dashboard", "Admin Login"])
+    else:
+        page = st.sidebar.radio("Navigation", ["Report Issue", "Emergency Contacts", "Progress Dashboard", "Admin Dashboard", "Logout"])
+    trace.name = page
+    
+    # Report Issue Page
+    if page == "Report Issue":
+        show_report_page()
+    
+    # Emergency Contacts Page
+    elif page == "Emergency Contacts":
+        show_contacts_page()
+    
+    # Progress Dashboard Page
+    elif page == "Progress Dashboard":
+        show_progress_dashboard()
+    
+    # Admin Login Page
+    elif page == "Admin Login":
+        show_admin_login()
+    
+    # Admin Dashboard
+    elif page == "Admin Dashboard":
+        if st.session_state.admin_logged_in:
+            show_admin_dashboard()
+        else:
+            st.warning("Please log in first")
+            show_admin_login()
+    
+    # Logout
+    elif page == "Logout":
+        st.session_state.admin_logged_in = False
+        st.success("Logged out successfully!")
+        st.rerun()
+
+def show_report_page():
+    st.title("📝 Report a Community Issue")
+    st.markdown("Use this form to report problems in our community. Your reports help make Barangay Union better!")
+    
+    # Add some helpful information
+    with st.expander("ℹ️ Before Reporting"):
+        st.write("""
+        - **Take a photo** if possible to help us understand the issue better
+        - **Be specific** about the location (street names, landmarks, house numbers)
+        - **Describe the severity** and any safety concerns
+        - **Include your contact** so we can follow up if needed
+        """)
+    
+    with st.form("report_form"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            name = st.text_input("Your Name *", placeholder="Enter your full name")
+            contact = st.text_input("Contact Number *", placeholder="09XXXXXXXXX", help="Include area code if applicable")
+            issue_type = st.selectbox("Issue Type *", ISSUE_TYPES)
+            priority = st.selectbox(
+                "Priority Level",
+                ["Low", "Medium", "High", "Emergency"],
+                index=1,
+                help="Emergency: Immediate danger to life/property"
+            )
+        
+        with col2:
+            location = st.text_input("Location *", placeholder="Ex: Near Barangay Hall, Main Street")
+            description = st.text_area("Description *", placeholder="Please describe the issue in detail...", height=100)
+            photo = st.file_uploader("Upload Photo (Optional)", type=['png', 'jpg', 'jpeg'], help="Maximum file size: 5MB")
+            
+            # Show photo preview if uploaded
+            if photo is not None:
+                try:
+                    image = Image.open(photo)
+                    st.image(image, caption="Photo Preview", use_column_width=True)
+                except Exception as e:
+                    st.warning(f"Could not preview image: {e}")
+        
+        st.markdown("**Required fields*")
+        submitted = st.form_submit_button("🚀 Submit Report", use_container_width=True)
+        
+        if submitted:
+            # Enhanced validation (shared with other front ends)
+            errors = validate_report(name, contact, issue_type, location, description)
+            
+            if errors:
+                for error in errors:
+                    st.error(error)
+            else:
+                photo_refs, pending_photo = store_report_photo(photo)
+                submission = {
+                    'name': name, 'contact': contact, 'issue_type': issue_type,
+                    'location': location, 'description': description,
+                    'photo_refs': photo_refs, 'priority': priority, 'pending_photo': pending_photo,
+                }
+                matches = find_duplicate_reports(issue_type, location, description, photo_refs, pending_photo)
+                if matches and config.DUPLICATE_ACTION == "link":
+                    if link_report(matches[0][0]['id'], **submission):
+                        show_linked_confirmation(matches[0][0])
+                elif matches:
+                    # Let the citizen decide (below the form)
+                    discard_pending_submission(keep=pending_photo)
+                    st.session_state.pending_submission = submission
+                    st.session_state.pending_matches = [report['id'] for report, _ in matches]
+                else:
+                    show_submitted_confirmation(save_report(**submission))
+    
+    if 'pending_submission' in st.session_state:
+        show_duplicate_choice()
+
+def show_submitted_confirmation(report_id):
+    """Tell the citizen their report was stored"""
+    if report_id is not None:
+        st.markdown(f"""
+        <div class="success-card">
+            <h3>✅ Report Submitted Successfully!</h3>
+            <p><strong>Report ID:</strong> #{report_id}</p>
+            <p>Thank you for helping improve our community!</p>
+        </div>
+        """, unsafe_allow_html=True)
+        st.info("📞 You can check the status of your report by contacting Barangay Hall or logging in as admin.")
+
+def show_linked_confirmation(report):
+    """Tell the citizen their report was added to an existing one"""
+    st.markdown(f"""
+    <div class="success-card">
+        <h3>✅ Added to Report #{report['id']}</h3>
+        <p>This problem was already reported and is <strong>{report['status']}</strong>. Your report has been added to it.</p>
+        <p>Thank you for helping improve our community!</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+def discard_pending_submission(keep=None):
+    """Drop a submission waiting for the citizen's choice, and its unprocessed photo (unless it is ``keep``)"""
+    submission = st.session_state.pop('pending_submission', None)
+    if submission and submission['pending_photo'] and submission['pending_photo'] != keep:
+        try:
+            get_service().discard_upload(submission['pending_photo'])
+        except Exception:
+            # Only frees disk space; never get in the citizen's way
+            pass
+
+def show_duplicate_choice():
+    """Offer the open reports that look like the pending submission"""
+    submission = st.session_state.pending_submission
+    matches = [get_report_index().get(report_id) for report_id in st.session_state.pending_matches]
+    matches = [report for report in matches if report is not None]
+    
+    st.warning("🔁 This problem may already have been reported. Is it one of these?")
+    for report in matches:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.write(f"**Report #{report['id']}** - {report['issue_type']} ({report['status']})")
+            st.write(f"📍 {report['location']} | 📅 {report['date_reported']}")
+            st.write(f"📝 {report['description'][:100]}{'...' if len(report['description']) > 100 else ''}")
+            show_report_photo(report, thumbnail=True)
+        with col2:
+            if st.button(f"➕ Add to #{report['id']}", key=f"link_to_{report['id']}"):
+                del st.session_state.pending_submission
+                if link_report(report['id'], **submission):
+                    show_linked_confirmation(report)
+                return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🆕 No, submit as a new report", key="submit_new_report", use_container_width=True):
+            del st.session_state.pending_submission
+            show_submitted_confirmation(save_report(**submission))
+    with col2:
+        if st.button("Cancel", key="cancel_pending_report", use_container_width=True):
+            discard_pending_submission()
+            st.rerun()
+
+def show_contacts_page():
+    st.title("📞 Emergency Contacts & Tips")
+    
+    st.header("🚨 Emergency Contacts")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        for service, number in list(EMERGENCY_CONTACTS.items())[:3]:
+            st.markdown(f"""
+            <div class="emergency-card">
+                <h4>{service}</h4>
+                <h2>{number}</h2>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    with col2:
+        for service, number in list(EMERGENCY_CONTACTS.items())[3:]:
+            st.markdown(f"""
+            <div class="emergency-card">
+                <h4>{service}</h4>
+                <h2>{number}</h2>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    st.header("🛠️ Tips for Minor Problems")
+    
+    for i, tip in enumerate(TIPS, 1):
+        st.markdown(f"""
+        <div class="report-card">
+            <strong>{i}.</strong> {tip}
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.header("🚨 Emergency Procedures")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        with st.expander("🏥 Medical Emergency", expanded=False):
+            st.write("""
+            **Immediate Actions:**
+            1. Call emergency services immediately (911)
+            2. Provide clear location details
+            3. Do not move injured person unless necessary
+            4. Have someone wait to guide emergency responders
+            5. Apply first aid if trained
+            """)
+        
+        with st.expander("🔥 Fire Emergency", expanded=False):
+            st.write("""
+            **Immediate Actions:**
+            1. Alert everyone in the area
+            2. Call fire department (911)
+            3. Use fire extinguisher if safe
+            4. Evacuate immediately if fire spreads
+            5. Meet at designated assembly point
+            """)
+    
+    with col2:
+        with st.expander("🌪️ Natural Disasters", expanded=False):
+            st.write("""
+            **General Guidelines:**
+            1. Stay informed through official channels
+            2. Follow evacuation orders immediately
+            3. Have emergency kit ready
+            4. Stay away from windows and doors
+            5. Check on neighbors if safe
+            """)
+        
+        with st.expander("🚨 Security Issues", expanded=False):
+            st.write("""
+            **Safety Measures:**
+            1. Call police immediately (911)
+            2. Do not confront suspicious persons
+            3. Lock doors and windows
+            4. Stay in safe location
+            5. Report to barangay officials
+            """)
+    
+    # Quick action buttons
+    st.header("⚡ Quick Actions")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        if st.button("📞 Call Emergency (911)", use_container_width=True):
+            st.info("Dial 911 for immediate emergency assistance")
+    
+    with col2:
+        if st.button("🏛️ Contact Barangay Hall", use_container_width=True):
+            st.info("Barangay Hall: 123-4567")
+    
+    with col3:
+        if st.button("📝 Report Issue", use_container_width=True):
+            st.info("Use the 'Report Issue' page to submit non-emergency problems")
+
+def show_progress_dashboard():
+    st.title("📊 Progress Dashboard")
+    st.markdown("Track the progress of community reports and get insights into issue resolution")
+    
+    # All-time counts: archived reports are included through the archive's rollups
+    status_totals = get_aggregates().status_totals()
+    if not status_totals:
+        st.info("No reports available yet. Submit some reports to see progress tracking!")
+        return
+    
+    # Key Metrics Section
+    st.header("📈 Key Metrics")
+    
+    report_index = get_report_index()
+    total_reports = sum(status_totals.values())
+    received = status_totals.get('Received', 0)
+    in_progress = status_totals.get('In Progress', 0)
+    resolved = status_totals.get('Resolved', 0)
+    
+    # Calculate additional metrics
+    resolution_rate = (resolved / total_reports * 100) if total_reports > 0 else 0
+    resolution_stats = get_aggregates().resolution_stats()
+    avg_resolution_time = resolution_stats['mean']
+    
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    with col1:
+        st.metric("Total Reports", total_reports, delta=None)
+    with col2:
+        st.metric("Resolution Rate", f"{resolution_rate:.1f}%", delta=f"{resolved} resolved")
+    with col3:
+        st.metric("Avg Resolution Time", f"{avg_resolution_time:.1f} days", delta=f"median {resolution_stats['p50']:.1f} days",
+                  delta_color="off", help="From submission until the report was marked Resolved")
+    with col4:
+        st.metric("In Progress", in_progress, delta=f"{in_progress/total_reports*100:.1f}%" if total_reports > 0 else "0%")
+    with col5:
+        st.metric("Pending", received, delta=f"{received/total_reports*100:.1f}%" if total_reports > 0 else "0%")
+    
+    archived = len(get_service().archive)
+    if archived:
+        st.caption(f"Includes {archived} older resolved reports kept in the archive")
+    
+    # Charts Section
+    st.header("📊 Visual Analytics")
+    
+    # Create charts
+    fig_pie, fig_bar, fig_timeline, fig_resolution = create_progress_charts()
+    
+    if fig_pie and fig_bar and fig_timeline:
+        # First row - Status and Issue Type
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.plotly_chart(fig_pie, use_container_width=True)
+        
+        with col2:
+            st.plotly_chart(fig_bar, use_container_width=True)
+        
+        # Second row - Timeline
+        st.plotly_chart(fig_timeline, use_container_width=True)
+        
+        # Third row - Resolution Time (if available)
+        if fig_resolution:
+            st.plotly_chart(fig_resolution, use_container_width=True)
+    
+    # Hotspots Section, from the per-place and per-cell counts
+    st.header("🗺️ Hotspots")
+    open_only = st.toggle("Open reports only", value=True, key="hotspots_open_only")
+    places = get_service().places
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        fig_hotspots = build_hotspot_figure(places.heatmap_data(open_only))
+        if fig_hotspots:
+            st.plotly_chart(fig_hotspots, use_container_width=True)
+        else:
+            st.info("No reports at places with map coordinates yet.")
+    with col2:
+        st.write("**Busiest places**")
+        hotspots = places.hotspots(10, open_only)
+        for name, total in hotspots:
+            st.write(f"📍 {name}: **{total}**")
+        if not hotspots:
+            st.write("No reports matched to a place yet.")
+    
+    # Recent Activity Section
+    st.header("🕒 Recent Activity")
+    
+    # Get recent reports (last 10)
+    recent_reports = get_service().recent(10)
+    
+    for report in recent_reports:
+        status_color = {
+            'Received': '🟡',
+            'In Progress': '🔵', 
+            'Resolved': '🟢'
+        }.get(report['status'], '⚪')
+        
+        with st.container():
+            col1, col2, col3 = st.columns([3, 2, 1])
+            
+            with col1:
+                st.write(f"**{status_color} Report #{report['id']}** - {report['issue_type']}")
+                st.write(f"📍 {report['location']}")
+                st.write(f"👤 {report['name']} - {report['date_reported']}")
+                show_report_photo(report, thumbnail=True)
+            
+            with col2:
+                st.write(f"**Status:** {report['status']}")
+                st.write(f"**Assigned:** {report['assigned_to']}")
+                if report.get('priority'):
+                    priority_emoji = {'Low': '🟢', 'Medium': '🟡', 'High': '🟠', 'Emergency': '🔴'}
+                    st.write(f"**Priority:** {priority_emoji.get(report['priority'], '⚪')} {report['priority']}")
+            
+            with col3:
+                progress_key = f"progress_view_{report['id']}"
+                if st.button(f"View Details", key=progress_key):
+                    st.session_state[f"show_report_{progress_key}"] = True
+            
+            # Show report details if requested
+            if st.session_state.get(f"show_report_{progress_key}", False):
+                with st.expander(f"Report #{report['id']} Details", expanded=True):
+                    st.write(f"**Description:** {report['description']}")
+                    st.write(f"**Contact:** {report['contact']}")
+                    
+                    # Show photo if available
+                    show_report_photo(report)
+                    
+                    # Show comments
+                    if report.get('comments'):
+                        st.write("**Comments & Updates:**")
+                        for comment in reversed(report['comments']):
+                            st.write(f"💬 **{comment['author']}** ({comment['timestamp']}): {comment['text']}")
+                    
+                    if st.button(f"Close Details", key=f"close_{progress_key}"):
+                        st.session_state[f"show_report_{progress_key}"] = False
+                        st.rerun()
+            
+            st.divider()
+    
+    # Issue Type Analysis
+    st.header("🔍 Issue Analysis")
+    
+    # Issue type breakdown, kept up to date by the aggregates
+    issue_analysis = get_aggregates().issue_analysis()
+    
+    # Display issue analysis
+    for issue_type, stats in issue_analysis.items():
+        resolution_rate = (stats['resolved'] / stats['total'] * 100) if stats['total'] > 0 else 0
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric(f"{issue_type}", stats['total'])
+        with col2:
+            st.metric("Resolved", stats['resolved'], f"{resolution_rate:.1f}%")
+        with col3:
+            st.metric("In Progress", stats['in_progress'])
+        with col4:
+            st.metric("Pending", stats['received'])
+        
+        # Progress bar
+        progress = resolution_rate / 100
+        st.progress(progress)
+        st.write(f"Resolution Progress: {resolution_rate:.1f}%")
+        sla_compliance = get_aggregates().sla_compliance(issue_type)
+        if sla_compliance is not None:
+            issue_stats = get_aggregates().resolution_stats(issue_type)
+            st.caption(f"Target: {sla_days(issue_type)} days | {sla_compliance * 100:.0f}% resolved on time | "
+                       f"median {issue_stats['p50']:.1f} days, 90th percentile {issue_stats['p90']:.1f} days")
+        st.divider()
+    
+    # Performance Insights
+    st.header("💡 Performance Insights")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("📊 Quick Stats")
+        st.write(f"• **Most Common Issue:** {max(issue_analysis.keys(), key=lambda x: issue_analysis[x]['total']) if issue_analysis else 'N/A'}")
+        st.write(f"• **Best Resolved Issue:** {max(issue_analysis.keys(), key=lambda x: issue_analysis[x]['resolved']/issue_analysis[x]['total'] if issue_analysis[x]['total'] > 0 else 0) if issue_analysis else 'N/A'}")
+        now = datetime.datetime.now()
+        st.write(f"• **Total Reports This Month:** {report_index.count_in_month(now.year, now.month)}")
+        if resolution_stats['count']:
+            st.write(f"• **90% of Issues Resolved Within:** {resolution_stats['p90']:.1f} days")
+        untimed = get_aggregates().untimed_resolved()
+        if untimed:
+            st.caption(f"{untimed} resolved reports predate resolution tracking and are not included in resolution times.")
+    
+    with col2:
+        st.subheader("🎯 Recommendations")
+        if resolution_rate < 50:
+            st.warning("⚠️ Resolution rate is below 50%. Consider increasing resources for faster resolution.")
+        elif resolution_rate < 80:
+            st.info("💡 Good progress! Aim for 80%+ resolution rate.")
+        else:
+            st.success("🎉 Excellent resolution rate! Keep up the great work!")
+        
+        if avg_resolution_time > 7:
+            st.warning("⚠️ Average resolution time is over a week. Consider streamlining processes.")
+        elif avg_resolution_time > 3:
+            st.info("💡 Resolution time is acceptable but could be improved.")
+        else:
+            st.success("🎉 Great response time! Issues are being resolved quickly.")
+
+def show_admin_login():
+    st.title("🔐 Admin Login")
+    
+    with st.form("login_form"):
+        password = st.text_input("Password", type="password")
+        login_btn = st.form_submit_button("Login")
+        
+        if login_btn:
+            if password == st.session_state.admin_password:
+                st.session_state.admin_logged_in = True
+                st.success("Login successful! Redirecting to dashboard...")
+                st.rerun()
+            else:
+                st.error("Incorrect password!")
+
+def show_admin_dashboard():
+    st.title("📊 Admin Dashboard")
+    st.markdown("Welcome to the Admin Control Panel - Manage and organize all community reports efficiently")
+    
+    # Statistics
+    report_index = get_report_index()
+    total_reports = len(report_index)
+    received = report_index.count_status('Received')
+    in_progress = report_index.count_status('In Progress')
+    resolved = report_index.count_status('Resolved')
+    
+    # Calculate resolution rate
+    resolution_rate = (resolved / total_reports * 100) if total_reports > 0 else 0
+    
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.markdown(f"""
+        <div class="metric-card">
+            <h3>Total Reports</h3>
+            <h1>{total_reports}</h1>
+        </div>
+        """, unsafe_allow_html=True)
+    with col2:
+        st.markdown(f"""
+        <div class="metric-card">
+            <h3>Received</h3>
+            <h1>{received}</h1>
+        </div>
+        """, unsafe_allow_html=True)
+    with col3:
+        st.markdown(f"""
+        <div class="metric-card">
+            <h3>In Progress</h3>
+            <h1>{in_progress}</h1>
+        </div>
+        """, unsafe_allow_html=True)
+    with col4:
+        st.markdown(f"""
+        <div class="metric-card">
+            <h3>Resolved</h3>
+            <h1>{resolved}</h1>
+        </div>
+        """, unsafe_allow_html=True)
+    with col5:
+        st.markdown(f"""
+        <div class="metric-card">
+            <h3>Resolution Rate</h3>
+            <h1>{resolution_rate:.1f}%</h1>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    show_triage_queue()
+    
+    # Organization Options
+    st.header("🗂️ Organize Reports")
+    
+    # Only the selected organization is built (st.tabs would render all four every rerun)
+    organize_view = st.radio("Organize by", ["📊 By Status", "⚡ By Priority", "📅 By Date", "🏷️ By Issue Type", "📍 By Location"],
+                             horizontal=True, label_visibility="collapsed", key="organize_view")
+    
+    if organize_view == "📊 By Status":
+        organized_by_status = organize_reports_by_status()
+        display_organized_reports(organized_by_status, "Reports Organized by Status", context="status")
+    
+    elif organize_view == "⚡ By Priority":
+        organized_by_priority = organize_reports_by_priority()
+        display_organized_reports(organized_by_priority, "Reports Organized by Priority", context="priority")
+    
+    elif organize_view == "📅 By Date":
+        organized_by_date = organize_reports_by_date()
+        display_organized_reports(organized_by_date, "Reports Organized by Date", context="date")
+    
+    elif organize_view == "🏷️ By Issue Type":
+        organized_by_type = organize_reports_by_issue_type()
+        display_organized_reports(organized_by_type, "Reports Organized by Issue Type", context="type")
+    
+    elif organize_view == "📍 By Location":
+        organized_by_location = organize_reports_by_location()
+        display_organized_reports(organized_by_location, "Reports Organized by Location", context="location")
+    
+    # Quick Actions Section
+    st.header("⚡ Quick Actions")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        if st.button("🔄 Refresh Data", use_container_width=True):
+            refresh_reports(force=True)
+            st.success("Data refreshed!")
+            st.rerun()
+    
+    with col2:
+        if st.button("💾 Backup Now", use_container_width=True):
+            backup_data()
+    
+    with col3:
+        if st.button("📊 View Analytics", use_container_width=True):
+            st.info("Switch to Progress Dashboard for detailed analytics")
+    
+    with col4:
+        show_export_button("📥 Export All", "export_all", "all_reports_export")
+    
+    # Advanced Search and Filter
+    st.header("🔍 Advanced Search & Filter")
+    
+    with st.expander("Advanced Search Options", expanded=False):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            search_name = st.text_input("Search by Reporter Name")
+            search_location = st.text_input("Search by Location")
+            search_description = st.text_input("Search in Description")
+            search_issue = st.selectbox("Filter by Issue Type", ["All"] + get_report_index().issue_types())
+        
+        with col2:
+            search_status = st.selectbox("Filter by Status", ["All", "Received", "In Progress", "Resolved"])
+            search_priority = st.selectbox("Filter by Priority", ["All", "Low", "Medium", "High", "Emergency"])
+            date_range = st.date_input("Filter by Date Range", value=[datetime.datetime.now().date() - datetime.timedelta(days=30), datetime.datetime.now().date()])
+            search_archive = st.checkbox("Also search archived reports", key="search_archive_option",
+                                         help="Older resolved reports, read from the archive files on demand")
+        
+        if st.button("Apply Filters"):
+            start_date, end_date = date_range if len(date_range) == 2 else (None, None)
+            st.session_state.search_criteria = {
+                'status': None if search_status == "All" else search_status,
+                'priority': None if search_priority == "All" else search_priority,
+                'issue_type': None if search_issue == "All" else search_issue,
+                'start_day': start_date,
+                'end_day': end_date,
+                'name': search_name,
+                'location': search_location,
+                'description': search_description,
+            }
+            st.session_state.search_archive = search_archive
+            archived_count = len(saved_archive_results())
+            st.success(f"Found {len(saved_search_results())} reports matching your criteria"
+                       + (f", plus {archived_count} archived" if search_archive else ""))
+    
+    # Display filtered results if available
+    filtered_reports = saved_search_results()
+    if filtered_reports:
+        st.subheader(f"🔍 Search Results ({len(filtered_reports)} reports)")
+        
+        for report in paginate(filtered_reports, "search_results"):
+            status_color = {'Received': '🟡', 'In Progress': '🔵', 'Resolved': '🟢'}.get(report['status'], '⚪')
+            priority_emoji = {'Low': '🟢', 'Medium': '🟡', 'High': '🟠', 'Emergency': '🔴'}.get(report.get('priority', 'Medium'), '⚪')
+            
+            with st.container():
+                col1, col2, col3 = st.columns([4, 2, 1])
+                
+                with col1:
+                    st.write(f"**{status_color} Report #{report['id']}** - {report['issue_type']}")
+                    st.write(f"📍 {report['location']} | 👤 {report['name']} | 📅 {report['date_reported']}")
+                    show_report_photo(report, thumbnail=True)
+                
+                with col2:
+                    st.write(f"**Status:** {report['status']} | **Priority:** {priority_emoji} {report.get('priority', 'Medium')}")
+                    st.write(f"**Assigned:** {report['assigned_to']}")
+                
+                with col3:
+                    search_key = f"search_manage_{report['id']}"
+                    if st.button(f"Manage", key=search_key):
+                        st.session_state[f"manage_report_{search_key}"] = True
+                
+                # Quick management form
+                if st.session_state.get(f"manage_report_{search_key}", False):
+                    with st.form(f"manage_form_{search_key}"):
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            new_status = st.selectbox("Status", ["Received", "In Progress", "Resolved"], 
+                                                    index=["Received", "In Progress", "Resolved"].index(report['status']),
+                                                    key=f"m_status_{search_key}")
+                            new_priority = st.selectbox("Priority", ["Low", "Medium", "High", "Emergency"],
+                                                      index=["Low", "Medium", "High", "Emergency"].index(report.get('priority', 'Medium')),
+                                                      key=f"m_priority_{search_key}")
+                        with col2:
+                            assigned_to = st.text_input("Assign To", value=report['assigned_to'], key=f"m_assign_{search_key}")
+                            comment = st.text_area("Add Comment", key=f"m_comment_{search_key}")
+                        
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            if st.form_submit_button("Update Report"):
+                                update_report(report, new_status, new_priority, assigned_to, comment)
+                                st.session_state[f"manage_report_{search_key}"] = False
+                                st.success("Report updated!")
+                                st.rerun()
+                        with col2:
+                            if st.form_submit_button("Cancel"):
+                                st.session_state[f"manage_report_{search_key}"] = False
+                                st.rerun()
+                
+                st.divider()
+        
+        show_bulk_actions(filtered_reports)
+    
+    archived_reports = saved_archive_results()
+    if archived_reports:
+        show_archived_results(archived_reports)
+    
+    # Reports table with status management
+    st.header("📋 All Reports (Legacy View)")
+    
+    if get_reports():
+        # Search and filter options
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            search_term = st.text_input("🔍 Search reports", placeholder="Search by location, issue type, name, or description")
+        
+        with col2:
+            status_filter = st.selectbox("Filter by Status", ["All", "Received", "In Progress", "Resolved"], key="legacy_status_filter")
+        
+        with col3:
+            issue_filter = st.selectbox("Filter by Issue Type", ["All"] + get_report_index().issue_types(), key="legacy_issue_filter")
+        
+        # Filter reports based on search and filters; unfiltered, the shared
+        # tuple of all reports is used as it is
+        if status_filter == "All" and issue_filter == "All" and not search_term:
+            filtered_reports = get_reports()
+        else:
+            filtered_reports = get_service().find_reports(
+                status=None if status_filter == "All" else status_filter,
+                issue_type=None if issue_filter == "All" else issue_filter,
+                text=search_term
+            )
+        
+        # Only the current page goes into the table and the report picker
+        page_reports = paginate(filtered_reports, "legacy_table")
+        df_data = []
+        for report in page_reports:
+            df_data.append({
+                'ID': report['id'],
+                'Name': report['name'],
+                'Issue Type': report['issue_type'],
+                'Location': report['location'],
+                'Status': report['status'],
+                'Date Reported': report['date_reported'],
+                'Assigned To': report['assigned_to'],
+                'Priority': report.get('priority', 'Medium')
+            })
+        
+        if df_data:
+            df = pd.DataFrame(df_data)
+            st.dataframe(df, use_container_width=True)
+            
+            # Show filtered count
+            st.info(f"Showing {len(filtered_reports)} of {len(get_reports())} reports")
+        else:
+            st.warning("No reports match your search criteria.")
+        
+        # Report management
+        st.header("🛠️ Manage Reports")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("Update Report Status")
+            report_id = st.selectbox("Select Report", 
+                                   [f"#{r['id']} - {r['issue_type']} - {r['location']}" 
+                                    for r in page_reports],
+                                   help="Reports on the table page shown above; search or turn pages to find others")
+            
+            selected_report = None
+            selected_id = None
+            
+            if report_id:
+                selected_id = int(report_id.split('#')[1].split(' - ')[0])
+                selected_report = get_report_index().get(selected_id)
+                
+                if selected_report:
+                    # Display report details
+                    st.markdown(f"""
+                    <div class="report-card">
+                        <h4>Report #{selected_report['id']}</h4>
+                        <p><strong>Reporter:</strong> {selected_report['name']}</p>
+                        <p><strong>Contact:</strong> {selected_report['contact']}</p>
+                        <p><strong>Issue:</strong> {selected_report['issue_type']}</p>
+                        <p><strong>Location:</strong> {selected_report['location']}</p>
+                        <p><strong>Description:</strong> {selected_report['description']}</p>
+                        <p><strong>Date:</strong> {selected_report['date_reported']}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    # Show photo if available
+                    show_report_photo(selected_report)
+                    
+                    new_status = st.selectbox("Update Status", 
+                                            ["Received", "In Progress", "Resolved"],
+                                            index=["Received", "In Progress", "Resolved"].index(selected_report['status']))
+                    assigned_to = st.text_input("Assign To", value=selected_report['assigned_to'])
+                    priority = st.selectbox("Priority", 
+                                          ["Low", "Medium", "High", "Emergency"],
+                                          index=["Low", "Medium", "High", "Emergency"].index(selected_report.get('priority', 'Medium')))
+                    
+                    if st.button("Update Report", use_container_width=True):
+                        update_report(selected_report, new_status, priority, assigned_to)  # Save changes
+                        st.success("Report updated successfully!")
+                        st.rerun()
+        
+        with col2:
+            st.subheader("Add Comment")
+            if selected_report:
+                comment = st.text_area("Add comment/update", placeholder="Enter your comment or status update...")
+                if st.button("Add Comment", use_container_width=True):
+                    if comment:
+                        add_comment(selected_id, comment)  # Saves the report
+                        st.success("Comment added!")
+                        st.rerun()
+                    else:
+                        st.warning("Please enter a comment")
+        
+        # Display comments for selected report
+        if selected_report and selected_report['comments']:
+            st.subheader("💬 Comments & Updates")
+            for comment in reversed(selected_report['comments']):
+                with st.container():
+                    st.markdown(f"""
+                    <div class="report-card">
+                        <strong>{comment['author']}</strong> - <em>{comment['timestamp']}</em><br>
+                        {comment['text']}
+                    </div>
+                    """, unsafe_allow_html=True)
+        
+        # Export functionality
+        st.header("📊 Export & Backup")
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            show_export_button("📥 Export Reports", "export_reports", "reports_export")
+        
+        with col2:
+            if st.button("💾 Backup Data", use_container_width=True):
+                backup_data()
+    
+    else:
+        st.info("No reports submitted yet.")
+    
+    show_archive()
+    show_bulk_import()
+    show_background_jobs()
+    
+    # Timings and counters, only for admins who ask for them
+    if st.toggle("🩺 Show diagnostics", key="show_diagnostics"):
+        show_diagnostics_panel()
+
+def show_archived_results(reports):
+    """Read-only list of archived search results, with an export of them"""
+    st.subheader(f"🗄️ Archived Results ({len(reports)} reports)")
+    st.caption("Archived reports are resolved and can no longer be changed.")
+    for report in paginate(reports, "archive_results"):
+        with st.container():
+            col1, col2 = st.columns([4, 2])
+            with col1:
+                st.write(f"**🟢 Report #{report['id']}** - {report['issue_type']}")
+                st.write(f"📍 {report['location']} | 👤 {report['name']} | 📅 {report['date_reported']}")
+                st.write(f"📝 {report['description'][:100]}{'...' if len(report['description']) > 100 else ''}")
+            with col2:
+                st.write(f"**Priority:** {report.get('priority', 'Medium')} | **Resolved:** {report['resolved_at'] or 'Unknown'}")
+                st.write(f"**Assigned:** {report['assigned_to']}")
+            st.divider()
+    show_export_button("📥 Export Archived Results", "export_archive_results", "archived_results",
+                       export=lambda export_format: export_reports(reports, export_format, get_service().photo_store))
+
+def show_archive():
+    """Monthly archive files of old resolved reports, with exports on demand (see communityfix/archive.py)"""
+    archive = get_service().archive
+    partitions = archive.partitions()
+    with st.expander(f"🗄️ Archive ({sum(entry['reports'] for entry in partitions)} reports)"):
+        if config.ARCHIVE_AFTER_DAYS > 0:
+            st.caption(f"Reports move here {config.ARCHIVE_AFTER_DAYS} days after they were resolved. "
+                       "They still count in the Progress Dashboard and can be searched and exported here.")
+        else:
+            st.caption("Automatic archiving is off (COMMUNITYFIX_ARCHIVE_AFTER_DAYS=0).")
+        
+        if partitions:
+            st.dataframe(pd.DataFrame([{
+                'Month': entry['month'], 'Reports': entry['reports'],
+                'Report IDs': f"#{entry['min_id']} - #{entry['max_id']}",
+                'Size (KB)': round(entry['bytes'] / 1024, 1),
+            } for entry in reversed(partitions)]), use_container_width=True, hide_index=True)
+            
+            months = st.multiselect("Months to export (all if none are picked)",
+                                    [entry['month'] for entry in reversed(partitions)], key="archive_export_months")
+            show_export_button("📥 Export Archive", "export_archive", "archived_reports",
+                               export=lambda export_format: get_service().export_archive(export_format, months or None))
+        
+        if config.ARCHIVE_AFTER_DAYS > 0 and st.button("🗄️ Archive Old Reports Now", key="archive_now"):
+            try:
+                get_job_queue().submit('archive', get_service().archive_old_reports,
+                                       label="Archive old resolved reports")
+                st.success("Archiving started - see Background Jobs below for progress.")
+            except QueueFull:
+                st.warning("The job queue is full; please try again in a moment.")
+
+def show_bulk_actions(reports):
+    """Change status, priority or assignment of many search results at once"""
+    st.subheader("🧰 Bulk Actions")
+    
+    message = st.session_state.pop('bulk_update_message', None)
+    if message:
+        st.success(message)
+        # Start the next batch from an empty selection
+        for key in ("bulk_select_all", "bulk_selected", "bulk_assign", "bulk_comment"):
+            st.session_state.pop(key, None)
+    
+    # A form, so picking reports and fields does not rerun the page
+    with st.form("bulk_actions_form"):
+        select_all = st.checkbox(f"Apply to all {len(reports)} search results", key="bulk_select_all")
+        labels = {f"#{r['id']} - {r['issue_type']} - {r['location']}": r['id'] for r in reports}
+        chosen = st.multiselect("Or choose reports", list(labels), key="bulk_selected")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            new_status = st.selectbox("Set Status", ["Keep current", "Received", "In Progress", "Resolved"], key="bulk_status")
+            new_priority = st.selectbox("Set Priority", ["Keep current", "Low", "Medium", "High", "Emergency"], key="bulk_priority")
+        with col2:
+            assigned_to = st.text_input("Assign To", placeholder="Leave empty to keep current", key="bulk_assign")
+            comment = st.text_area("Add Comment", key="bulk_comment")
+        
+        if st.form_submit_button("Apply to Selected"):
+            report_ids = [r['id'] for r in reports] if select_all else [labels[label] for label in chosen]
+            status = None if new_status == "Keep current" else new_status
+            priority = None if new_priority == "Keep current" else new_priority
+            assigned_to = assigned_to.strip() or None
+            if not report_ids:
+                st.warning("Choose at least one report")
+            elif status is None and priority is None and assigned_to is None and not comment:
+                st.warning("Choose a change to apply")
+            else:
+                updated = bulk_update_reports(report_ids, status, priority, assigned_to, comment or None)
+                if updated:
+                    st.session_state.bulk_update_message = f"Updated {updated} reports"
+                    st.rerun()
+
+def show_bulk_import():
+    """Import legacy reports from an uploaded file (see communityfix/bulk_import.py)"""
+    st.header("📤 Bulk Import")
+    
+    with st.expander("Import reports from a CSV or JSON file", expanded=False):
+        st.caption("Columns: name, contact, issue_type, location, description, date_reported "
+                   "(optional: status, priority, assigned_to, resolved_at, notes). "
+                   "Rows are checked like the report form; rows that fail are listed below.")
+        upload = st.file_uploader("Report file", type=['csv', 'json'], key="bulk_import_file")
+        resume = st.checkbox("Resume an earlier import of this file", key="bulk_import_resume")
+        
+        if upload is not None and st.button("Import Reports", key="bulk_import_start"):
+            data = upload.getvalue()
+            try:
+                rows = read_rows(data, Path(upload.name).suffix.lstrip('.').lower())
+            except ValueError as e:
+                st.error(f"Could not read {upload.name}: {e}")
+                return
+            
+            progress_bar = st.progress(0.0, text="Importing...")
+            def show_progress(result):
+                progress_bar.progress(result.processed / max(result.total, 1),
+                                      text=f"{result.processed} of {result.total} rows checked, {result.imported} imported")
+            try:
+                result = import_rows(get_service(), rows, source_key(data), resume=resume, progress=show_progress)
+            except AlreadyImported as e:
+                st.warning(f"{e}: tick \"Resume\" to import the remaining rows.")
+                return
+            except Exception as e:
+                st.error(f"Import stopped: {e}. Tick \"Resume\" and import the same file again to continue.")
+                return
+            # Rerun once so the counts and lists above include the new reports
+            st.session_state.bulk_import_result = (upload.name, result)
+            st.rerun()
+        
+        if 'bulk_import_result' in st.session_state:
+            file_name, result = st.session_state.bulk_import_result
+            st.success(f"{file_name}: imported {result.imported} reports "
+                       f"({result.skipped} already imported, {len(result.rejected)} rejected)")
+            if result.rejected:
+                st.dataframe(pd.DataFrame([{'Row': row_number, 'Errors': "; ".join(errors)}
+                                           for row_number, _, errors in result.rejected]),
+                             use_container_width=True, hide_index=True)
+                rejects = io.StringIO()
+                write_rejects(result.rejected, rejects)
+                st.download_button(
+                    label="📥 Download Rejected Rows",
+                    data=rejects.getvalue().encode('utf-8'),
+                    file_name=f"rejected_{Path(file_name).stem}.csv",
+                    mime="text/csv",
+                    key="bulk_import_rejects"
+                )
+
+def show_background_jobs():
+    """Queue depth, per-kind totals and recent background jobs (see communityfix/jobs.py)"""
+    jobs = get_job_queue()
+    stats = jobs.stats()
+    failed = sum(kind_stats['failed'] for kind_stats in stats.values())
+    with st.expander(f"⚙️ Background Jobs ({jobs.pending()} pending)"):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Waiting", jobs.depth())
+        col2.metric("Running", sum(kind_stats['running'] for kind_stats in stats.values()))
+        col3.metric("Done", sum(kind_stats['done'] for kind_stats in stats.values()))
+        col4.metric("Failed", failed)
+        st.caption(f"{jobs.workers} worker threads, at most {config.JOB_QUEUE_SIZE} waiting jobs")
+        
+        if stats:
+            st.dataframe(pd.DataFrame([{'Kind': kind, 'Waiting': kind_stats['queued'], 'Running': kind_stats['running'],
+                                        'Done': kind_stats['done'], 'Failed': kind_stats['failed']}
+                                       for kind, kind_stats in stats.items()]),
+                         use_container_width=True, hide_index=True)
+        
+        recent = [job.to_dict() for job in jobs.jobs(20)]
+        if recent:
+            st.subheader("Recent Jobs")
+            st.dataframe(pd.DataFrame([{
+                'Job': job['id'], 'Kind': job['kind'], 'Task': job['label'], 'Status': job['status'].title(),
+                'Submitted': datetime.datetime.fromtimestamp(job['submitted_at']).strftime('%H:%M:%S'),
+                'Wait (s)': round(job['waited_s'], 2),
+                'Run (s)': round(job['ran_s'], 2) if job['ran_s'] is not None else None,
+                'Error': job['error'] or '',
+            } for job in recent]), use_container_width=True, hide_index=True)
+        
+        if st.button("🔄 Refresh", key="refresh_jobs"):
+            st.rerun()
+
+def show_diagnostics_panel():
+    """Rerun timings and storage/photo counters (see communityfix/metrics.py)"""
+    st.header("🩺 Diagnostics")
+    
+    last_trace = st.session_state.get('last_trace')
+    if last_trace:
+        st.subheader(f"Previous rerun ({last_trace['trace']}): {last_trace['total_ms']:.1f} ms")
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            if last_trace['timings']:
+                st.dataframe(pd.DataFrame(last_trace['timings']).rename(columns={'name': 'Operation', 'ms': 'Time (ms)'}),
+                             use_container_width=True, hide_index=True)
+        with col2:
+            if last_trace['counters']:
+                st.dataframe(pd.DataFrame(list(last_trace['counters'].items()), columns=['Counter', 'Value']),
+                             use_container_width=True, hide_index=True)
+    
+    snapshot = metrics.METRICS.snapshot()
+    st.subheader(f"Since server start ({snapshot['uptime_s'] / 60:.0f} min)")
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        timer_rows = [{'Operation': name, 'Calls': stats['count'], 'Mean (ms)': stats['mean_ms'],
+                       'p50 (ms)': stats['p50_ms'], 'p99 (ms)': stats['p99_ms'], 'Max (ms)': stats['max_ms']}
+                      for name, stats in snapshot['timers'].items()]
+        if timer_rows:
+            st.dataframe(pd.DataFrame(timer_rows), use_container_width=True, hide_index=True)
+    with col2:
+        if snapshot['counters']:
+            st.dataframe(pd.DataFrame(list(snapshot['counters'].items()), columns=['Counter', 'Value']),
+                         use_container_width=True, hide_index=True)
+    
+    st.download_button(
+        label="📥 Download Metrics (JSON)",
+        data=json.dumps({'process': snapshot, 'last_rerun': last_trace}, indent=2).encode('utf-8'),
+        file_name=f"metrics_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+        mime="application/json",
+        key="download_metrics"
+    )
+    if config.METRICS_LOG_FILE:
+        st.caption(f"Every rerun is also logged to {config.METRICS_LOG_FILE}")
+    else:
+        st.caption("Set COMMUNITYFIX_METRICS_LOG_FILE to log every rerun as a JSON line.")
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
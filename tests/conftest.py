@@ -0,0 +1,51 @@
+import pytest
+
+from communityfix.archive import ReportArchive
+from communityfix.photos import PhotoStore
+from communityfix.repository import ReportRepository
+from communityfix.service import ReportService
+from communityfix.storage import JsonReportStore, SqliteReportStore
+
+
+def _report(**fields):
+    return {
+        'name': 'Ana Cruz',
+        'contact': '09171234567',
+        'issue_type': 'Pothole',
+        'location': 'Main Street',
+        'description': 'Deep pothole near the market',
+        'status': 'Received',
+        'priority': 'Medium',
+        'assigned_to': 'Not assigned',
+        'date_reported': '2024-03-01 10:00',
+        'comments': [],
+        'photo_ref': None,
+        'thumb_ref': None,
+        **fields,
+    }
+
+
+@pytest.fixture
+def new_report():
+    """Builds a stored-report dict (without ID); keyword arguments override the defaults"""
+    return _report
+
+
+@pytest.fixture
+def json_store(tmp_path):
+    return JsonReportStore(tmp_path / 'reports.json', tmp_path / 'event_archive')
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def make_store(request, tmp_path):
+    """Opens a store on the same files each time it is called, like another process would"""
+    if request.param == 'json':
+        return lambda: JsonReportStore(tmp_path / 'reports.json', tmp_path / 'event_archive')
+    return lambda: SqliteReportStore(tmp_path / 'reports.db')
+
+
+@pytest.fixture
+def service(tmp_path, json_store):
+    """A ReportService whose store, photos and archive all live in ``tmp_path``"""
+    repository = ReportRepository(json_store, archive=ReportArchive(tmp_path / 'archive'))
+    return ReportService(json_store, PhotoStore(tmp_path / 'photos'), repository)
@@ -0,0 +1,65 @@
+import datetime
+
+from communityfix.analytics import ReportAggregates
+from communityfix.records import ReportRecord
+
+
+def _record(new_report, report_id, **fields):
+    return ReportRecord.from_dict(new_report(id=report_id, **fields))
+
+
+def test_counts_follow_changes(new_report):
+    aggregates = ReportAggregates([
+        _record(new_report, 1),
+        _record(new_report, 2, issue_type='Graffiti', date_reported='2024-03-02 09:00'),
+        _record(new_report, 3, status='In Progress', date_reported='2024-03-02 15:00'),
+    ])
+    assert aggregates.status_totals() == {'Received': 2, 'In Progress': 1}
+    assert aggregates.issue_analysis()['Pothole'] == {'total': 2, 'resolved': 0, 'in_progress': 1, 'received': 1}
+
+    aggregates.update(_record(new_report, 1, status='In Progress'))
+    aggregates.remove(2)
+    chart = aggregates.chart_data()
+    assert chart.status_counts == (('In Progress', 2),)
+    assert chart.issue_counts == (('Pothole', 2),)
+    assert chart.daily_counts == ((datetime.date(2024, 3, 1), 1), (datetime.date(2024, 3, 2), 1))
+    assert len(aggregates) == 2
+
+
+
+def test_resolution_times_and_sla(new_report):
+    def resolved(report_id, issue_type, resolved_at):
+        return _record(new_report, report_id, issue_type=issue_type, status='Resolved', resolved_at=resolved_at)
+
+    aggregates = ReportAggregates([
+        resolved(1, 'Pothole', '2024-03-02 10:00'),      # 1 day
+        resolved(2, 'Pothole', '2024-03-04 10:00'),      # 3 days
+        resolved(3, 'Pothole', '2024-03-11 10:00'),      # 10 days, past the 7 day target
+        resolved(4, 'Safety Hazard', '2024-03-01 22:00'),
+        _record(new_report, 5, status='Resolved'),       # resolved before times were recorded
+        _record(new_report, 6),
+    ])
+    assert aggregates.resolution_stats() == {'count': 4, 'mean': 3.625, 'p50': 1, 'p90': 10}
+    assert aggregates.resolution_stats('Pothole')['p50'] == 3
+    assert aggregates.sla_compliance('Pothole') == 2 / 3
+    assert aggregates.sla_compliance('Safety Hazard') == 1
+    assert aggregates.sla_compliance('Graffiti') is None
+    assert aggregates.untimed_resolved() == 1
+    assert aggregates.chart_data().resolution_days == ((0, 1), (1, 1), (3, 1), (10, 1))
+
+    # Reopening takes the time out again
+    aggregates.update(_record(new_report, 3, status='In Progress'))
+    assert aggregates.sla_compliance('Pothole') == 1
+    assert aggregates.resolution_stats('Pothole') == {'count': 2, 'mean': 2, 'p50': 1, 'p90': 3}
+
+
+def test_archived_rollup_adds_to_the_counts(new_report):
+    aggregates = ReportAggregates([_record(new_report, 1)])
+    aggregates.add_archived({
+        'issue_counts': {'Pothole': 2},
+        'daily_counts': {'2024-03-01': 2},
+        'resolution_hours': {'Pothole': {'48': 2}},
+    })
+    assert aggregates.status_totals() == {'Received': 1, 'Resolved': 2}
+    assert aggregates.chart_data().daily_counts == ((datetime.date(2024, 3, 1), 3),)
+    assert aggregates.resolution_stats()['mean'] == 2
@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import pytest
+
+from communityfix import config
+from communityfix.api import create_app
+
+
+@pytest.fixture
+def call(service):
+    """Sends one request straight to the ASGI app: call(method, path, ...) -> (status, JSON body)"""
+    app = create_app(service, compact=False)
+
+    def call(method, path, query='', body=b'', content_type=None):
+        if not isinstance(body, bytes):
+            body, content_type = json.dumps(body).encode(), 'application/json'
+        headers = [(b'content-length', str(len(body)).encode())]
+        if content_type:
+            headers.append((b'content-type', content_type.encode()))
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'scheme': 'http',
+            'method': method, 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+            'root_path': '', 'headers': headers, 'client': ('127.0.0.1', 5000), 'server': ('testserver', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(app(scope, receive, send))
+        return sent[0]['status'], json.loads(b''.join(message.get('body', b'') for message in sent[1:]))
+
+    return call
+
+
+SUBMISSION = {
+    'name': 'Ana Cruz',
+    'contact': '09171234567',
+    'issue_type': 'Pothole',
+    'location': 'Corner of Rizal Avenue and Mabini Street',
+    'description': 'Deep pothole in front of the bakery',
+}
+
+
+def test_submit_and_read_back(call):
+    status, body = call('POST', '/reports', body=SUBMISSION)
+    assert status == 201
+    assert body['status'] == 'Received' and body['priority'] == 'Medium'
+    assert 'name' not in body and 'contact' not in body
+
+    status, report = call('GET', f"/reports/{body['id']}")
+    assert status == 200
+    assert report['location'] == SUBMISSION['location']
+    assert [entry['status'] for entry in report['status_history']] == ['Received']
+    assert call('GET', '/reports/999') == (404, {'error': "No such report"})
+
+
+def test_form_submission_and_duplicates(call, monkeypatch):
+    monkeypatch.setattr(config, 'DUPLICATE_ACTION', 'offer')
+    form = '&'.join(f"{field}={value.replace(' ', '+')}" for field, value in SUBMISSION.items())
+    status, first = call('POST', '/reports', body=form.encode(), content_type='application/x-www-form-urlencoded')
+    assert status == 201
+    status, second = call('POST', '/reports', body=SUBMISSION)
+    assert status == 201 and second['possible_duplicates'] == [first['id']]
+
+    monkeypatch.setattr(config, 'DUPLICATE_ACTION', 'link')
+    status, linked = call('POST', '/reports', body=SUBMISSION)
+    assert status == 200 and linked['linked'] and linked['id'] == first['id']
+
+
+@pytest.mark.parametrize('body, content_type, status, error', [
+    (b'{"name": ', 'application/json', 400, "Body is not valid JSON"),
+    (b'["Ana"]', 'application/json', 400, "Body must be a JSON object"),
+    (json.dumps({**SUBMISSION, 'location': 5}).encode(), 'application/json', 400, "location must be text"),
+    (json.dumps({**SUBMISSION, 'photo_ref': '../reports.json'}).encode(), 'application/json', 422,
+     "Unknown photo; upload it to /photos first"),
+])
+def test_submit_rejects_malformed_requests(call, body, content_type, status, error):
+    assert call('POST', '/reports', body=body, content_type=content_type) == (status, {'error': error})
+
+
+def test_submit_reports_validation_errors(call):
+    status, body = call('POST', '/reports', body={**SUBMISSION, 'contact': '123', 'issue_type': 'Volcano'})
+    assert status == 422
+    assert body['errors'] == ["Please enter a valid contact number (at least 10 digits)",
+                              "Please choose one of the listed issue types"]
+
+
+def test_photo_upload_rejects_bad_data(call, monkeypatch):
+    assert call('POST', '/photos', body=b'', content_type='image/png') == (400, {'error': "No photo in the request"})
+    assert call('POST', '/photos', body=b'not an image', content_type='image/png') == \
+        (415, {'error': "Not a supported image"})
+    monkeypatch.setattr(config, 'API_MAX_PHOTO_BYTES', 4)
+    assert call('POST', '/photos', body=b'\x89PNG\r\n\x1a\n', content_type='image/png') == \
+        (413, {'error': "Photo is larger than 4 bytes"})
+
+
+def test_list_filters_and_paging(call):
+    for issue_type in ('Pothole', 'Graffiti', 'Pothole'):
+        call('POST', '/reports', body={**SUBMISSION, 'issue_type': issue_type,
+                                       'location': f"Purok 3 near the {issue_type.lower()}"})
+    status, body = call('GET', '/reports', query='issue_type=Pothole&limit=1&offset=1')
+    assert status == 200
+    assert (body['total'], body['offset'], body['limit']) == (2, 1, 1)
+    assert [report['id'] for report in body['reports']] == [3]
+    assert call('GET', '/reports', query='limit=1000')[1]['limit'] == 100
+
+
+@pytest.mark.parametrize('query, error', [
+    ('status=Lost', "Unknown status: 'Lost'"),
+    ('from=31/01/2024', "from must be a date like 2024-01-31"),
+    ('offset=-1', "offset must be a non-negative whole number"),
+    ('limit=ten', "limit must be a non-negative whole number"),
+])
+def test_list_rejects_bad_parameters(call, query, error):
+    assert call('GET', '/reports', query=query) == (400, {'error': error})
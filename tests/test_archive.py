@@ -0,0 +1,88 @@
+import pytest
+
+from communityfix.archive import ReportArchive
+from communityfix.bulk_import import AlreadyImported, import_rows
+from communityfix.photos import PhotoStore
+from communityfix.records import parse_timestamp
+from communityfix.repository import ReportRepository
+from communityfix.service import ReportService
+from communityfix.storage import JsonReportStore
+
+
+NOW = parse_timestamp('2025-06-01 12:00')
+
+
+def _rows():
+    """Three rows resolved long ago and two still open"""
+    rows = []
+    for day in range(1, 6):
+        resolved = day <= 3
+        rows.append({
+            'name': 'Ana Cruz',
+            'contact': '09171234567',
+            'issue_type': 'Pothole',
+            'location': 'Main Street',
+            'description': f'Deep pothole number {day} near the market',
+            'date_reported': f'2024-01-0{day} 10:00',
+            'status': 'Resolved' if resolved else 'Received',
+            'resolved_at': f'2024-01-1{day} 10:00' if resolved else '',
+        })
+    return rows
+
+
+def test_archive_moves_old_resolved_reports(service):
+    import_rows(service, _rows(), 'legacy')
+    totals = service.aggregates.status_totals()
+
+    assert service.archive_old_reports(30, now_ts=NOW) == 3
+    assert [report['status'] for report in service.reports()] == ['Received', 'Received']
+    assert len(service.archive) == 3
+    assert service.archive.get(1)['status'] == 'Resolved'
+    # Dashboard totals still count the archived reports
+    assert service.aggregates.status_totals() == totals
+    assert service.archive_old_reports(30, now_ts=NOW) == 0
+
+
+def test_archive_after_zero_days_is_off(service):
+    import_rows(service, _rows(), 'legacy')
+    assert service.archive_old_reports(0, now_ts=NOW) == 0
+    assert len(service.reports()) == 5
+
+
+def test_resume_import_after_archiving(service):
+    rows = _rows()
+    import_rows(service, rows[:4], 'legacy')
+    assert service.archive_old_reports(30, now_ts=NOW) == 3
+
+    with pytest.raises(AlreadyImported):
+        import_rows(service, rows, 'legacy')
+    result = import_rows(service, rows, 'legacy', resume=True)
+    assert (result.imported, result.skipped) == (1, 4)
+    assert sorted(report['import_ref'] for report in service.reports()) == ['legacy:4', 'legacy:5']
+
+
+def test_explicit_empty_archive_is_kept(tmp_path, json_store):
+    archive = ReportArchive(tmp_path / 'elsewhere')
+    assert len(archive) == 0
+    service = ReportService(json_store, PhotoStore(tmp_path / 'photos'), ReportRepository(json_store, archive=archive))
+    assert service.archive is archive
+    import_rows(service, _rows(), 'legacy')
+    assert service.archive_old_reports(30, now_ts=NOW) == 3
+    assert len(ReportArchive(tmp_path / 'elsewhere')) == 3
+
+
+def test_archive_uses_changes_saved_by_another_process(service, json_store):
+    import_rows(service, _rows(), 'legacy')
+    other = JsonReportStore(json_store.path, json_store.archive_dir)
+    other.modify_report(1, lambda report: report['comments'].append({'author': 'Admin', 'text': 'Fixed for good'}))
+    other.modify_report(2, lambda report: report.update(status='In Progress', resolved_at=None))
+
+    # Picked from the service's cached copies, which are stale now
+    def resolved(report):
+        return report.status == 'Resolved'
+    assert service.repository.archive_reports([1, 2, 3], resolved) == 2
+    assert service.archive.get(1)['comments'][-1]['text'] == 'Fixed for good'
+    assert service.archive.get(2) is None
+    service.refresh()
+    assert sorted(report.id for report in service.reports()) == [2, 4, 5]
+    assert service.aggregates.status_totals() == {'Received': 2, 'In Progress': 1, 'Resolved': 2}
@@ -0,0 +1,46 @@
+from communityfix.duplicates import PHOTO_BONUS, DuplicateIndex, signature, similarity
+from communityfix.records import ReportRecord
+
+
+def _record(new_report, report_id, **fields):
+    return ReportRecord.from_dict(new_report(id=report_id, **fields))
+
+
+def test_signature_similarity():
+    assert signature('  ') is None and similarity(None, signature('Main Street')) == 0.0
+    assert signature('Main Street, Brgy. 5') == signature('main street brgy 5')
+    close = similarity(signature('Corner of Rizal Avenue and Mabini Street'),
+                       signature('corner Rizal Ave and Mabini Street'))
+    far = similarity(signature('Corner of Rizal Avenue and Mabini Street'),
+                     signature('Back of the public market'))
+    assert close > 0.5 > far
+
+
+def test_finds_open_reports_of_the_same_issue_type(new_report):
+    location = 'Corner of Rizal Avenue and Mabini Street'
+    description = 'Large pothole in the middle of the road near the school'
+    index = DuplicateIndex([
+        _record(new_report, 1, location=location, description=description),
+        _record(new_report, 2, location=location, description=description, issue_type='Graffiti'),
+        _record(new_report, 3, location=location, description=description, status='Resolved'),
+        _record(new_report, 4, location='Back of the public market', description='Overflowing bins'),
+    ])
+    matches = index.find('Pothole', 'corner of Rizal Avenue & Mabini St', description, threshold=0.5)
+    assert [report_id for report_id, _ in matches] == [1]
+    assert index.find('Pothole', 'Santo Nino Chapel', 'Broken bench', threshold=0.5) == []
+
+    # Resolving a report takes it out of the index
+    index.update(_record(new_report, 1, location=location, description=description, status='Resolved'))
+    assert index.find('Pothole', location, description, threshold=0.5) == []
+    assert len(index) == 2
+
+
+def test_matching_photo_adds_to_the_score(new_report):
+    index = DuplicateIndex([_record(new_report, 1, location='Main Street near the church',
+                                    description='Streetlight not working', photo_hash='f0f0f0f0f0f0f0f0')])
+    # Within 7 bits of the stored photo: found through the photo bands alone
+    matches = index.find('Pothole', 'Purok 3 basketball court', 'Dark at night', photo_hash='f0f0f0f0f0f0f0f3',
+                         threshold=PHOTO_BONUS, max_distance=6)
+    assert [report_id for report_id, _ in matches] == [1]
+    assert index.find('Pothole', 'Purok 3 basketball court', 'Dark at night', photo_hash='0f0f0f0f0f0f0f0f',
+                      threshold=PHOTO_BONUS, max_distance=6) == []
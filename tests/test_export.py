@@ -0,0 +1,56 @@
+import csv
+import gzip
+import io
+
+import pytest
+
+from communityfix.export import EXPORT_COLUMNS, export_reports
+from communityfix.photos import PhotoStore
+
+
+@pytest.fixture
+def reports(new_report):
+    return [
+        new_report(id=1, photo_ref='ab12cd.jpg', resolved_at='2024-03-02 10:00', status='Resolved',
+                   comments=[{'timestamp': '2024-03-01 12:00', 'author': 'Admin', 'text': 'Crew sent'},
+                             {'timestamp': '2024-03-02 10:00', 'author': 'Admin', 'text': 'Filled, "done"'}]),
+        new_report(id=2, photo='aGVsbG8=', description='Line one\nline two'),
+        new_report(id=3, status='In Progress'),
+    ]
+
+
+def _rows(data):
+    return list(csv.DictReader(io.StringIO(data.decode('utf-8'))))
+
+
+def test_csv(reports, tmp_path):
+    with export_reports(reports, 'CSV', PhotoStore(tmp_path)) as output:
+        rows = _rows(output.read())
+    assert list(rows[0]) == EXPORT_COLUMNS
+    assert [row['id'] for row in rows] == ['1', '2', '3']
+    assert rows[0]['comments'] == '2024-03-01 12:00 Admin: Crew sent | 2024-03-02 10:00 Admin: Filled, "done"'
+    assert rows[0]['photo_file'] == str(tmp_path / 'ab' / 'ab12cd.jpg')
+    assert rows[0]['resolved_at'] == '2024-03-02 10:00' and rows[1]['resolved_at'] == ''
+    # Inline photos are not exported
+    assert rows[1]['photo_file'] == '(inline photo not exported)'
+    assert rows[1]['description'] == 'Line one\nline two'
+
+
+def test_gzip_csv_matches_csv(reports, tmp_path):
+    with export_reports(reports, 'CSV', PhotoStore(tmp_path)) as plain, \
+            export_reports(reports, 'CSV (gzip)', PhotoStore(tmp_path)) as compressed:
+        assert gzip.decompress(compressed.read()) == plain.read()
+
+
+def test_parquet(reports, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    with export_reports(reports, 'Parquet', PhotoStore(tmp_path)) as output:
+        table = pq.read_table(output)
+    assert table.column_names == EXPORT_COLUMNS
+    assert table.column('id').to_pylist() == [1, 2, 3]
+    assert table.column('status').to_pylist() == ['Resolved', 'Received', 'In Progress']
+
+
+def test_unknown_format(reports):
+    with pytest.raises(ValueError):
+        export_reports(reports, 'XLSX')
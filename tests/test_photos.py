@@ -0,0 +1,64 @@
+import io
+import os
+import time
+
+from PIL import Image
+
+
+def _image(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _submit(service, pending_photo, location='Main Street corner'):
+    return service.submit_report('Ana Cruz', '09171234567', 'Pothole', location,
+                                 'Deep pothole near the market', pending_photo=pending_photo)
+
+
+def test_upload_is_kept_while_a_report_waits_for_it(service):
+    ref = service.store_upload(_image('red'))
+    first = _submit(service, ref)
+    second = _submit(service, ref, location='Rizal Avenue corner')
+    assert service.pending_photo_reports() == [first, second]
+
+    assert service.process_photos(first) == (1, 0)
+    assert service.upload_store.exists(ref)
+    assert service.pending_photo_reports() == [second]
+
+    assert service.process_photos(second) == (1, 0)
+    assert not service.upload_store.exists(ref)
+    assert service.pending_photo_reports() == []
+    assert service.photo_store.exists(service.get(second)['thumb_ref'])
+
+
+def test_discard_keeps_uploads_a_report_waits_for(service):
+    used = service.store_upload(_image('red'))
+    _submit(service, used)
+    unused = service.store_upload(_image('blue'))
+
+    service.discard_upload(used)
+    service.discard_upload(unused)
+    assert service.upload_store.exists(used)
+    assert not service.upload_store.exists(unused)
+
+
+def test_sweep_deletes_only_old_unused_uploads(service):
+    used = service.store_upload(_image('red'))
+    _submit(service, used)
+    old = service.store_upload(_image('blue'))
+    recent = service.store_upload(_image('green'))
+    partial = service.upload_store.path(old).with_name('half-written.tmp')
+    partial.write_bytes(b'\x89PNG')
+    day_ago = time.time() - 86400
+    for path in (service.upload_store.path(used), service.upload_store.path(old), partial):
+        os.utime(path, (day_ago, day_ago))
+
+    assert service.sweep_uploads(max_age=3600) == 2
+    assert service.upload_store.exists(used) and service.upload_store.exists(recent)
+    assert not service.upload_store.exists(old) and not partial.exists()
+
+    # Uploading the same photo again makes it recent
+    os.utime(service.upload_store.path(recent), (day_ago, day_ago))
+    service.store_upload(_image('green'))
+    assert service.sweep_uploads(max_age=3600) == 0
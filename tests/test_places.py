@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from communityfix.places import Gazetteer, Place, PlaceIndex, cell_of, load_gazetteer
+from communityfix.records import ReportRecord
+
+
+def _record(new_report, report_id, location, **fields):
+    return ReportRecord.from_dict(new_report(id=report_id, location=location, **fields))
+
+
+@pytest.mark.parametrize('location, place', [
+    ("near brgy hall, main st.", "Barangay Hall"),   # the landmark beats the street
+    ("along Mabini", "Mabini Street"),               # street named without "Street"
+    ("Rizal Ave", "Rizal Avenue"),
+    ("tabi ng palengke", "Public Market"),           # alias
+    ("purok3 covered court", "Basketball Court"),
+    ("Purok 12 corner", None),                       # numbers match exactly
+    ("somewhere far away", None),
+])
+def test_match(location, place):
+    match = Gazetteer().match(location)
+    assert (match.name if match else None) == place
+
+
+def test_stored_place_wins_over_matching(new_report):
+    gazetteer = Gazetteer()
+    report = _record(new_report, 1, "Rizal Ave", place="Chapel")
+    assert gazetteer.place_of(report).name == "Chapel"
+    assert gazetteer.place_of(_record(new_report, 2, "Rizal Ave", place="Gone")).name == "Rizal Avenue"
+
+
+def test_load_gazetteer(tmp_path):
+    assert len(load_gazetteer(tmp_path / 'missing.json')) == len(Gazetteer())
+    path = tmp_path / 'places.json'
+    path.write_text(json.dumps([{"name": "Fish Port", "aliases": ["pantalan"]}]))
+    assert load_gazetteer(path).match("sa may pantalan").name == "Fish Port"
+    path.write_text(json.dumps([{"name": "Fish Port", "kind": "island"}]))
+    with pytest.raises(ValueError):
+        load_gazetteer(path)
+
+
+def test_index_counts_follow_status_changes(new_report):
+    gazetteer = Gazetteer([Place("Main Street", 'street', (), 14.65, 121.03),
+                           Place("Chapel", 'landmark', ("church",), 14.65, 121.03)])
+    index = PlaceIndex(gazetteer, [
+        _record(new_report, 3, "Main St"),
+        _record(new_report, 1, "Main Street by the bakery"),
+        _record(new_report, 2, "beside the church"),
+        _record(new_report, 4, "unknown corner"),
+    ], cell_meters=250)
+    organized = index.organize_by_location()
+    assert [(name, [report.id for report in reports]) for name, reports in organized.items()] == \
+        [("Main Street", [1, 3]), ("Chapel", [2]), ("Other Locations", [4])]
+    assert index.hotspots() == [("Main Street", 2), ("Chapel", 1)]
+
+    index.update(_record(new_report, 3, "Main St", status='Resolved'))
+    index.remove(2)
+    assert index.hotspots() == [("Main Street", 1)]
+    assert index.hotspots(open_only=False) == [("Main Street", 2)]
+    row, column = cell_of(14.65, 121.03, 250)
+    assert index.heatmap_data().cells == ((row, column, 1, "Main Street, Chapel"),)
@@ -0,0 +1,48 @@
+from communityfix.records import ReportRecord
+from communityfix.search_index import SearchIndex, tokenize
+
+
+def _record(new_report, report_id, **fields):
+    return ReportRecord.from_dict(new_report(id=report_id, **fields))
+
+
+def test_tokenize():
+    assert tokenize("Blocked DRAINAGE, near St. Jude's") == ['blocked', 'drainage', 'near', 'st', 'jude', 's']
+    assert tokenize(None) == [] and tokenize('') == []
+
+
+def test_query_words_match_token_prefixes_and_all_must_match(new_report):
+    index = SearchIndex([
+        _record(new_report, 1, description='Blocked drainage on the corner'),
+        _record(new_report, 2, description='Drain cover missing', location='Rizal Avenue'),
+        _record(new_report, 3, description='Streetlight out'),
+    ])
+    assert index.search('drain') == {1, 2}
+    assert index.search('DRAIN riz') == {2}
+    assert index.search('drain streetlight') == set()
+    assert index.search('  ') == set()
+
+
+def test_search_limited_to_fields(new_report):
+    index = SearchIndex([
+        _record(new_report, 1, name='Maria Santos', location='Santos Street'),
+        _record(new_report, 2, name='Jose Reyes', location='Santos Street'),
+        _record(new_report, 3, name='Maria Lopez'),
+    ])
+    assert index.search('santos') == {1, 2}
+    assert index.search('santos', fields=('name',)) == {1}
+    assert index.search('maria', fields=('location',)) == set()
+
+
+def test_update_and_remove_drop_old_tokens(new_report):
+    index = SearchIndex([_record(new_report, 1, description='Flooded underpass'),
+                         _record(new_report, 2, description='Flooding near school')])
+    index.update(_record(new_report, 1, description='Fallen tree'))
+    assert index.search('flood') == {2}
+    assert index.search('fallen') == {1}
+
+    index.remove(2)
+    assert index.search('flood') == set()
+    assert len(index) == 1
+    # The vocabulary no longer holds tokens only the removed report had
+    assert index._expand('flood') == []
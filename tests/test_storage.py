@@ -0,0 +1,96 @@
+import threading
+
+from communityfix.storage import JsonReportStore, SqliteReportStore, migrate_json_to_sqlite
+
+
+def test_json_log_replay_skips_truncated_last_event(json_store, new_report):
+    first = json_store.insert_report(new_report())
+    json_store.modify_report(first, lambda report: report.update(status='In Progress'))
+    # A writer that crashed half way through its line
+    with open(json_store.log_path, 'ab') as f:
+        f.write(b'{"seq":3,"op":"insert","report":{"id":2,"na')
+
+    reports = json_store.load_reports()
+    assert [(report['id'], report['status']) for report in reports] == [(first, 'In Progress')]
+
+    # The next writer drops the partial line and carries on after it
+    other = JsonReportStore(json_store.path, json_store.archive_dir)
+    second = other.insert_report(new_report(location='Rizal Avenue'))
+    assert second == first + 1
+    assert [report['id'] for report in JsonReportStore(json_store.path).load_reports()] == [first, second]
+
+
+def test_json_compaction_while_writing(json_store, new_report):
+    writers, per_writer = 4, 25
+    stop = threading.Event()
+    errors = []
+
+    def write(number):
+        try:
+            store = JsonReportStore(json_store.path, json_store.archive_dir)
+            for _ in range(per_writer):
+                report_id = store.insert_report(new_report(name=f"Writer {number}"))
+                store.modify_report(report_id, lambda report: report['comments'].append({'text': 'Seen'}))
+        except Exception as e:
+            errors.append(e)
+
+    def compact():
+        store = JsonReportStore(json_store.path, json_store.archive_dir)
+        while not stop.is_set():
+            store.compact()
+
+    compactor = threading.Thread(target=compact)
+    compactor.start()
+    threads = [threading.Thread(target=write, args=(number,)) for number in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stop.set()
+    compactor.join()
+
+    assert not errors
+    for reports in (json_store.load_reports(), JsonReportStore(json_store.path).load_reports()):
+        assert sorted(report['id'] for report in reports) == list(range(1, writers * per_writer + 1))
+        assert all(report['comments'] == [{'text': 'Seen'}] for report in reports)
+    assert list(json_store.archive_dir.iterdir())
+
+
+def test_ids_unique_across_store_instances(make_store, new_report):
+    stores = [make_store(), make_store()]
+    ids = []
+    lock = threading.Lock()
+
+    def insert(store):
+        for _ in range(20):
+            report_id = store.insert_report(new_report())
+            batch = store.insert_reports([new_report(), new_report()])
+            with lock:
+                ids.extend([report_id, *batch])
+
+    threads = [threading.Thread(target=insert, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(ids) == len(set(ids)) == 120
+    assert sorted(report['id'] for report in make_store().load_reports()) == sorted(ids)
+
+
+
+def test_deleted_ids_are_not_reused(make_store, new_report):
+    store = make_store()
+    ids = store.insert_reports([new_report(), new_report(), new_report()])
+    store.delete_reports(ids[1:])
+    assert make_store().insert_report(new_report()) == ids[-1] + 1
+
+
+def test_migration_does_not_repeat_after_reports_were_archived(tmp_path, json_store, new_report):
+    json_store.insert_report(new_report())
+    db_path = tmp_path / 'reports.db'
+    assert migrate_json_to_sqlite(json_store.path, db_path) == 1
+    SqliteReportStore(db_path).delete_reports([1])
+
+    assert migrate_json_to_sqlite(json_store.path, db_path) == 0
+    assert SqliteReportStore(db_path).count() == 0
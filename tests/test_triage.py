@@ -0,0 +1,62 @@
+import random
+
+from communityfix.records import ReportRecord, format_timestamp
+from communityfix.report_index import ISSUE_TYPES, PRIORITIES
+from communityfix.triage import OPEN_STATUSES, TriageQueue, due_ts, triage_key
+
+
+def _record(new_report, report_id, issue_type='Pothole', priority='Medium', status='Received',
+            reported_ts=1_700_000_000):
+    return ReportRecord.from_dict(new_report(id=report_id, issue_type=issue_type, priority=priority, status=status,
+                                             date_reported=format_timestamp(reported_ts)))
+
+
+def test_orders_by_priority_then_due_time(new_report):
+    queue = TriageQueue([
+        _record(new_report, 1, 'Graffiti', 'High'),
+        _record(new_report, 2, 'Safety Hazard', 'High'),
+        _record(new_report, 3, 'Graffiti', 'Emergency', reported_ts=1_700_500_000),
+        _record(new_report, 4, 'Pothole', 'Low'),
+        _record(new_report, 5, 'Pothole', 'Emergency', status='Resolved'),
+    ])
+    assert [report.id for report in queue.next(10)] == [3, 2, 1, 4]
+    assert [report.id for report in queue.next(10, 'High')] == [2, 1]
+    assert [report.id for report in queue.next(2, offset=1)] == [2, 1]
+    assert queue.count() == 4 and queue.count('Emergency') == 1
+    assert 5 not in queue
+
+
+def test_matches_a_full_sort_through_random_changes(new_report):
+    rng = random.Random(7)
+    start = 1_700_000_000
+    reports = {report_id: _record(new_report, report_id, rng.choice(ISSUE_TYPES), rng.choice(PRIORITIES),
+                                  rng.choice(OPEN_STATUSES + ('Resolved',)), start + rng.randrange(10**6))
+               for report_id in range(1, 301)}
+    queue = TriageQueue(reports.values())
+    now = start
+    for step in range(3000):
+        report_id = rng.randrange(1, 320)
+        if report_id not in reports:
+            reports[report_id] = _record(new_report, report_id, reported_ts=start + rng.randrange(10**6))
+            queue.add(reports[report_id])
+        elif rng.random() < 0.05:
+            del reports[report_id]
+            queue.remove(report_id)
+        else:
+            changed = reports[report_id].to_dict()
+            changed.update(priority=rng.choice(PRIORITIES), status=rng.choice(OPEN_STATUSES + ('Resolved',)))
+            reports[report_id] = ReportRecord.from_dict(changed)
+            queue.update(reports[report_id])
+
+        if step % 100 == 0:
+            now += rng.randrange(-10**5, 3 * 10**5)
+            expected = sorted((report for report in reports.values() if report.status in OPEN_STATUSES),
+                              key=triage_key)
+            assert [report.id for report in queue.next(len(expected))] == [report.id for report in expected]
+            for priority in PRIORITIES:
+                of_priority = [report for report in expected if report.priority == priority]
+                assert [report.id for report in queue.next(5, priority, offset=2)] == \
+                    [report.id for report in of_priority[2:7]]
+                assert queue.count(priority) == len(of_priority)
+                assert queue.count_overdue(now, priority) == sum(due_ts(report) < now for report in of_priority)
+            assert len(queue) == len(expected)